@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'production'))
+from classifier_service import _load_bundle, _score
+from export_models import MODELS_DIR
+
+# Load time, single-call latency and batched throughput of the classifier backends.
+# Scores through _score directly so the prediction memo doesn't hide model cost.
+# Usage: python benchmark_backends.py --backends pickle onnx xgboost --batch-sizes 1 64 1024
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'Data', 'cleaned_data.csv')
+
+
+def load_texts(n):
+    if os.path.exists(DATA_PATH):
+        df = pd.read_csv(DATA_PATH, usecols=['emergency_title'], nrows=max(n * 5, 10000))
+        titles = df['emergency_title'].dropna().astype(str)
+        return titles.sample(n, replace=len(titles) < n, random_state=42).tolist()
+    return ["EMS: FALL VICTIM", "Fire: BUILDING FIRE", "Traffic: VEHICLE ACCIDENT -"] * (n // 3 + 1)
+
+
+def bench_backend(backend, bundle_name, texts, single_calls, batch_sizes, threads):
+    t0 = time.perf_counter()
+    bundle, _ = _load_bundle(os.path.join(MODELS_DIR, bundle_name), backend)
+    load_s = time.perf_counter() - t0
+    model, vect, le = bundle['model'], bundle['vect'], bundle['label_encoder']
+    if threads and hasattr(model, 'set_params'):
+        model.set_params(n_jobs=threads)
+
+    _score(model, vect, le, texts[:10])  # warm-up
+
+    latencies = []
+    for text in texts[:single_calls]:
+        t0 = time.perf_counter()
+        _score(model, vect, le, [text])
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    row = {
+        'backend': backend,
+        'load_ms': round(load_s * 1000, 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+    }
+    for size in batch_sizes:
+        t0 = time.perf_counter()
+        for start in range(0, len(texts), size):
+            _score(model, vect, le, texts[start:start + size])
+        row[f'batch{size}_per_s'] = round(len(texts) / (time.perf_counter() - t0))
+    return row
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark classifier runtime backends")
+    parser.add_argument('--backends', nargs='+', default=['pickle', 'onnx', 'xgboost'])
+    parser.add_argument('--bundle', default='XGBoost_Combined_MultiJurisdiction.pkl')
+    parser.add_argument('--texts', type=int, default=20000, help="Texts for the batched runs")
+    parser.add_argument('--single-calls', type=int, default=500)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 64, 1024])
+    parser.add_argument('--threads', type=int, default=1, help="Model threads (0 = library default)")
+    args = parser.parse_args()
+
+    texts = load_texts(args.texts)
+    rows = [bench_backend(b, args.bundle, texts, args.single_calls, args.batch_sizes, args.threads)
+            for b in args.backends]
+
+    print(f"\n{args.bundle}: {len(texts)} texts, {args.threads or 'default'} model threads")
+    print(pd.DataFrame(rows).to_string(index=False))
@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Per-process memory of the classifier cascade (main + 3 subtype models) for each
+# backend / featurizer combination. Every configuration is measured in a fresh
+# subprocess: RSS after imports, RSS after loading the models, and the size of the
+# vectorizer vocabularies themselves.
+# Usage: python memory_report.py [--configs pickle:tfidf pickle:compact xgboost:compact]
+# Needs production/compact_tfidf.py (and export_models.py for onnx/xgboost) run first.
+
+PRODUCTION_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'production')
+
+DEFAULT_CONFIGS = ['pickle:tfidf', 'pickle:compact', 'xgboost:tfidf', 'xgboost:compact', 'onnx:compact']
+
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return None
+
+
+def vocabulary_bytes(vect, seen):
+    #Deep size of a vectorizer's vocabulary structures (shared arrays counted once)
+    if hasattr(vect, 'vocabulary_'):
+        vocab = vect.vocabulary_
+        size = sys.getsizeof(vocab) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in vocab.items())
+        stop_words = getattr(vect, 'stop_words_', None) or ()
+        return size + sum(sys.getsizeof(w) for w in stop_words)
+    if hasattr(vect, 'columns'):
+        size = vect.columns.nbytes + (vect.idf.nbytes if vect.idf is not None else 0)
+        if id(vect.vocabulary) not in seen:
+            seen.add(id(vect.vocabulary))
+            size += vect.vocabulary.hashes.nbytes
+        return size
+    return 0
+
+
+def measure(backend, featurizer):
+    #Runs inside the child process
+    import gc
+    os.environ['CLASSIFIER_FEATURIZER'] = featurizer
+    sys.path.append(PRODUCTION_DIR)
+    import classifier_service
+    import sklearn.feature_extraction.text  # noqa: F401
+    import xgboost  # noqa: F401
+
+    gc.collect()
+    base = rss_mb()
+
+    main = classifier_service.EmergencyClassifier(backend=backend)
+    subtypes = classifier_service.SubtypeClassifier(backend=backend)
+    gc.collect()
+    loaded = rss_mb()
+
+    seen = set()
+    vectorizers = [main.vectorizer] + [c['vectorizer'] for c in subtypes.classifiers.values() if c]
+    vocab = sum(vocabulary_bytes(v, seen) for v in vectorizers)
+
+    main.predict_batch(["EMS: FALL VICTIM", "Fire: BUILDING FIRE"])
+    return {
+        'backend': backend,
+        'featurizer': featurizer,
+        'rss_after_imports_mb': round(base, 1),
+        'rss_loaded_mb': round(loaded, 1),
+        'models_mb': round(loaded - base, 1),
+        'vocabulary_kb': round(vocab / 1024, 1),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Classifier memory report")
+    parser.add_argument('--configs', nargs='+', default=DEFAULT_CONFIGS, help="backend:featurizer pairs")
+    parser.add_argument('--child', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        backend, featurizer = args.child.split(':')
+        print('RESULT ' + json.dumps(measure(backend, featurizer)))
+        sys.exit(0)
+
+    import pandas as pd
+
+    rows = []
+    for config in args.configs:
+        out = subprocess.run([sys.executable, '-W', 'ignore', os.path.abspath(__file__), '--child', config],
+                             capture_output=True, text=True)
+        lines = [l for l in out.stdout.splitlines() if l.startswith('RESULT ')]
+        if out.returncode != 0 or not lines:
+            print(f"{config}: failed\n{out.stderr.strip().splitlines()[-1] if out.stderr.strip() else ''}")
+            continue
+        rows.append(json.loads(lines[-1][len('RESULT '):]))
+
+    if rows:
+        print(pd.DataFrame(rows).to_string(index=False))
@@ -2,25 +2,14 @@ import mysql.connector
 import random
 import logging
 import os
+import sys
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'production'))
+from keyword_rules import LEGACY_INCIDENT_RULES
+
 def classify_incident(description: str) -> str:
-    description = (description or "").lower()
-    fire_keywords = ['fire', 'smoke', 'explosion', 'burning', 'flames', 'blaze']
-    traffic_keywords = ['gunshot', 'gunshots', 'robbery', 'shooting', 'theft', 'burglary',
-                       'assault', 'car accident', 'accident', 'crash', 'traffic', 'hit and run']
-    EMS_keywords = ['heart attack', 'cardiac', 'chest pain', 'fever', 'vomiting', 'injury',
-                        'collapsed', 'ambulance', 'stroke', 'unconscious', 'unresponsive', 'dizziness',
-                        'fall', 'head injury', 'allergic reaction', 'respiratory', 'breathing', 'asthma',
-                        'seizure', 'overdose']
-
-    if any(keyword in description for keyword in fire_keywords):
-        return 'Fire'
-    if any(keyword in description for keyword in EMS_keywords):
-        return 'EMS'
-    if any(keyword in description for keyword in traffic_keywords):
-        return 'Traffic'
-    return 'Unknown'
+    return LEGACY_INCIDENT_RULES.match(description or "")
 
 dotenv_path = os.path.join(os.path.dirname(__file__), '..', 'crisislens-api', '.env')
 load_dotenv(dotenv_path)
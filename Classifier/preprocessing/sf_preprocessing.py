@@ -1,4 +1,9 @@
 import pandas as pd
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'production'))
+from keyword_rules import SF_CALLTYPE_RULES
 
 # Load SF data
 sf = pd.read_csv('C:/Capstone/SF_data.csv')
@@ -9,26 +14,12 @@ print(f"\nCallType value counts:")
 print(sf['CallType'].value_counts().head(20))
 
 # Map SF CallType to your EMS/Fire/Traffic taxonomy
+# (Fire, then EMS, then Traffic keywords - rules live in production/keyword_rules.py)
 def map_sf_to_taxonomy(call_type):
-    call_type = str(call_type).lower()
-    
-    # Fire mappings
-    if any(kw in call_type for kw in ['fire', 'explosion', 'smoke', 'alarm', 'hazmat']):
-        return 'Fire'
-    
-    # EMS mappings
-    if any(kw in call_type for kw in ['medical', 'illness', 'injury', 'cardiac', 
-                                        'overdose', 'seizure', 'breathing']):
-        return 'EMS'
-    
-    # Traffic mappings
-    if any(kw in call_type for kw in ['vehicle', 'accident', 'collision', 'traffic']):
-        return 'Traffic'
-    
-    return 'Other'
+    return SF_CALLTYPE_RULES.match(call_type)
 
 # Apply mapping
-sf['emergency_type'] = sf['CallType'].apply(map_sf_to_taxonomy)
+sf['emergency_type'] = SF_CALLTYPE_RULES.match_series(sf['CallType'])
 
 print(f"\n=== Mapped SF Data ===")
 print(sf['emergency_type'].value_counts())
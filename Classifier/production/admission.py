@@ -0,0 +1,185 @@
+"""
+Queue-depth-aware admission control for call ingestion.
+
+backlog depth = RQ jobs waiting in both lanes + call-stream entries not yet acknowledged.
+
+    depth >= ADMISSION_HIGH_WATERMARK   shedding: bulk ingest gets 429 + Retry-After for
+                                        non-priority calls (single POST /calls is never refused)
+    depth <= ADMISSION_LOW_WATERMARK    back to normal (hysteresis, the flag lives in Redis so
+                                        every API process agrees)
+    depth >= BATCH_MODE_THRESHOLD       RQ workers enrich blocks of unprocessed calls per job
+
+priority_flag calls go to their own lane (PRIORITY_QUEUE / PRIORITY_STREAM_KEY) that workers
+drain first.
+"""
+import os
+import sys
+import time
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from call_stream import CALL_STREAM_KEY, CALL_STREAM_GROUP, PRIORITY_STREAM_KEY, stream_stats
+
+QUEUE = 'crisislens'
+PRIORITY_QUEUE = 'crisislens-priority'
+SHEDDING_KEY = 'crisislens:admission:shedding'
+
+ADMISSION_HIGH_WATERMARK = int(os.getenv('ADMISSION_HIGH_WATERMARK', 20000))
+ADMISSION_LOW_WATERMARK = int(os.getenv('ADMISSION_LOW_WATERMARK', 10000))
+BATCH_MODE_THRESHOLD = int(os.getenv('BATCH_MODE_THRESHOLD', 5000))
+BATCH_MODE_BLOCK = int(os.getenv('BATCH_MODE_BLOCK', 200))
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', 30))
+ADMISSION_CACHE_SECONDS = float(os.getenv('ADMISSION_CACHE_SECONDS', 1.0))
+
+
+def _str(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _oldest_job_age(conn, queue):
+    #Seconds since the job at the head of an RQ queue was enqueued
+    job_id = conn.lindex(f"rq:queue:{queue}", 0)
+    if job_id is None:
+        return None
+    enqueued_at = conn.hget(f"rq:job:{_str(job_id)}", 'enqueued_at')
+    if not enqueued_at:
+        return None
+    from datetime import datetime, timezone
+    enqueued = datetime.fromisoformat(_str(enqueued_at).replace('Z', '+00:00'))
+    if enqueued.tzinfo is None:
+        enqueued = enqueued.replace(tzinfo=timezone.utc)
+    return round((datetime.now(timezone.utc) - enqueued).total_seconds(), 3)
+
+
+def backlog(conn):
+    pipe = conn.pipeline(transaction=False)
+    pipe.llen(f"rq:queue:{QUEUE}")
+    pipe.llen(f"rq:queue:{PRIORITY_QUEUE}")
+    pipe.exists(SHEDDING_KEY)
+    queued, priority_queued, shedding = pipe.execute()
+
+    stream = stream_stats(conn, CALL_STREAM_KEY, CALL_STREAM_GROUP)
+    priority_stream = stream_stats(conn, PRIORITY_STREAM_KEY, CALL_STREAM_GROUP)
+    stream_backlog = sum((s['lag'] or 0) + s['pending'] for s in (stream, priority_stream))
+
+    return {
+        'queued': queued,
+        'priority_queued': priority_queued,
+        'stream_backlog': stream_backlog,
+        'depth': queued + priority_queued + stream_backlog,
+        'oldest_job_seconds': _oldest_job_age(conn, QUEUE),
+        'oldest_priority_job_seconds': _oldest_job_age(conn, PRIORITY_QUEUE),
+        'oldest_stream_pending_seconds': stream['oldest_pending_seconds'],
+        'shedding_flag': bool(shedding),
+    }
+
+
+class AdmissionController:
+    """
+    Per-process view of the backlog, refreshed at most every cache_seconds so admission
+    costs one Redis round trip per interval rather than per request.
+    """
+
+    def __init__(self, conn, high=ADMISSION_HIGH_WATERMARK, low=ADMISSION_LOW_WATERMARK,
+                 batch_threshold=BATCH_MODE_THRESHOLD, cache_seconds=ADMISSION_CACHE_SECONDS):
+        if low > high:
+            raise ValueError(f"Low watermark ({low}) above high watermark ({high})")
+        self.conn = conn
+        self.high = high
+        self.low = low
+        self.batch_threshold = batch_threshold
+        self.cache_seconds = cache_seconds
+        self._state = None
+        self._checked = 0.0
+        self._samples = []  # (monotonic time, depth) for the drain rate
+        self._lock = threading.Lock()
+
+    def state(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._state is not None and now - self._checked < self.cache_seconds:
+                return self._state
+
+            state = backlog(self.conn)
+            depth = state['depth']
+            shedding = depth >= self.high or (state['shedding_flag'] and depth > self.low)
+            if shedding != state['shedding_flag']:
+                if shedding:
+                    self.conn.set(SHEDDING_KEY, depth)
+                    print(f" Backlog {depth} >= {self.high}: shedding bulk ingest")
+                else:
+                    self.conn.delete(SHEDDING_KEY)
+                    print(f" Backlog {depth} <= {self.low}: admitting bulk ingest again")
+
+            self._samples = [s for s in self._samples if now - s[0] <= 60] + [(now, depth)]
+            state.update(shedding=shedding, batch_mode=depth >= self.batch_threshold,
+                         high_watermark=self.high, low_watermark=self.low,
+                         drain_per_second=self._drain_rate())
+            self._state, self._checked = state, now
+            return state
+
+    def _drain_rate(self):
+        (t0, d0), (t1, d1) = self._samples[0], self._samples[-1]
+        if t1 - t0 < 1 or d1 >= d0:
+            return None
+        return round((d0 - d1) / (t1 - t0), 2)
+
+    def retry_after(self, state=None):
+        #Seconds until the backlog should be back at the low watermark, from the observed drain rate
+        state = state or self.state()
+        rate = state['drain_per_second']
+        if not rate:
+            return ADMISSION_RETRY_AFTER
+        return int(min(300, max(1, (state['depth'] - self.low) / rate)))
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_controller(conn=None):
+    #Process-wide controller; conn defaults to REDIS_HOST/REDIS_PORT
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            if conn is None:
+                from redis import Redis
+                conn = Redis(host=os.getenv('REDIS_HOST', 'localhost'), port=int(os.getenv('REDIS_PORT', 6379)))
+            _controller = AdmissionController(conn)
+    return _controller
+
+
+def batch_mode_active():
+    #True when workers should enrich blocks; False if Redis can't be asked
+    try:
+        return get_controller().state()['batch_mode']
+    except Exception as e:
+        print(f" Backlog check failed: {e}")
+        return False
+
+
+def render_prometheus(state):
+    gauges = [
+        ('crisislens_queue_depth', 'Enrichment jobs waiting per RQ lane',
+         [({'queue': QUEUE}, state['queued']), ({'queue': PRIORITY_QUEUE}, state['priority_queued'])]),
+        ('crisislens_stream_backlog', 'Call-stream entries not yet acknowledged (both lanes)',
+         [({}, state['stream_backlog'])]),
+        ('crisislens_backlog_depth', 'Total enrichment backlog used for admission control', [({}, state['depth'])]),
+        ('crisislens_enrichment_lag_seconds', 'Age of the oldest waiting enrichment job',
+         [({'queue': QUEUE}, state['oldest_job_seconds']),
+          ({'queue': PRIORITY_QUEUE}, state['oldest_priority_job_seconds']),
+          ({'queue': 'stream'}, state['oldest_stream_pending_seconds'])]),
+        ('crisislens_admission_shedding', '1 while bulk ingest is refused', [({}, int(state['shedding']))]),
+        ('crisislens_worker_batch_mode', '1 while workers enrich in blocks', [({}, int(state['batch_mode']))]),
+    ]
+    lines = []
+    for name, help_text, series in gauges:
+        series = [(labels, value) for labels, value in series if value is not None]
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in series:
+            label_text = '{' + ','.join(f'{k}="{v}"' for k, v in labels.items()) + '}' if labels else ''
+            lines.append(f"{name}{label_text} {value}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,79 @@
+"""
+Live feed of newly enriched calls.
+
+Workers append each committed enriched_calls row to the capped CALL_EVENTS_STREAM and
+PUBLISH the block to CALL_EVENTS_CHANNEL. The API fans the channel out to Server-Sent
+Events clients; the stream entry id doubles as the SSE event id, so a reconnecting
+client replays what it missed (within CALL_EVENTS_MAXLEN) from its Last-Event-ID.
+"""
+import os
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+CALL_EVENTS_ENABLED = os.getenv('CALL_EVENTS_ENABLED', '1') == '1'
+CALL_EVENTS_CHANNEL = os.getenv('CALL_EVENTS_CHANNEL', 'crisislens:events:calls')
+CALL_EVENTS_STREAM = f"{CALL_EVENTS_CHANNEL}:history"
+CALL_EVENTS_MAXLEN = int(os.getenv('CALL_EVENTS_MAXLEN', 10000))
+
+# same fields as a 'live' row of /calls/latest, plus the raw call and its priority
+EVENT_FIELDS = ['id', 'raw_call_id', 'timestamp', 'emergency_type', 'emergency_subtype', 'district',
+                'latitude', 'longitude', 'description', 'caller_gender', 'caller_age', 'source', 'priority_flag']
+
+
+def _str(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def call_event(enriched_id, raw_call, emergency_type, emergency_subtype):
+    return {
+        'id': enriched_id,
+        'raw_call_id': raw_call['id'],
+        'timestamp': raw_call['timestamp'],
+        'emergency_type': emergency_type,
+        'emergency_subtype': emergency_subtype,
+        'district': raw_call.get('district'),
+        'latitude': raw_call['latitude'],
+        'longitude': raw_call['longitude'],
+        'description': raw_call['description'],
+        'caller_gender': raw_call.get('gender'),
+        'caller_age': raw_call.get('age'),
+        'source': 'WebForm',
+        'priority_flag': raw_call.get('priority_flag', 0),
+        'data_source': 'live',
+    }
+
+
+def publish_calls(conn, events):
+    #One pipelined round trip: history entries + one message for the whole block.
+    #Returns the event ids
+    if not events:
+        return []
+    payloads = [json.dumps(event, default=_json_default) for event in events]
+    pipe = conn.pipeline(transaction=False)
+    for payload in payloads:
+        pipe.xadd(CALL_EVENTS_STREAM, {'call': payload}, maxlen=CALL_EVENTS_MAXLEN, approximate=True)
+    event_ids = [_str(event_id) for event_id in pipe.execute()]
+
+    message = [{'event_id': event_id, 'call': payload} for event_id, payload in zip(event_ids, payloads)]
+    conn.publish(CALL_EVENTS_CHANNEL, json.dumps(message))
+    return event_ids
+
+
+def replay(conn, last_event_id, count=CALL_EVENTS_MAXLEN):
+    #[(event_id, call json)] published after last_event_id, oldest first
+    entries = conn.xrange(CALL_EVENTS_STREAM, min=f"({last_event_id}", max='+', count=count)
+    return [(_str(event_id), _str(fields.get(b'call', fields.get('call')))) for event_id, fields in entries]
+
+
+def parse_message(data):
+    #[(event_id, call json)] from one pub/sub message
+    return [(item['event_id'], item['call']) for item in json.loads(_str(data))]
@@ -0,0 +1,246 @@
+"""
+Redis Streams transport for enrichment (INGEST_TRANSPORT=stream), instead of one RQ job per call.
+
+The API appends {'raw_id': ...} entries to CALL_STREAM_KEY. Enrichment workers read them in
+blocks through the CALL_STREAM_GROUP consumer group, enrich the whole block at once and XACK
+only after the enriched_calls commit, so a worker that dies mid-block leaves its entries
+pending. Other consumers take those over with XAUTOCLAIM once they have been idle for
+STREAM_CLAIM_IDLE_MS; entries delivered STREAM_MAX_DELIVERIES times go to the dead-letter stream.
+"""
+import os
+import time
+
+INGEST_TRANSPORT = os.getenv('INGEST_TRANSPORT', 'rq')
+CALL_STREAM_KEY = os.getenv('CALL_STREAM_KEY', 'crisislens:calls')
+CALL_STREAM_GROUP = os.getenv('CALL_STREAM_GROUP', 'enrichment')
+PRIORITY_STREAM_KEY = f"{CALL_STREAM_KEY}:priority"
+DEAD_LETTER_KEY = f"{CALL_STREAM_KEY}:dead"
+
+# approximate MAXLEN trimming keeps the stream bounded; acked entries are only history
+STREAM_MAXLEN = int(os.getenv('STREAM_MAXLEN', 1_000_000))
+STREAM_BLOCK_COUNT = int(os.getenv('STREAM_BLOCK_COUNT', 100))
+STREAM_BLOCK_MS = int(os.getenv('STREAM_BLOCK_MS', 2000))
+STREAM_CLAIM_IDLE_MS = int(os.getenv('STREAM_CLAIM_IDLE_MS', 60000))
+STREAM_MAX_DELIVERIES = int(os.getenv('STREAM_MAX_DELIVERIES', 5))
+# consumers of restarted workers are removed from the group once idle this long with nothing pending
+STREAM_CONSUMER_EXPIRE_MS = int(os.getenv('STREAM_CONSUMER_EXPIRE_MS', 3600 * 1000))
+
+
+def _str(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def publish(conn, raw_ids, key=CALL_STREAM_KEY):
+    #Appends one entry per raw call in a single pipeline, returns the entry ids
+    pipe = conn.pipeline(transaction=False)
+    for raw_id in raw_ids:
+        pipe.xadd(key, {'raw_id': raw_id}, maxlen=STREAM_MAXLEN, approximate=True)
+    return [_str(entry_id) for entry_id in pipe.execute()]
+
+
+def ensure_group(conn, key=CALL_STREAM_KEY, group=CALL_STREAM_GROUP):
+    #Creates the stream and the group (reading from the start) if needed
+    from redis.exceptions import ResponseError
+    try:
+        conn.xgroup_create(key, group, id='0', mkstream=True)
+    except ResponseError as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+
+class StreamConsumer:
+    """
+    Reads blocks of entries for one consumer name and passes their raw ids to
+    handler(raw_ids). The block is acknowledged when the handler returns; if it raises,
+    the entries stay pending and are retried through XAUTOCLAIM.
+    With a priority_key, that stream is always drained before the regular one.
+    """
+
+    def __init__(self, conn, name, handler, key=CALL_STREAM_KEY, group=CALL_STREAM_GROUP,
+                 count=STREAM_BLOCK_COUNT, block_ms=STREAM_BLOCK_MS, claim_idle_ms=STREAM_CLAIM_IDLE_MS,
+                 max_deliveries=STREAM_MAX_DELIVERIES, priority_key=None):
+        self.conn = conn
+        self.name = name
+        self.handler = handler
+        self.key = key
+        self.keys = [k for k in (priority_key, key) if k]
+        self.group = group
+        self.count = count
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.max_deliveries = max_deliveries
+        self.stopping = False
+        self.stats = {'entries': 0, 'blocks': 0, 'failed_blocks': 0, 'claimed': 0, 'dead_lettered': 0}
+        self._last_claim = 0.0
+        self._recovered = False
+
+    def stop(self, *args):
+        self.stopping = True
+
+    def _xread(self, streams, block=None):
+        response = self.conn.xreadgroup(self.group, self.name, streams, count=self.count, block=block)
+        return [(_str(key), entries) for key, entries in response or [] if entries]
+
+    def read(self):
+        #[(key, entries)]: on start the entries this consumer name left pending before a
+        #restart, then new ones, priority stream first
+        if not self._recovered:
+            self._recovered = True
+            for key in self.keys:
+                blocks = self._xread({key: '0'})
+                if blocks:
+                    return blocks
+        for key in self.keys[:-1]:
+            blocks = self._xread({key: '>'})
+            if blocks:
+                return blocks
+        # everything read here is now pending for this consumer, so all of it is returned
+        return self._xread({key: '>' for key in self.keys}, block=self.block_ms)
+
+    def claim_stale(self):
+        #Takes over entries that another consumer read but never acknowledged
+        blocks = []
+        for key in self.keys:
+            entries = []
+            start = '0-0'
+            while len(entries) < self.count:
+                response = self.conn.xautoclaim(key, self.group, self.name, self.claim_idle_ms,
+                                                start_id=start, count=self.count)
+                start, claimed = _str(response[0]), [e for e in response[1] if e[1]]
+                entries.extend(claimed)
+                if start == '0-0':
+                    break
+            if entries:
+                self.stats['claimed'] += len(entries)
+                print(f" {self.name} reclaimed {len(entries)} stale entries from {key}")
+                entries = self.drop_poison(key, entries)
+            if entries:
+                blocks.append((key, entries))
+            self.remove_idle_consumers(key)
+        return blocks
+
+    def remove_idle_consumers(self, key):
+        for consumer in self.conn.xinfo_consumers(key, self.group):
+            name = _str(consumer['name'])
+            if name != self.name and consumer['pending'] == 0 and consumer['idle'] > STREAM_CONSUMER_EXPIRE_MS:
+                self.conn.xgroup_delconsumer(key, self.group, name)
+
+    def drop_poison(self, key, entries):
+        #Entries that failed max_deliveries times go to the dead-letter stream and are acked
+        if not entries or not self.max_deliveries:
+            return entries
+        ids = [_str(entry_id) for entry_id, _ in entries]
+        pending = self.conn.xpending_range(key, self.group, min=ids[0], max=ids[-1],
+                                           count=len(ids) * 2, consumername=self.name)
+        deliveries = {_str(p['message_id']): p['times_delivered'] for p in pending}
+
+        keep, dead = [], []
+        for entry in entries:
+            (dead if deliveries.get(_str(entry[0]), 0) > self.max_deliveries else keep).append(entry)
+        if dead:
+            pipe = self.conn.pipeline()
+            for entry_id, fields in dead:
+                pipe.xadd(DEAD_LETTER_KEY, {**fields, 'source_id': entry_id, 'stream': key},
+                          maxlen=STREAM_MAXLEN, approximate=True)
+            pipe.xack(key, self.group, *[entry_id for entry_id, _ in dead])
+            pipe.execute()
+            self.stats['dead_lettered'] += len(dead)
+            print(f" {self.name} moved {len(dead)} entries to {DEAD_LETTER_KEY}")
+        return keep
+
+    def _handle(self, key, entries):
+        raw_ids = [int(_str(value)) for _, fields in entries for name, value in fields.items() if _str(name) == 'raw_id']
+        self.handler(raw_ids)
+        self.conn.xack(key, self.group, *[entry_id for entry_id, _ in entries])
+        self.stats['entries'] += len(entries)
+
+    def process(self, key, entries):
+        try:
+            self._handle(key, entries)
+            self.stats['blocks'] += 1
+            return
+        except Exception as e:
+            self.stats['failed_blocks'] += 1
+            print(f" {self.name} failed a block of {len(entries)} calls: {e}")
+        if len(entries) == 1:
+            return
+        # one entry at a time so a single bad call doesn't hold back the rest of the block;
+        # the ones that still fail stay pending for claim_stale()
+        failed = 0
+        for entry in entries:
+            try:
+                self._handle(key, [entry])
+            except Exception:
+                failed += 1
+        if failed:
+            print(f" {self.name} left {failed} of {len(entries)} entries pending")
+
+    def run_once(self):
+        if time.monotonic() - self._last_claim >= self.claim_idle_ms / 1000:
+            self._last_claim = time.monotonic()
+            for key, entries in self.claim_stale():
+                self.process(key, entries)
+        blocks = self.read()
+        for key, entries in blocks:
+            self.process(key, entries)
+        return sum(len(entries) for _, entries in blocks)
+
+    def run(self):
+        for key in self.keys:
+            ensure_group(self.conn, key, self.group)
+        print(f" {self.name} consuming {', '.join(self.keys)} (group {self.group}, blocks of {self.count})")
+        while not self.stopping:
+            self.run_once()
+        print(f" {self.name} stopped: {self.stats}")
+
+
+def stream_stats(conn, key=CALL_STREAM_KEY, group=CALL_STREAM_GROUP):
+    #Length, consumer-group lag, pending count and age of the oldest pending entry
+    from redis.exceptions import ResponseError
+    try:
+        length = conn.xlen(key)
+        groups = {_str(g['name']): g for g in conn.xinfo_groups(key)}
+    except ResponseError:
+        return {'stream': key, 'length': 0, 'group': group, 'lag': None, 'pending': 0, 'consumers': 0,
+                'oldest_pending_seconds': None, 'dead_letters': 0}
+
+    info = groups.get(group, {})
+    # 'lag' needs Redis 7+, it is None (and not exported) on older servers
+    lag = info.get('lag')
+
+    oldest = None
+    if info.get('pending'):
+        first = conn.xpending_range(key, group, min='-', max='+', count=1)
+        if first:
+            # entry ids start with their creation time in ms
+            created_ms = int(_str(first[0]['message_id']).split('-')[0])
+            oldest = round(time.time() - created_ms / 1000, 3)
+    return {
+        'stream': key,
+        'length': length,
+        'group': group,
+        'lag': lag,
+        'pending': info.get('pending', 0),
+        'consumers': info.get('consumers', 0),
+        'oldest_pending_seconds': oldest,
+        'dead_letters': conn.xlen(DEAD_LETTER_KEY),
+    }
+
+
+def render_prometheus(stats):
+    lines = []
+    gauges = [
+        ('crisislens_stream_length', 'length', 'Entries in the call stream'),
+        ('crisislens_stream_lag', 'lag', 'Entries not yet delivered to the enrichment group'),
+        ('crisislens_stream_pending', 'pending', 'Entries delivered but not acknowledged'),
+        ('crisislens_stream_oldest_pending_seconds', 'oldest_pending_seconds', 'Age of the oldest unacknowledged entry'),
+        ('crisislens_stream_dead_letters', 'dead_letters', 'Entries moved to the dead-letter stream'),
+    ]
+    labels = f'{{stream="{stats["stream"]}",group="{stats["group"]}"}}'
+    for name, field, help_text in gauges:
+        if stats.get(field) is None:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name}{labels} {stats[field]}")
+    return '\n'.join(lines) + '\n' if lines else ''
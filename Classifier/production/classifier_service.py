@@ -5,11 +5,79 @@ cascading subtype classification.
 """
 import joblib
 import os
+import pandas as pd
+import sys
+from collections import namedtuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from prediction_cache import PredictionCache, model_version, cached_batch
+from keyword_rules import CALL_RULES
+from stage_metrics import timed
+from runtime_backends import BACKENDS, CLASSIFIER_BACKEND, exported_path, load_exported_bundle
+from compact_tfidf import CLASSIFIER_FEATURIZER, load_compact_featurizer
+import model_registry
+
+
+def _load_bundle(model_path, backend, featurizer=None, registry_version=None):
+    """
+    Pickled bundle, or its export from runtime_backends for the onnx/xgboost backends.
+    With the 'compact' featurizer the TF-IDF vectorizer is swapped for the shared
+    array-backed one from compact_tfidf.
+    registry_version: the version model_path belongs to, whose exports and compact
+    cascade are used; both are checked against model_path's sha1.
+    """
+    featurizer = featurizer or CLASSIFIER_FEATURIZER
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown classifier backend '{backend}', expected one of {BACKENDS}")
+    compact = featurizer == 'compact'
+    
+    if backend == 'pickle':
+        bundle, version = joblib.load(model_path), model_version(model_path)
+    else:
+        bundle, version = load_exported_bundle(exported_path(model_path, version=registry_version), backend,
+                                               load_vectorizer=not compact, source_path=model_path)
+    
+    if compact and isinstance(bundle, dict):
+        vect = load_compact_featurizer(os.path.basename(model_path), version=registry_version,
+                                       source_path=model_path)
+        expected = getattr(bundle['model'], 'n_features_in_', vect.n_features)
+        if vect.n_features != expected:
+            raise ValueError(f"Compact featurizer for {model_path} is stale, rerun compact_tfidf.py")
+        bundle['vect'] = vect
+    return bundle, version
+
+
+def _score(model, vectorizer, label_encoder, texts, name='main'):
+    #Vectorize and score a list of texts -> [(label, confidence), ...]
+    with timed('classifier', model=name, stage='tfidf_transform'):
+        text_vec = vectorizer.transform(texts)
+    
+    with timed('classifier', model=name, stage='model_predict'):
+        if hasattr(model, 'predict_proba'):
+            proba = model.predict_proba(text_vec)
+            encoded = proba.argmax(axis=1)
+            confidences = proba.max(axis=1).tolist()
+        else:
+            encoded = model.predict(text_vec)
+            confidences = [None] * len(texts)
+    
+    with timed('classifier', model=name, stage='label_decode'):
+        if label_encoder:
+            labels = label_encoder.inverse_transform(encoded)
+        else:
+            labels = encoded
+    
+    return [(str(label), conf) for label, conf in zip(labels, confidences)]
 
 
 class EmergencyClassifier:
     
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, backend=None, version=None):
+        #version: registry version to load (default: the promoted one, or models/ without a registry)
+        self.registry_version = None
+        if model_path is None:
+            self.registry_version = version or model_registry.current_version()
+            model_path = model_registry.resolve('main', self.registry_version)
         if model_path is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  
             model_path = os.path.join(base_dir, 'models', 'XGBoost_Combined_MultiJurisdiction.pkl')
@@ -18,12 +86,16 @@ class EmergencyClassifier:
         self.model = None
         self.vectorizer = None
         self.label_encoder = None
+        self.backend = backend or CLASSIFIER_BACKEND
+        self.model_version = None
+        self.cache = PredictionCache()
         self._load_model()
     
     def _load_model(self):
         try:
-            print(f"Loading main classifier from: {self.model_path}")
-            model_bundle = joblib.load(self.model_path)
+            print(f"Loading main classifier from: {self.model_path} (backend: {self.backend})")
+            model_bundle, self.model_version = _load_bundle(self.model_path, self.backend,
+                                                            registry_version=self.registry_version)
             
             if isinstance(model_bundle, dict):
                 self.model = model_bundle.get('model')
@@ -39,36 +111,48 @@ class EmergencyClassifier:
             raise
     
     def predict(self, text):
+        return self.predict_with_confidence(text)[0]
+    
+    def predict_with_confidence(self, text):
+        return self.predict_batch([text])[0]
+    
+    def predict_batch(self, texts):
+        """
+        Predict (label, confidence) for a list of texts.
+        Duplicates are scored once and repeated texts are served from the LRU memo.
+        """
         if not self.model or not self.vectorizer:
             raise Exception("Model not loaded properly")
         
-        text_vec = self.vectorizer.transform([text])
-        prediction_encoded = self.model.predict(text_vec)[0]
-        
-        if self.label_encoder:
-            prediction = self.label_encoder.inverse_transform([prediction_encoded])[0]
-        else:
-            prediction = prediction_encoded
-        
-        return prediction
+        results, _ = cached_batch(
+            texts, self.model_version, self.cache,
+            lambda unique: _score(self.model, self.vectorizer, self.label_encoder, unique, 'main'),
+            lowercase=getattr(self.vectorizer, 'lowercase', False))
+        return results
 
 
 class SubtypeClassifier:
     
-    def __init__(self):
+    def __init__(self, backend=None, version=None):
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  
         models_dir = os.path.join(base_dir, 'models')
+        self.registry_version = version or model_registry.current_version()
         
         self.classifiers = {}
+        self.versions = {}
+        self.backend = backend or CLASSIFIER_BACKEND
+        self.cache = PredictionCache()
         
         for emergency_type in ['EMS', 'Fire', 'Traffic']:
-            model_path = os.path.join(models_dir, f'XGBoost_{emergency_type}_Subtype.pkl')
+            model_path = (model_registry.resolve(emergency_type, self.registry_version)
+                          or os.path.join(models_dir, f'XGBoost_{emergency_type}_Subtype.pkl'))
             self.classifiers[emergency_type] = self._load_model(model_path, emergency_type)
     
     def _load_model(self, model_path, emergency_type):
         try:
-            print(f"Loading {emergency_type} subtype classifier from: {model_path}")
-            model_bundle = joblib.load(model_path)
+            print(f"Loading {emergency_type} subtype classifier from: {model_path} (backend: {self.backend})")
+            model_bundle, self.versions[emergency_type] = _load_bundle(model_path, self.backend,
+                                                                       registry_version=self.registry_version)
             
             if isinstance(model_bundle, dict):
                 classifier = {
@@ -84,63 +168,209 @@ class SubtypeClassifier:
             
         except Exception as e:
             print(f" Error loading {emergency_type} subtype classifier: {str(e)}")
+            # a registry version loads completely or not at all, so the watcher keeps the old one
+            if self.registry_version:
+                raise
             return None
     
     def predict(self, text, emergency_type):
-        if emergency_type not in self.classifiers:
-            print(f"  No subtype classifier for {emergency_type}")
-            return "Unknown"
-        
-        classifier = self.classifiers[emergency_type]
-        
-        if not classifier or not classifier.get('model'):
-            print(f"  {emergency_type} classifier not loaded properly")
-            return "Unknown"
+        return self.predict_batch([text], [emergency_type])[0]
+    
+    def predict_batch(self, texts, emergency_types):
+        """
+        Predict subtypes for parallel lists of texts and main types.
+        Texts are grouped by type, deduplicated and memoized per subtype model.
+        """
+        results = ["Unknown"] * len(texts)
+        groups = {}
+        for i, emergency_type in enumerate(emergency_types):
+            groups.setdefault(emergency_type, []).append(i)
         
-        try:
-            text_vec = classifier['vectorizer'].transform([text])
-            prediction_encoded = classifier['model'].predict(text_vec)[0]
+        for emergency_type, idx in groups.items():
+            if emergency_type not in self.classifiers:
+                print(f"  No subtype classifier for {emergency_type}")
+                continue
             
-            if classifier.get('label_encoder'):
-                prediction = classifier['label_encoder'].inverse_transform([prediction_encoded])[0]
-            else:
-                prediction = prediction_encoded
+            classifier = self.classifiers[emergency_type]
             
-            return prediction
+            if not classifier or not classifier.get('model'):
+                print(f"  {emergency_type} classifier not loaded properly")
+                continue
             
-        except Exception as e:
-            print(f" Error predicting {emergency_type} subtype: {str(e)}")
-            return "Unknown"
+            try:
+                predictions, _ = cached_batch(
+                    [texts[i] for i in idx], self.versions[emergency_type], self.cache,
+                    lambda unique: [label for label, _ in _score(
+                        classifier['model'], classifier['vectorizer'], classifier.get('label_encoder'), unique,
+                        emergency_type)],
+                    lowercase=getattr(classifier['vectorizer'], 'lowercase', False))
+                for i, prediction in zip(idx, predictions):
+                    results[i] = prediction
+                
+            except Exception as e:
+                print(f" Error predicting {emergency_type} subtype: {str(e)}")
+        
+        return results
+
+
+# The loaded (main, subtypes, version) as one immutable tuple, replaced whole by
+# switch_model_version. Callers take it once per call or block and pass it along, so a
+# type, its subtype and the recorded version always come from the same models.
+LoadedModels = namedtuple('LoadedModels', ['main', 'subtypes', 'version'])
+_models = None
 
 
-_main_classifier = None
-_subtype_classifier = None
+def loaded_models():
+    #The current LoadedModels, loading them on first use
+    return _models if _models is not None else preload_models(_model_threads)
 
 
-def classify_call(description):
-    global _main_classifier
+def classify_call(description, models=None):
+    with timed('classifier', model='main', stage='keyword_rules'):
+        rule_type = CALL_RULES.match(description)
+    if rule_type:
+        return rule_type
     
-    desc_lower = description.lower()
+    models = models or loaded_models()
+    return models.main.predict(description)
+
+
+def classify_calls(descriptions, models=None):
+    """
+    Batch version of classify_call for a list/Series of descriptions.
+    Keyword rules are evaluated once per distinct text and only the texts
+    no rule matched are sent to the model.
+    """
+    descriptions = pd.Series(descriptions).fillna('').astype(str).reset_index(drop=True)
+    with timed('classifier', model='main', stage='keyword_rules'):
+        types = CALL_RULES.match_series(descriptions)
     
-    fire_keywords = ['fire', 'flames', 'flame', 'burning', 'smoke', 'blaze']
-    if any(kw in desc_lower for kw in fire_keywords):
-        if not any(ex in desc_lower for ex in ['firearm', 'firework', 'gunfire']):
-            return "Fire"
+    unmatched = types.isna()
+    if unmatched.any():
+        models = models or loaded_models()
+        predictions = models.main.predict_batch(descriptions[unmatched].tolist())
+        types[unmatched] = [label for label, _ in predictions]
     
-    traffic_keywords = ['crash', 'collision', 'accident', 'vehicle accident', 'car accident']
-    if any(kw in desc_lower for kw in traffic_keywords):
-        return "Traffic"
+    return types.tolist()
+
+
+def classify_batch(descriptions, models=None):
+    """
+    Type, subtype and confidence for a list of descriptions in one pass: keyword rules,
+    one main-model predict for the texts no rule matched, one predict per subtype model.
+    Returns [{'emergency_type', 'emergency_subtype', 'confidence', 'matched_by'}, ...];
+    confidence is None for rule matches.
+    """
+    # one LoadedModels for the whole batch, switch_model_version may publish a new one meanwhile
+    models = models or loaded_models()
+
+    descriptions = pd.Series(descriptions).fillna('').astype(str).reset_index(drop=True)
+    with timed('classifier', model='main', stage='keyword_rules'):
+        types = CALL_RULES.match_series(descriptions)
+
+    confidences = [None] * len(descriptions)
+    unmatched = types.isna()
+    if unmatched.any():
+        idx = [i for i, m in enumerate(unmatched) if m]
+        predictions = models.main.predict_batch(descriptions[unmatched].tolist())
+        types[unmatched] = [label for label, _ in predictions]
+        for i, (_, conf) in zip(idx, predictions):
+            confidences[i] = round(float(conf), 4) if conf is not None else None
+
+    types = types.tolist()
+    subtype_labels = models.subtypes.predict_batch(descriptions.tolist(), types)
+
+    return [{
+        'emergency_type': emergency_type,
+        'emergency_subtype': subtype,
+        'confidence': conf,
+        'matched_by': 'rules' if matched else 'model',
+    } for emergency_type, subtype, conf, matched in zip(types, subtype_labels, confidences, ~unmatched)]
+
+
+def classify_subtype(description, emergency_type, models=None):
+    models = models or loaded_models()
+    return models.subtypes.predict(description, emergency_type)
+
+
+def _set_threads(main, subtypes, n_threads):
+    models = [main.model] + [c.get('model') for c in subtypes.classifiers.values() if c]
+    for model in models:
+        if hasattr(model, 'n_jobs'):
+            model.set_params(n_jobs=n_threads)
+
+
+def _load_models(version=None):
+    main = EmergencyClassifier(version=version)
+    subtypes = SubtypeClassifier(version=main.registry_version)
+    if _model_threads:
+        _set_threads(main, subtypes, _model_threads)
+    return LoadedModels(main, subtypes, main.registry_version or main.model_version)
+
+
+_model_threads = None
+
+
+def preload_models(n_threads=None):
+    """
+    Load the main and subtype classifiers up front instead of on the first call.
+    Used by the worker supervisor so forked children share the loaded models.
+    n_threads caps XGBoost's threads per prediction (single texts gain nothing from more).
+    Returns the LoadedModels.
+    """
+    global _models, _model_threads
     
-    if _main_classifier is None:
-        _main_classifier = EmergencyClassifier()
+    _model_threads = n_threads
+    if _models is None:
+        _models = _load_models()
+    elif n_threads:
+        _set_threads(_models.main, _models.subtypes, n_threads)
     
-    return _main_classifier.predict(description)
+    return _models
 
 
-def classify_subtype(description, emergency_type):
-    global _subtype_classifier
-    
-    if _subtype_classifier is None:
-        _subtype_classifier = SubtypeClassifier()
+def current_model_version(models=None):
+    #Registry version of the loaded models, or the model file id without a registry
+    models = models or _models
+    return models.version if models is not None else None
+
+
+def switch_model_version(version):
+    """
+    Load a registry version completely, then swap it in.
+    Calls already running keep the LoadedModels they started with.
+    """
+    global _models
     
-    return _subtype_classifier.predict(description, emergency_type)
\ No newline at end of file
+    model_registry.verify(version)
+    _models = _load_models(version)
+
+
+def start_model_watcher(interval=None, on_switch=None):
+    """
+    Background thread that follows `model_registry.py promote`. Call after forking
+    (threads don't survive fork), or in a parent whose children are re-forked from it:
+    on_switch(version) runs after each switch. Returns None when no registry version is promoted.
+    """
+    if model_registry.current_version() is None:
+        return None
+
+    def on_change(version):
+        switch_model_version(version)
+        if on_switch:
+            on_switch(version)
+
+    loaded = _models.main.registry_version if _models is not None else None
+    watcher = model_registry.ModelWatcher(on_change, loaded,
+                                          interval=interval or model_registry.MODEL_POLL_SECONDS)
+    watcher.start()
+    return watcher
+
+
+def cache_stats():
+    #Hit/miss counters of the prediction memos (empty until the classifiers are loaded)
+    stats = {}
+    if _models is not None:
+        stats['main'] = _models.main.cache.stats()
+        stats['subtype'] = _models.subtypes.cache.stats()
+    return stats
@@ -0,0 +1,257 @@
+"""
+Memory-lean featurizers for the classifier cascade.
+
+CompactTfidf is a drop-in replacement for a fitted TfidfVectorizer. Instead of a Python
+dict vocabulary it keeps a sorted uint64 array of term hashes, a column-map array and the
+IDF weights as a NumPy array. The main and subtype models can share one SharedVocabulary,
+so a process holds a single set of term hashes for the whole cascade instead of four dicts.
+
+The 'hashing' mode (HashingVectorizer + TfidfTransformer) needs no vocabulary at all but
+has to be trained that way, see make_featurizer().
+
+Convert the production bundles (no retraining):
+    python compact_tfidf.py [--version v3] [--out models/compact/featurizers.joblib]
+and set CLASSIFIER_FEATURIZER=compact for the API/worker. With --version the bundles of
+that registry version are converted into models/compact/<version>/featurizers.joblib;
+every version that may be promoted needs its own cascade. Each featurizer records the
+sha1 of the bundle it was built from and is refused for any other bundle.
+"""
+import os
+import hashlib
+import numpy as np
+import scipy.sparse as sp
+
+from runtime_backends import file_sha1
+
+FEATURIZERS = ('tfidf', 'compact', 'hashing')
+CLASSIFIER_FEATURIZER = os.getenv('CLASSIFIER_FEATURIZER', 'tfidf')
+COMPACT_FEATURIZERS_PATH = os.getenv('COMPACT_FEATURIZERS_PATH', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models', 'compact', 'featurizers.joblib'))
+
+ANALYZER_PARAMS = ['lowercase', 'strip_accents', 'token_pattern', 'ngram_range', 'analyzer', 'stop_words']
+HASHING_FEATURES = 2 ** 18
+
+
+def term_hashes(terms):
+    #Stable 64-bit hashes (Python's hash() is salted per process)
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(t.encode('utf-8'), digest_size=8).digest(), 'little') for t in terms),
+        dtype=np.uint64, count=len(terms))
+
+
+class SharedVocabulary:
+    """Sorted array of term hashes, shared by several CompactTfidf featurizers."""
+
+    def __init__(self, terms):
+        self.hashes = np.unique(term_hashes(list(terms)))
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def lookup(self, hashes):
+        #Position of each hash in the vocabulary, -1 where absent
+        pos = np.searchsorted(self.hashes, hashes)
+        pos[pos >= len(self.hashes)] = 0
+        found = self.hashes[pos] == hashes if len(self.hashes) else np.zeros(len(hashes), dtype=bool)
+        return np.where(found, pos, -1)
+
+
+class CompactTfidf:
+
+    def __init__(self, params, vocabulary, columns, idf, norm='l2', sublinear_tf=False, binary=False):
+        self.params = params
+        self.vocabulary = vocabulary
+        self.columns = columns
+        self.idf = idf
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+        self.lowercase = params.get('lowercase', True)
+        self.n_features = len(idf) if idf is not None else int(columns.max()) + 1
+        self.source_sha1 = None  # sha1 of the bundle the vectorizer came from, set by build_cascade
+        self._analyzer = None
+
+    @classmethod
+    def from_vectorizer(cls, vect, vocabulary=None):
+        #vocabulary: SharedVocabulary containing (at least) all of vect's terms
+        terms = sorted(vect.vocabulary_, key=vect.vocabulary_.get)
+        if vocabulary is None:
+            vocabulary = SharedVocabulary(terms)
+        positions = vocabulary.lookup(term_hashes(terms))
+        if (positions < 0).any():
+            raise ValueError("Shared vocabulary is missing terms of this vectorizer")
+
+        columns = np.full(len(vocabulary), -1, dtype=np.int32)
+        columns[positions] = np.arange(len(terms), dtype=np.int32)
+
+        params = vect.get_params()
+        return cls(
+            params={k: params[k] for k in ANALYZER_PARAMS},
+            vocabulary=vocabulary,
+            columns=columns,
+            idf=vect.idf_.astype(np.float64) if params['use_idf'] else None,
+            norm=params['norm'],
+            sublinear_tf=params['sublinear_tf'],
+            binary=params['binary'],
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_analyzer'] = None
+        return state
+
+    def build_analyzer(self):
+        if self._analyzer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            self._analyzer = TfidfVectorizer(**self.params).build_analyzer()
+        return self._analyzer
+
+    def transform(self, texts):
+        analyze = self.build_analyzer()
+        term_index = {}
+        indptr = [0]
+        indices = []
+        for doc in texts:
+            for term in analyze(doc):
+                idx = term_index.get(term)
+                if idx is None:
+                    idx = term_index[term] = len(term_index)
+                indices.append(idx)
+            indptr.append(len(indices))
+
+        # hash each distinct term of the batch once, then map to this model's columns
+        pos = self.vocabulary.lookup(term_hashes(list(term_index)))
+        cols = np.where(pos >= 0, self.columns[pos], -1)
+        doc_cols = cols[np.asarray(indices, dtype=np.int64)]
+
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        keep = doc_cols >= 0
+        X = sp.csr_matrix((np.ones(keep.sum(), dtype=np.float64), (rows[keep], doc_cols[keep])),
+                          shape=(len(indptr) - 1, self.n_features))
+        X.sum_duplicates()
+
+        if self.binary:
+            X.data[:] = 1
+        if self.sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1
+        if self.idf is not None:
+            X = X @ sp.diags(self.idf)
+        if self.norm:
+            from sklearn.preprocessing import normalize
+            X = normalize(X, norm=self.norm, copy=False)
+        return X.tocsr()
+
+
+def make_featurizer(mode, **tfidf_params):
+    """
+    Featurizer for the training scripts.
+    'tfidf' and 'compact' train a regular TfidfVectorizer ('compact' is converted before
+    saving, see finalize_featurizer); 'hashing' uses HashingVectorizer + TfidfTransformer,
+    so vocabulary-only params (min_df, max_features) are dropped.
+    """
+    if mode not in FEATURIZERS:
+        raise ValueError(f"Unknown featurizer '{mode}', expected one of {FEATURIZERS}")
+    if mode != 'hashing':
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        return TfidfVectorizer(**tfidf_params)
+
+    from sklearn.pipeline import Pipeline
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+    hashing_params = {k: v for k, v in tfidf_params.items() if k in ANALYZER_PARAMS}
+    return Pipeline([
+        ('hash', HashingVectorizer(n_features=HASHING_FEATURES, alternate_sign=False, norm=None, **hashing_params)),
+        ('tfidf', TfidfTransformer()),
+    ])
+
+
+def finalize_featurizer(vect, mode, vocabulary=None):
+    #The object to save in the bundle's 'vect' slot
+    if mode == 'compact':
+        return CompactTfidf.from_vectorizer(vect, vocabulary)
+    return vect
+
+
+def build_cascade(vectorizers, sources=None):
+    #{name: fitted TfidfVectorizer} -> {name: CompactTfidf} sharing one vocabulary
+    #sources: {name: sha1 of the bundle file} recorded on each featurizer
+    terms = set()
+    for vect in vectorizers.values():
+        terms.update(vect.vocabulary_)
+    shared = SharedVocabulary(sorted(terms))
+    cascade = {name: CompactTfidf.from_vectorizer(vect, shared) for name, vect in vectorizers.items()}
+    for name, featurizer in cascade.items():
+        featurizer.source_sha1 = (sources or {}).get(name)
+    return cascade
+
+
+def compact_featurizers_path(version=None, path=COMPACT_FEATURIZERS_PATH):
+    #models/compact/<version>/featurizers.joblib for a registry version, path itself for plain models/
+    if not version:
+        return path
+    return os.path.join(os.path.dirname(path), version, os.path.basename(path))
+
+
+# (path, cascade) of the last cascade file loaded; loading another version's file replaces it,
+# models still using the old one keep their featurizers
+_cascade = None
+
+
+def load_compact_featurizer(bundle_name, version=None, source_path=None, path=COMPACT_FEATURIZERS_PATH):
+    """
+    Compact featurizer for a bundle file name from the cascade of a registry version
+    (or of plain models/). source_path: the bundle it must have been built from; a
+    featurizer built from a different file raises ValueError.
+    """
+    global _cascade
+    path = compact_featurizers_path(version, path)
+    if _cascade is None or _cascade[0] != path:
+        import joblib
+        if not os.path.exists(path):
+            hint = f" --version {version}" if version else ""
+            raise FileNotFoundError(f"{path} not found, run production/compact_tfidf.py{hint} first")
+        _cascade = (path, joblib.load(path))
+    cascade = _cascade[1]
+    if bundle_name not in cascade:
+        raise KeyError(f"No compact featurizer for {bundle_name} in {path}")
+    featurizer = cascade[bundle_name]
+    if source_path and getattr(featurizer, 'source_sha1', None) != file_sha1(source_path):
+        raise ValueError(f"Compact featurizer for {bundle_name} in {path} was built from a different "
+                         f"bundle than {source_path}, rerun compact_tfidf.py")
+    return featurizer
+
+
+if __name__ == '__main__':
+    import argparse
+    import joblib
+
+    models_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+    parser = argparse.ArgumentParser(description="Convert the production TF-IDF vectorizers to a shared compact cascade")
+    parser.add_argument('--version', default=None, help="Registry version to convert (default: plain models/)")
+    parser.add_argument('--models-dir', default=None, help="Bundle directory (default: the version's, or models/)")
+    parser.add_argument('--out', default=None, help="Cascade file (default: the version's path)")
+    args = parser.parse_args()
+
+    if args.version:
+        import model_registry
+        model_registry.verify(args.version)
+    models_dir = args.models_dir or (model_registry.version_dir(args.version) if args.version else models_dir)
+    out = args.out or compact_featurizers_path(args.version)
+
+    names = ['XGBoost_Combined_MultiJurisdiction.pkl', 'XGBoost_EMS_Subtype.pkl',
+             'XGBoost_Fire_Subtype.pkl', 'XGBoost_Traffic_Subtype.pkl']
+    # pickle the classes under their importable module name, not __main__
+    from compact_tfidf import build_cascade
+
+    paths = {name: os.path.join(models_dir, name) for name in names}
+    vectorizers = {name: joblib.load(path)['vect'] for name, path in paths.items()}
+    cascade = build_cascade(vectorizers, {name: file_sha1(path) for name, path in paths.items()})
+
+    total_terms = sum(len(v.vocabulary_) for v in vectorizers.values())
+    shared = next(iter(cascade.values())).vocabulary
+    print(f"{total_terms:,} terms across {len(names)} vectorizers -> {len(shared):,} shared hashes")
+
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    joblib.dump(cascade, out)
+    print(f"Saved: {out} ({os.path.getsize(out) / 1024:.1f} KB)")
@@ -0,0 +1,54 @@
+"""
+Export the production classifier bundles for the onnx / xgboost runtime backends.
+Usage: python export_models.py [--version v3] [--formats onnx xgboost] [--out models/export]
+With --version the bundles of that registry version are exported to models/export/<version>/;
+export every version before promoting it, the running processes load the promoted version's exports.
+The onnx format needs onnxmltools and skl2onnx on top of the API requirements:
+    pip install -r crisislens-API/requirements-export.txt
+Then run the API/worker with CLASSIFIER_BACKEND=onnx (or xgboost).
+"""
+import os
+import sys
+import glob
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from runtime_backends import EXPORT_DIR, export_bundle, exported_path
+import model_registry
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+PRODUCTION_BUNDLES = [
+    'XGBoost_Combined_MultiJurisdiction.pkl',
+    'XGBoost_EMS_Subtype.pkl',
+    'XGBoost_Fire_Subtype.pkl',
+    'XGBoost_Traffic_Subtype.pkl',
+]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export classifier bundles to ONNX / native XGBoost",
+                                     epilog="ONNX export needs onnxmltools and skl2onnx: "
+                                            "pip install -r crisislens-API/requirements-export.txt")
+    parser.add_argument('--version', default=None, help="Registry version to export (default: plain models/)")
+    parser.add_argument('--models-dir', default=None, help="Bundle directory (default: the version's, or models/)")
+    parser.add_argument('--out', default=EXPORT_DIR, help="Export root (<version>/ then one sub-directory per bundle)")
+    parser.add_argument('--formats', nargs='+', default=['onnx', 'xgboost'], choices=['onnx', 'xgboost'])
+    parser.add_argument('--bundles', nargs='*', default=None, help="Bundle file names (default: production bundles)")
+    args = parser.parse_args()
+
+    if args.version:
+        model_registry.verify(args.version)
+    models_dir = args.models_dir or (model_registry.version_dir(args.version) if args.version else MODELS_DIR)
+
+    bundles = args.bundles or PRODUCTION_BUNDLES
+    for name in bundles:
+        pkl_path = name if os.path.isabs(name) else os.path.join(models_dir, name)
+        out_dir = exported_path(pkl_path, args.out, version=args.version)
+        print(f"Exporting {os.path.basename(pkl_path)} -> {out_dir}")
+        manifest = export_bundle(pkl_path, out_dir, formats=args.formats)
+        sizes = {os.path.basename(p): os.path.getsize(p) for p in glob.glob(os.path.join(out_dir, '*'))}
+        print(f"  {manifest['n_features']} features, {manifest['n_classes']} classes, formats: {manifest['formats']}")
+        for fname, size in sorted(sizes.items()):
+            print(f"  {fname:<18} {size / 1024:>8.1f} KB")
+
+    print("\nDone. Select a backend with CLASSIFIER_BACKEND=onnx or CLASSIFIER_BACKEND=xgboost")
@@ -0,0 +1,94 @@
+"""
+Compiled keyword rules for rule-based emergency type classification.
+A rule set is compiled into a single regex and each text is scanned once.
+Rules are checked in priority order and a rule is skipped if any of its exclusions match.
+
+Keyword syntax:
+    'fire'          whole word ('fires', 'firearm' do not match)
+    'car accident'  phrase, any whitespace between the words
+    'crash*'        prefix ('crash', 'crashed', 'crashes')
+"""
+import re
+import pandas as pd
+
+
+def _term_pattern(term):
+    term = term.strip().lower()
+    prefix = term.endswith('*')
+    words = term.rstrip('*').split()
+    pattern = r'\s+'.join(re.escape(w) for w in words)
+    return r'\b' + pattern + (r'\w*' if prefix else r'\b')
+
+
+class KeywordRules:
+
+    def __init__(self, rules, default=None):
+        """
+        rules: list of (label, keywords, exclusions) in priority order.
+        default: label returned when no rule matches.
+        """
+        self.labels = [label for label, _, _ in rules]
+        self.default = default
+
+        terms = []
+        for i, (label, keywords, exclusions) in enumerate(rules):
+            terms += [(kw, i, False) for kw in keywords]
+            terms += [(ex, i, True) for ex in (exclusions or [])]
+
+        # At one position the first alternative wins, so exclusions go first and longer
+        # terms before shorter ones ('firearm' is seen before 'fire*' can consume it)
+        terms.sort(key=lambda t: (not t[2], -len(t[0])))
+        self._groups = {}
+        parts = []
+        for n, (term, rule, is_exclusion) in enumerate(terms):
+            self._groups[f't{n}'] = (rule, is_exclusion)
+            parts.append(f'(?P<t{n}>{_term_pattern(term)})')
+        self._regex = re.compile('|'.join(parts)) if parts else None
+
+    def match(self, text):
+        if self._regex is None or text is None or (isinstance(text, float) and pd.isna(text)):
+            return self.default
+
+        hits = set()
+        excluded = set()
+        for m in self._regex.finditer(str(text).lower()):
+            rule, is_exclusion = self._groups[m.lastgroup]
+            (excluded if is_exclusion else hits).add(rule)
+
+        for rule in sorted(hits):
+            if rule not in excluded:
+                return self.labels[rule]
+        return self.default
+
+    def match_series(self, texts):
+        #Vectorized over a Series: each distinct value is scanned once and mapped back
+        texts = pd.Series(texts)
+        uniques = texts.dropna().unique()
+        lookup = {value: self.match(value) for value in uniques}
+        return texts.map(lookup).where(texts.notna(), self.default)
+
+
+#classify_call short-circuit before the ML model
+CALL_RULES = KeywordRules([
+    ('Fire', ['fire', 'fires', 'wildfire*', 'bonfire*', 'campfire*', 'fireplace*', 'firefighter*',
+              'flame*', 'burning', 'smoke*', 'blaze*'], ['firearm*', 'firework*', 'gunfire']),
+    ('Traffic', ['crash*', 'collision*', 'accident*', 'vehicle accident', 'car accident'], []),
+])
+
+#legacy/classifier_enricher.classify_incident
+LEGACY_INCIDENT_RULES = KeywordRules([
+    ('Fire', ['fire', 'fires', 'wildfire*', 'bonfire*', 'campfire*', 'fireplace*', 'firefighter*',
+              'smoke*', 'explosion*', 'burning', 'flame*', 'blaze*'], []),
+    ('EMS', ['heart attack', 'cardiac', 'chest pain', 'fever', 'vomiting', 'injury', 'collapsed',
+             'ambulance', 'stroke', 'unconscious', 'unresponsive', 'dizziness', 'fall*', 'head injury',
+             'allergic reaction', 'respiratory', 'breathing', 'asthma', 'seizure*', 'overdose*'], []),
+    ('Traffic', ['gunshot*', 'robbery', 'shooting', 'theft', 'burglary', 'assault', 'car accident',
+                 'accident*', 'crash*', 'traffic', 'hit and run'], []),
+], default='Unknown')
+
+#preprocessing/sf_preprocessing.map_sf_to_taxonomy (SF CallType values)
+SF_CALLTYPE_RULES = KeywordRules([
+    ('Fire', ['fire*', 'wildfire*', 'bonfire*', 'campfire*', 'explosion*', 'smoke*', 'alarm*', 'hazmat'], []),
+    ('EMS', ['medical', 'illness*', 'injury', 'cardiac', 'overdose*', 'seizure*', 'breathing'], []),
+    ('Traffic', ['vehicle*', 'accident*', 'collision*', 'traffic'], []),
+], default='Other')
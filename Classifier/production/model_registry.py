@@ -0,0 +1,214 @@
+"""
+Versioned model registry for the classifier cascade.
+
+Layout (MODEL_REGISTRY_DIR, default Classifier/models/registry):
+    versions/<version>/XGBoost_*.pkl   the four bundles of that version
+    versions/<version>/manifest.json   role -> file, sha256, size, created_at, notes
+    current.json                       the promoted version, replaced atomically
+
+Usage:
+    python model_registry.py register [--version v3] [--from-dir models] [--notes "..."]
+    python model_registry.py promote v3
+    python model_registry.py list | current | verify [version]
+
+Running processes poll current.json (see ModelWatcher) and swap to the newly promoted
+version once it is fully loaded in the background.
+"""
+import os
+import json
+import shutil
+import hashlib
+import threading
+import time
+from datetime import datetime
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', os.path.join(MODELS_DIR, 'registry'))
+MODEL_POLL_SECONDS = int(os.getenv('MODEL_POLL_SECONDS', 30))
+
+# role -> bundle file name (same names as the plain models/ directory)
+ROLES = {
+    'main': 'XGBoost_Combined_MultiJurisdiction.pkl',
+    'EMS': 'XGBoost_EMS_Subtype.pkl',
+    'Fire': 'XGBoost_Fire_Subtype.pkl',
+    'Traffic': 'XGBoost_Traffic_Subtype.pkl',
+}
+
+
+class RegistryError(Exception):
+    pass
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _write_json_atomic(path, data):
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def version_dir(version, registry_dir=REGISTRY_DIR):
+    return os.path.join(registry_dir, 'versions', version)
+
+
+def list_versions(registry_dir=REGISTRY_DIR):
+    root = os.path.join(registry_dir, 'versions')
+    if not os.path.isdir(root):
+        return []
+    return sorted(v for v in os.listdir(root) if os.path.exists(os.path.join(root, v, 'manifest.json')))
+
+
+def load_manifest(version, registry_dir=REGISTRY_DIR):
+    path = os.path.join(version_dir(version, registry_dir), 'manifest.json')
+    if not os.path.exists(path):
+        raise RegistryError(f"Unknown model version '{version}'")
+    with open(path) as f:
+        return json.load(f)
+
+
+def register(source_dir=MODELS_DIR, version=None, notes='', registry_dir=REGISTRY_DIR):
+    #Copies the four bundles from source_dir into a new version, returns the version
+    version = version or datetime.now().strftime('v%Y%m%d-%H%M%S')
+    target = version_dir(version, registry_dir)
+    if os.path.exists(os.path.join(target, 'manifest.json')):
+        raise RegistryError(f"Version '{version}' already exists")
+    os.makedirs(target, exist_ok=True)
+
+    files = {}
+    for role, name in ROLES.items():
+        src = os.path.join(source_dir, name)
+        if not os.path.exists(src):
+            raise RegistryError(f"Missing bundle for '{role}': {src}")
+        dst = os.path.join(target, name)
+        shutil.copy2(src, dst)
+        files[role] = {'file': name, 'sha256': _sha256(dst), 'size': os.path.getsize(dst)}
+
+    manifest = {
+        'version': version,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'notes': notes,
+        'files': files,
+    }
+    # manifest last, a version without one is incomplete and ignored
+    _write_json_atomic(os.path.join(target, 'manifest.json'), manifest)
+    return version
+
+
+def verify(version, registry_dir=REGISTRY_DIR):
+    manifest = load_manifest(version, registry_dir)
+    for role, entry in manifest['files'].items():
+        path = os.path.join(version_dir(version, registry_dir), entry['file'])
+        if not os.path.exists(path) or _sha256(path) != entry['sha256']:
+            raise RegistryError(f"Checksum mismatch for {version}/{entry['file']} ({role})")
+    return manifest
+
+
+def promote(version, registry_dir=REGISTRY_DIR):
+    verify(version, registry_dir)
+    _write_json_atomic(os.path.join(registry_dir, 'current.json'), {
+        'version': version,
+        'promoted_at': datetime.now().isoformat(timespec='seconds'),
+    })
+
+
+def current_version(registry_dir=REGISTRY_DIR):
+    #Promoted version, or None when the registry is not in use
+    path = os.path.join(registry_dir, 'current.json')
+    try:
+        with open(path) as f:
+            return json.load(f)['version']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def resolve(role, version=None, registry_dir=REGISTRY_DIR):
+    #Bundle path for a role in the given (default: promoted) version; None without a registry
+    version = version or current_version(registry_dir)
+    if version is None:
+        return None
+    entry = load_manifest(version, registry_dir)['files'][role]
+    return os.path.join(version_dir(version, registry_dir), entry['file'])
+
+
+class ModelWatcher(threading.Thread):
+    """
+    Polls current.json and calls on_change(version) when a different version is promoted.
+    on_change is expected to load the new models fully before swapping them in, so
+    requests keep being served by the old version until then.
+    """
+
+    def __init__(self, on_change, loaded_version, interval=MODEL_POLL_SECONDS, registry_dir=REGISTRY_DIR):
+        super().__init__(name='model-watcher', daemon=True)
+        self.on_change = on_change
+        self.loaded_version = loaded_version
+        self.interval = interval
+        self.registry_dir = registry_dir
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            version = current_version(self.registry_dir)
+            if version is None or version == self.loaded_version:
+                continue
+            try:
+                print(f"Model version {version} promoted, loading in background...")
+                t0 = time.time()
+                self.on_change(version)
+                self.loaded_version = version
+                print(f" Switched to model version {version} ({time.time() - t0:.1f}s)")
+            except Exception as e:
+                # keep serving the loaded version; retried on the next poll
+                print(f" Could not switch to model version {version}: {e}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Classifier model registry")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('register', help="Register the bundles in a models directory as a new version")
+    p.add_argument('--from-dir', default=MODELS_DIR)
+    p.add_argument('--version', default=None)
+    p.add_argument('--notes', default='')
+    p.add_argument('--promote', action='store_true', help="Promote right after registering")
+    p = sub.add_parser('promote', help="Make a version current (running processes pick it up)")
+    p.add_argument('version')
+    p = sub.add_parser('verify', help="Check a version's checksums")
+    p.add_argument('version', nargs='?', default=None)
+    sub.add_parser('list')
+    sub.add_parser('current')
+    args = parser.parse_args()
+
+    if args.command == 'register':
+        version = register(args.from_dir, args.version, args.notes)
+        print(f"Registered {version} -> {version_dir(version)}")
+        if args.promote:
+            promote(version)
+            print(f"Promoted {version}")
+    elif args.command == 'promote':
+        promote(args.version)
+        print(f"Promoted {args.version}")
+    elif args.command == 'verify':
+        version = args.version or current_version()
+        verify(version)
+        print(f"{version}: all checksums OK")
+    elif args.command == 'list':
+        current = current_version()
+        for version in list_versions():
+            manifest = load_manifest(version)
+            marker = '*' if version == current else ' '
+            print(f"{marker} {version:<20} {manifest['created_at']}  {manifest.get('notes', '')}")
+    elif args.command == 'current':
+        print(current_version() or "(no version promoted, using models/ directly)")
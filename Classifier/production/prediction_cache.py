@@ -0,0 +1,97 @@
+"""
+Bounded LRU memo for classifier predictions.
+Dispatcher-style descriptions ("EMS: FALL VICTIM") repeat constantly, so predictions are
+memoized by (model version, normalized text) in front of the classifiers.
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', 50000))
+
+
+def normalize_text(text, lowercase=True):
+    # TfidfVectorizer ignores whitespace differences (and case when lowercase=True),
+    # so these variants always vectorize to the same row
+    text = ' '.join(str(text).split())
+    return text.lower() if lowercase else text
+
+
+def model_version(path):
+    #Short id of a model file, changes whenever the file is replaced
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 'unknown'
+    payload = f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}"
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+class PredictionCache:
+
+    def __init__(self, maxsize=PREDICTION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def cached_batch(texts, version, cache, predict_unique, lowercase=True):
+    """
+    Memoized batch prediction.
+    Normalizes and deduplicates texts, serves what it can from the cache, calls
+    predict_unique(list of texts) once for the remaining unique texts, then scatters
+    results back to the input order. Returns (results, number of unique texts).
+    """
+    keys = [(version, normalize_text(t, lowercase)) for t in texts]
+
+    results = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        value = cache.get(key)
+        if value is None:
+            missing.append(key)
+        else:
+            results[key] = value
+
+    if missing:
+        predictions = predict_unique([key[1] for key in missing])
+        for key, value in zip(missing, predictions):
+            cache.put(key, value)
+            results[key] = value
+
+    return [results[key] for key in keys], len(results)
@@ -0,0 +1,213 @@
+"""
+Pickle-free runtime backends for the TF-IDF + XGBoost classifier bundles.
+export_bundle() turns a models/*.pkl bundle into a directory with
+    vectorizer.json   TF-IDF params, vocabulary (in column order) and IDF weights
+    labels.json       label encoder classes
+    model.onnx        XGBoost trees as an ONNX graph (needs onnxmltools)
+    model.ubj         XGBoost native booster (version-stable binary JSON)
+    manifest.json     source file hash, shapes and available formats
+and load_exported_bundle() loads it back in the same {'model', 'vect', 'label_encoder'}
+shape as the pickles, with an ONNX Runtime or native XGBoost booster as the model.
+"""
+import os
+import json
+import hashlib
+import numpy as np
+
+BACKENDS = ('pickle', 'onnx', 'xgboost')
+CLASSIFIER_BACKEND = os.getenv('CLASSIFIER_BACKEND', 'pickle')
+EXPORT_DIR = os.getenv('CLASSIFIER_EXPORT_DIR', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models', 'export'))
+
+# ONNX tree ensembles take dense input, so large batches are scored in chunks
+ONNX_CHUNK_ROWS = 1024
+
+VECTORIZER_PARAMS = ['lowercase', 'strip_accents', 'token_pattern', 'ngram_range', 'analyzer',
+                     'stop_words', 'norm', 'use_idf', 'smooth_idf', 'sublinear_tf', 'binary']
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def vectorizer_to_dict(vect):
+    params = vect.get_params()
+    terms = sorted(vect.vocabulary_, key=vect.vocabulary_.get)
+    return {
+        'params': {k: params[k] for k in VECTORIZER_PARAMS},
+        'vocabulary': terms,
+        'idf': vect.idf_.tolist() if params['use_idf'] else None,
+    }
+
+
+def vectorizer_from_dict(data):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    params = dict(data['params'])
+    params['ngram_range'] = tuple(params['ngram_range'])
+    if isinstance(params.get('stop_words'), list):
+        params['stop_words'] = frozenset(params['stop_words'])
+    vect = TfidfVectorizer(**params)
+    vect.vocabulary_ = {term: i for i, term in enumerate(data['vocabulary'])}
+    vect.fixed_vocabulary_ = False
+    if data['idf'] is not None:
+        vect.idf_ = np.asarray(data['idf'], dtype=np.float64)
+    return vect
+
+
+def _as_proba(proba):
+    proba = np.asarray(proba)
+    if proba.ndim == 1:
+        proba = np.column_stack([1 - proba, proba])
+    return proba
+
+
+class OnnxModel:
+    """XGBoost trees running in ONNX Runtime, with predict/predict_proba like XGBClassifier."""
+
+    def __init__(self, path, n_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if n_threads:
+            options.intra_op_num_threads = n_threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.n_jobs = n_threads
+
+    def set_params(self, n_jobs=None, **kwargs):
+        # thread count is fixed when the session is created; kept for preload_models()
+        self.n_jobs = n_jobs
+        return self
+
+    def predict_proba(self, X):
+        chunks = []
+        for start in range(0, X.shape[0], ONNX_CHUNK_ROWS):
+            dense = X[start:start + ONNX_CHUNK_ROWS]
+            dense = dense.toarray() if hasattr(dense, 'toarray') else np.asarray(dense)
+            dense = dense.astype(np.float32)
+            # XGBoost was trained on sparse matrices where absent terms are missing values
+            dense[dense == 0] = np.nan
+            _, proba = self.session.run(None, {self.input_name: dense})
+            chunks.append(_as_proba(proba))
+        return np.vstack(chunks)
+
+    def predict(self, X):
+        return self.predict_proba(X).argmax(axis=1)
+
+
+class BoosterModel:
+    """Native XGBoost booster loaded from model.ubj (no pickle, stable across versions)."""
+
+    def __init__(self, path, n_threads=None):
+        import xgboost as xgb
+
+        self.booster = xgb.Booster(model_file=path)
+        self.n_jobs = n_threads
+        if n_threads:
+            self.booster.set_param({'nthread': n_threads})
+
+    def set_params(self, n_jobs=None, **kwargs):
+        self.n_jobs = n_jobs
+        if n_jobs:
+            self.booster.set_param({'nthread': n_jobs})
+        return self
+
+    def predict_proba(self, X):
+        import xgboost as xgb
+
+        return _as_proba(self.booster.predict(xgb.DMatrix(X)))
+
+    def predict(self, X):
+        return self.predict_proba(X).argmax(axis=1)
+
+
+def export_bundle(pkl_path, out_dir, formats=('onnx', 'xgboost')):
+    #Exports one pickled bundle to out_dir, returns the manifest
+    import joblib
+
+    bundle = joblib.load(pkl_path)
+    vect, model, le = bundle['vect'], bundle['model'], bundle.get('label_encoder')
+    if not hasattr(vect, 'vocabulary_'):
+        raise ValueError(f"{pkl_path}: only TfidfVectorizer bundles can be exported, got {type(vect).__name__}")
+    n_features = len(vect.vocabulary_)
+    os.makedirs(out_dir, exist_ok=True)
+
+    with open(os.path.join(out_dir, 'vectorizer.json'), 'w') as f:
+        json.dump(vectorizer_to_dict(vect), f)
+    with open(os.path.join(out_dir, 'labels.json'), 'w') as f:
+        json.dump([str(c) for c in le.classes_] if le is not None else None, f)
+
+    exported = []
+    if 'xgboost' in formats:
+        model.get_booster().save_model(os.path.join(out_dir, 'model.ubj'))
+        exported.append('xgboost')
+    if 'onnx' in formats:
+        from onnxmltools import convert_xgboost
+        from onnxmltools.convert.common.data_types import FloatTensorType
+
+        onx = convert_xgboost(model, initial_types=[('input', FloatTensorType([None, n_features]))],
+                              target_opset=15)
+        with open(os.path.join(out_dir, 'model.onnx'), 'wb') as f:
+            f.write(onx.SerializeToString())
+        exported.append('onnx')
+
+    manifest = {
+        'source': os.path.basename(pkl_path),
+        'source_sha1': file_sha1(pkl_path),
+        'n_features': n_features,
+        'n_classes': len(le.classes_) if le is not None else None,
+        'formats': exported,
+    }
+    # manifest last, a directory without one is an incomplete export
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def exported_path(pkl_path, export_dir=EXPORT_DIR, version=None):
+    #export_dir/<version>/<bundle> for a registry version, export_dir/<bundle> for plain models/
+    root = os.path.join(export_dir, version) if version else export_dir
+    return os.path.join(root, os.path.splitext(os.path.basename(pkl_path))[0])
+
+
+def load_exported_bundle(bundle_dir, backend, n_threads=None, load_vectorizer=True, source_path=None):
+    """
+    Loads an exported bundle for the 'onnx' or 'xgboost' backend.
+    Returns ({'model', 'vect', 'label_encoder'}, version string).
+    load_vectorizer=False skips vectorizer.json (when a compact featurizer replaces it).
+    source_path: the .pkl the export should come from; a stale export raises ValueError.
+    """
+    from sklearn.preprocessing import LabelEncoder
+
+    with open(os.path.join(bundle_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if backend not in manifest['formats']:
+        raise ValueError(f"{bundle_dir} has no '{backend}' export (available: {manifest['formats']})")
+    if source_path and os.path.exists(source_path) and file_sha1(source_path) != manifest['source_sha1']:
+        raise ValueError(f"{bundle_dir} was exported from a different {manifest['source']}, "
+                         f"rerun export_models.py (with --version for a registry version)")
+
+    vect = None
+    if load_vectorizer:
+        with open(os.path.join(bundle_dir, 'vectorizer.json')) as f:
+            vect = vectorizer_from_dict(json.load(f))
+    with open(os.path.join(bundle_dir, 'labels.json')) as f:
+        classes = json.load(f)
+    le = None
+    if classes is not None:
+        le = LabelEncoder()
+        le.classes_ = np.asarray(classes, dtype=object)
+
+    if backend == 'onnx':
+        model = OnnxModel(os.path.join(bundle_dir, 'model.onnx'), n_threads)
+    else:
+        model = BoosterModel(os.path.join(bundle_dir, 'model.ubj'), n_threads)
+
+    version = f"{backend}-{manifest['source_sha1'][:12]}"
+    return {'model': model, 'vect': vect, 'label_encoder': le}, version
@@ -0,0 +1,233 @@
+"""
+Per-stage latency histograms for the enrichment pipeline and the classifiers.
+
+    with timed('enrichment', stage='db_fetch'):
+        ...
+
+Each process keeps its histograms in memory. Workers push them to Redis with
+flush_if_due(), where the API's /metrics endpoint merges them into Prometheus text.
+METRICS_ENABLED=0 turns timed() into a shared no-op context manager.
+"""
+import os
+import json
+import time
+import bisect
+import threading
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', 5))
+REDIS_PREFIX = 'crisislens:metrics'
+
+# seconds, Prometheus-style upper bounds (+Inf is implicit)
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+FAMILIES = {
+    'enrichment': ('crisislens_enrichment_stage_seconds', 'Time spent in each stage of process_emergency_call'),
+    'classifier': ('crisislens_classifier_stage_seconds', 'Time spent in each stage of the classification cascade'),
+    'inference': ('crisislens_inference_stage_seconds', 'Queue wait and batch scoring time of the /classify micro-batcher'),
+    'http': ('crisislens_http_request_seconds', 'Wall, DB and JSON serialization time per API route'),
+}
+
+
+class Histogram:
+
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        #Linear interpolation inside the bucket, like Prometheus' histogram_quantile
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if seen + c >= rank and c:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / c
+            seen += c
+        return BUCKETS[-1]
+
+
+_lock = threading.Lock()
+_local = {}  # (family, labels) -> Histogram, not yet flushed
+_last_flush = time.monotonic()
+_redis = None
+
+
+def observe(family, seconds, **labels):
+    key = (family, tuple(sorted(labels.items())))
+    with _lock:
+        hist = _local.get(key)
+        if hist is None:
+            hist = _local[key] = Histogram()
+        hist.observe(seconds)
+
+
+class _Timer:
+
+    __slots__ = ('family', 'labels', 'start')
+
+    def __init__(self, family, labels):
+        self.family = family
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.family, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _NullTimer:
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timed(family, **labels):
+    if not METRICS_ENABLED:
+        return _NULL_TIMER
+    return _Timer(family, labels)
+
+
+def get_redis():
+    global _redis
+    if _redis is None:
+        from redis import Redis
+        _redis = Redis(host=os.getenv('REDIS_HOST', 'localhost'), port=int(os.getenv('REDIS_PORT', 6379)))
+    return _redis
+
+
+def _series_key(family, labels):
+    return f"{REDIS_PREFIX}:{family}:{json.dumps(dict(labels), sort_keys=True)}"
+
+
+def flush(redis_conn=None):
+    #Adds the local histograms to the shared ones in Redis and resets them
+    global _last_flush
+    with _lock:
+        pending = dict(_local)
+        _local.clear()
+        _last_flush = time.monotonic()
+    if not pending:
+        return
+
+    conn = redis_conn or get_redis()
+    try:
+        pipe = conn.pipeline(transaction=False)
+        for (family, labels), hist in pending.items():
+            key = _series_key(family, labels)
+            pipe.sadd(f"{REDIS_PREFIX}:series", key)
+            for i, c in enumerate(hist.counts):
+                if c:
+                    pipe.hincrby(key, f"b{i}", c)
+            pipe.hincrby(key, 'count', hist.count)
+            pipe.hincrbyfloat(key, 'sum', hist.sum)
+        pipe.execute()
+    except Exception as e:
+        # metrics must never fail a job; the samples of this interval are dropped
+        print(f" Metrics flush failed: {e}")
+
+
+def flush_if_due(redis_conn=None):
+    if METRICS_ENABLED and time.monotonic() - _last_flush >= METRICS_FLUSH_SECONDS:
+        flush(redis_conn)
+
+
+def collect(redis_conn=None, include_local=True):
+    #{(family, labels): Histogram} merged from Redis and (optionally) this process
+    merged = {}
+    conn = redis_conn or get_redis()
+    keys = sorted(k.decode() if isinstance(k, bytes) else k for k in conn.smembers(f"{REDIS_PREFIX}:series"))
+    pipe = conn.pipeline(transaction=False)
+    for key in keys:
+        pipe.hgetall(key)
+    for key, fields in zip(keys, pipe.execute()):
+        if not fields:
+            continue
+        family, labels_json = key[len(REDIS_PREFIX) + 1:].split(':', 1)
+        fields = {(k.decode() if isinstance(k, bytes) else k): v for k, v in fields.items()}
+        hist = Histogram()
+        hist.counts = [int(fields.get(f"b{i}", 0)) for i in range(len(BUCKETS) + 1)]
+        hist.count = int(fields.get('count', 0))
+        hist.sum = float(fields.get('sum', 0))
+        merged[(family, tuple(sorted(json.loads(labels_json).items())))] = hist
+
+    if include_local:
+        with _lock:
+            for key, local in _local.items():
+                hist = merged.setdefault(key, Histogram())
+                hist.counts = [a + b for a, b in zip(hist.counts, local.counts)]
+                hist.count += local.count
+                hist.sum += local.sum
+    return merged
+
+
+def _fmt_labels(labels, extra=None):
+    items = list(labels) + (list(extra.items()) if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in items) + '}'
+
+
+def render_prometheus(histograms):
+    lines = []
+    by_family = {}
+    for (family, labels), hist in sorted(histograms.items()):
+        by_family.setdefault(family, []).append((labels, hist))
+
+    for family, series in by_family.items():
+        name, help_text = FAMILIES.get(family, (f"crisislens_{family}_seconds", family))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, hist in series:
+            cumulative = 0
+            for bound, c in zip(list(BUCKETS) + ['+Inf'], hist.counts):
+                cumulative += c
+                lines.append(f"{name}_bucket{_fmt_labels(labels, {'le': bound})} {cumulative}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {hist.sum}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {hist.count}")
+    return '\n'.join(lines) + '\n'
+
+
+def summary(histograms):
+    #p50/p95/p99 (ms) per series, for humans
+    rows = []
+    for (family, labels), hist in sorted(histograms.items()):
+        row = {'family': family, **dict(labels), 'count': hist.count,
+               'mean_ms': round(hist.sum / hist.count * 1000, 3) if hist.count else None}
+        for q in (0.5, 0.95, 0.99):
+            value = hist.quantile(q)
+            row[f"p{int(q * 100)}_ms"] = round(value * 1000, 3) if value is not None else None
+        rows.append(row)
+    return rows
+
+
+def reset(redis_conn=None):
+    conn = redis_conn or get_redis()
+    keys = list(conn.smembers(f"{REDIS_PREFIX}:series"))
+    if keys:
+        conn.delete(*keys)
+    conn.delete(f"{REDIS_PREFIX}:series")
+    with _lock:
+        _local.clear()
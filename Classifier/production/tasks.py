@@ -4,6 +4,7 @@ This is imported by worker.py and executed by RQ workers.
 """
 import os
 import sys
+import time
 from datetime import datetime
 import random
 
@@ -13,7 +14,12 @@ sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cri
 # Import database config and classifier
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'crisislens-API'))
 from db_config import get_connection
-from Classifier.production.classifier_service import classify_call, classify_subtype
+from services.unified_calls import sync_calls
+from Classifier.production.classifier_service import classify_call, classify_subtype, classify_batch, current_model_version, loaded_models
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from stage_metrics import METRICS_ENABLED, timed, observe, flush_if_due, get_redis
+from call_events import CALL_EVENTS_ENABLED, call_event, publish_calls
+from admission import BATCH_MODE_BLOCK, batch_mode_active
 
 
 def calculate_age_group(age):
@@ -30,7 +36,56 @@ def calculate_age_group(age):
         return 'Senior'
 
 
+def publish_enriched(events):
+    #Live feed for /events/calls; the rows are already committed, so a Redis error only costs the push
+    if not CALL_EVENTS_ENABLED or not events:
+        return
+    try:
+        with timed('enrichment', stage='publish'):
+            publish_calls(get_redis(), events)
+    except Exception as e:
+        print(f" Could not publish {len(events)} enriched calls: {str(e)}")
+
+
+ENRICHED_INSERT_QUERY = """INSERT INTO enriched_calls (raw_call_id, latitude, longitude, description, zipcode, 
+        timestamp, district, address, priority_flag, emergency_type, emergency_subtype, caller_gender, 
+        caller_age, age_group, source, caller_name, caller_number, model_version, processed_at
+    ) VALUES (
+        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW()
+    )"""
+
+
+def enriched_values(raw_call, emergency_type, emergency_subtype, model_version):
+    return (
+        raw_call['id'],
+        raw_call['latitude'],
+        raw_call['longitude'],
+        raw_call['description'],
+        raw_call.get('zipcode'),
+        raw_call['timestamp'],
+        raw_call.get('district'),
+        raw_call.get('address'),
+        raw_call.get('priority_flag', 0),
+        emergency_type,
+        emergency_subtype,
+        raw_call.get('gender'),
+        raw_call.get('age'),
+        calculate_age_group(raw_call.get('age')),
+        'WebForm', 
+        raw_call.get('caller_name'), 
+        raw_call.get('caller_number'),
+        model_version
+    )
+
+
 def process_emergency_call(raw_call_id):
+    if batch_mode_active():
+        # deep backlog: enrich this call together with a block of other waiting ones;
+        # their own jobs then only find them processed
+        process_emergency_calls([raw_call_id], backlog=BATCH_MODE_BLOCK)
+        return
+    
+    started = time.perf_counter()
     try:
         print(f"\n{'='*60}")
         print(f"Processing call ID: {raw_call_id}")
@@ -39,59 +94,50 @@ def process_emergency_call(raw_call_id):
         with get_connection() as conn:
             cursor = conn.cursor(dictionary=True)
             
-            cursor.execute("SELECT * FROM raw_calls WHERE id = %s", (raw_call_id,))
-            raw_call = cursor.fetchone()
+            with timed('enrichment', stage='db_fetch'):
+                # lock the row until commit: a batch worker claiming it (FOR UPDATE SKIP LOCKED)
+                # skips it, and if a batch holds it we wait and then see processed = 1
+                cursor.execute("SELECT * FROM raw_calls WHERE id = %s FOR UPDATE", (raw_call_id,))
+                raw_call = cursor.fetchone()
             
             if not raw_call:
+                conn.rollback()
                 print(f" Raw call {raw_call_id} not found")
                 return
+            if raw_call.get('processed'):
+                conn.rollback()
+                print(f" Raw call {raw_call_id} already processed")
+                return
             
             description = raw_call['description']
             print(f" Call: {description[:100]}...")
             
-            emergency_type = classify_call(description)
+            # type, subtype and recorded version from the same models, even if a new version is promoted meanwhile
+            models = loaded_models()
+            with timed('enrichment', stage='classify_type'):
+                emergency_type = classify_call(description, models)
             print(f"  Main Type: {emergency_type}")
             
-            emergency_subtype = classify_subtype(description, emergency_type)
+            with timed('enrichment', stage='classify_subtype'):
+                emergency_subtype = classify_subtype(description, emergency_type, models)
             print(f"  Subtype: {emergency_subtype}")
             
-            age_group = calculate_age_group(raw_call.get('age'))
-
-            print(f" Age Group: {age_group}")
-            
-            insert_query = """INSERT INTO enriched_calls (raw_call_id, latitude, longitude, description, zipcode, 
-                    timestamp, district, address, priority_flag, emergency_type, emergency_subtype, caller_gender, 
-                    caller_age, age_group, source, caller_name, caller_number, processed_at
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW()
-                )"""
-            
-            values = (
-                raw_call_id,
-                raw_call['latitude'],
-                raw_call['longitude'],
-                description,
-                raw_call.get('zipcode'),
-                raw_call['timestamp'],
-                raw_call.get('district'),
-                raw_call.get('address'),
-                raw_call.get('priority_flag', 0),
-                emergency_type,
-                emergency_subtype,
-                raw_call.get('gender'),
-                raw_call.get('age'),
-                age_group,
-                'WebForm', 
-                raw_call.get('caller_name'), 
-                raw_call.get('caller_number')
-            )
-            
-            cursor.execute(insert_query, values)
-            enriched_id = cursor.lastrowid
-            
-            cursor.execute("UPDATE raw_calls SET processed = 1 WHERE id = %s", (raw_call_id,))
-            
-            conn.commit()
+            model_version = current_model_version(models)
+            
+            print(f" Age Group: {calculate_age_group(raw_call.get('age'))}")
+            
+            values = enriched_values(raw_call, emergency_type, emergency_subtype, model_version)
+            
+            with timed('enrichment', stage='db_write'):
+                cursor.execute(ENRICHED_INSERT_QUERY, values)
+                enriched_id = cursor.lastrowid
+                sync_calls(cursor, 'live', "id = %s", (enriched_id,))
+                
+                cursor.execute("UPDATE raw_calls SET processed = 1 WHERE id = %s", (raw_call_id,))
+                
+                conn.commit()
+            
+            publish_enriched([call_event(enriched_id, raw_call, emergency_type, emergency_subtype)])
             
             print(f" Enriched call inserted with ID: {enriched_id}")
             print(f" Raw call {raw_call_id} marked as processed")
@@ -99,4 +145,75 @@ def process_emergency_call(raw_call_id):
         
     except Exception as e:
         print(f" Error processing call {raw_call_id}: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+    finally:
+        if METRICS_ENABLED:
+            observe('enrichment', time.perf_counter() - started, stage='total')
+        flush_if_due()
+
+def process_emergency_calls(raw_call_ids, backlog=0):
+    """
+    Enriches a block of raw calls with one SELECT, one classify_batch() and one
+    multi-row INSERT, committed together (Redis Streams consumer, RQ batch mode).
+    Calls already marked processed, or locked by another worker's block, are skipped,
+    so a redelivered block is harmless.
+    backlog: also claim up to this many other unprocessed calls, priority calls first.
+    """
+    started = time.perf_counter()
+    try:
+        if not raw_call_ids and not backlog:
+            return 0
+        
+        with get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            
+            with timed('enrichment', stage='db_fetch'):
+                raw_calls = []
+                if raw_call_ids:
+                    placeholders = ', '.join(['%s'] * len(raw_call_ids))
+                    cursor.execute(f"SELECT * FROM raw_calls WHERE id IN ({placeholders}) AND processed = 0 "
+                                   "FOR UPDATE SKIP LOCKED", list(raw_call_ids))
+                    raw_calls = cursor.fetchall()
+                if backlog:
+                    cursor.execute("SELECT * FROM raw_calls WHERE processed = 0 ORDER BY priority_flag DESC, id "
+                                   "LIMIT %s FOR UPDATE SKIP LOCKED", (backlog,))
+                    seen = {raw_call['id'] for raw_call in raw_calls}
+                    raw_calls += [raw_call for raw_call in cursor.fetchall() if raw_call['id'] not in seen]
+            
+            if not raw_calls:
+                conn.commit()
+                return 0
+            
+            models = loaded_models()
+            with timed('enrichment', stage='classify_batch'):
+                results = classify_batch([raw_call['description'] for raw_call in raw_calls], models)
+            
+            model_version = current_model_version(models)
+            rows = [enriched_values(raw_call, result['emergency_type'], result['emergency_subtype'], model_version)
+                    for raw_call, result in zip(raw_calls, results)]
+            
+            with timed('enrichment', stage='db_write'):
+                cursor.executemany(ENRICHED_INSERT_QUERY, rows)
+                done = [raw_call['id'] for raw_call in raw_calls]
+                sync_calls(cursor, 'live', f"raw_call_id IN ({', '.join(['%s'] * len(done))})", done)
+                cursor.execute(f"UPDATE raw_calls SET processed = 1 WHERE id IN ({', '.join(['%s'] * len(done))})", done)
+                enriched_ids = {}
+                if CALL_EVENTS_ENABLED:
+                    # executemany() only reports the first id
+                    cursor.execute(f"SELECT id, raw_call_id FROM enriched_calls WHERE raw_call_id IN ({', '.join(['%s'] * len(done))})", done)
+                    enriched_ids = {row['raw_call_id']: row['id'] for row in cursor.fetchall()}
+                conn.commit()
+            
+            publish_enriched([call_event(enriched_ids.get(raw_call['id']), raw_call, result['emergency_type'], result['emergency_subtype'])
+                              for raw_call, result in zip(raw_calls, results)])
+        
+        print(f" Enriched {len(raw_calls)} calls ({len(raw_call_ids)} requested, model {model_version})")
+        return len(raw_calls)
+    
+    except Exception as e:
+        print(f" Error processing block of {len(raw_call_ids)} calls: {str(e)}")
+        raise
+    finally:
+        if METRICS_ENABLED:
+            observe('enrichment', time.perf_counter() - started, stage='block_total')
+        flush_if_due()
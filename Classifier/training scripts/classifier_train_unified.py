@@ -12,6 +12,7 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.data_split import train_test_split_by_title
+from utils.dataset_cache import load_csv
 
 # Unified training script for all baseline classifiers
 # Usage: python classifier_train_unified.py --model [lr|nb|dt|svm]
@@ -45,7 +46,7 @@ def train_classifier(model_type='lr', data_path = os.path.join(os.path.dirname(_
         raise ValueError(f"Unknown model type: {model_type}. Choose from {list(MODEL_CONFIGS.keys())}")
     
     config = MODEL_CONFIGS[model_type]
-    df = pd.read_csv(data_path)
+    df = load_csv(data_path, columns=['emergency_title', 'emergency_type'])
     df = df.dropna(subset=["emergency_title", "emergency_type"])
 
     print(" DATA CHECK")
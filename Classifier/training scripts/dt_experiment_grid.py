@@ -6,6 +6,8 @@ from sklearn.tree import DecisionTreeClassifier
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 from utils.data_split import train_test_split_by_title
+from utils.dataset_cache import load_csv, dataset_fingerprint
+from utils.feature_cache import fit_transform_cached
 import joblib
 
 DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'Data', 'cleaned_data.csv')
@@ -19,22 +21,25 @@ configs = [
 ]
 
 tfidf_cfg = {"ngram_range": (1,3), "min_df": 5, "max_features": 15000}
+SPLIT_SEED = 42
 
 def run_config(cfg, X_train, X_test, y_train, y_test):
     tfidf = TfidfVectorizer(stop_words="english",ngram_range=tfidf_cfg["ngram_range"], max_features=tfidf_cfg["max_features"], min_df=tfidf_cfg["min_df"])
-    clf = Pipeline([
-        ("tfidf", tfidf),
-        ("dt", DecisionTreeClassifier(
-            class_weight="balanced",
-            random_state=42,
-            max_depth=cfg["max_depth"],
-            min_samples_leaf=cfg["min_samples_leaf"],
-            min_samples_split=cfg["min_samples_split"] ))
-    ])
+    # every config shares the same TF-IDF, so it is fitted once and reused from the cache
+    tfidf, X_train_t, X_test_t = fit_transform_cached(
+        tfidf, X_train, X_test, dataset_key=dataset_fingerprint(DATA_PATH), split_seed=SPLIT_SEED,
+        extra={"split": "by_title", "test_size": 0.2})
+    dt = DecisionTreeClassifier(
+        class_weight="balanced",
+        random_state=42,
+        max_depth=cfg["max_depth"],
+        min_samples_leaf=cfg["min_samples_leaf"],
+        min_samples_split=cfg["min_samples_split"] )
     
     print(f"\nRunning {cfg['name']} | max_depth={cfg['max_depth']} min_leaf={cfg['min_samples_leaf']} min_split={cfg['min_samples_split']}")
-    clf.fit(X_train, y_train)
-    y_pred = clf.predict(X_test)
+    dt.fit(X_train_t, y_train)
+    clf = Pipeline([("tfidf", tfidf), ("dt", dt)])
+    y_pred = dt.predict(X_test_t)
     acc = accuracy_score(y_test, y_pred)
     print(f"Accuracy: {acc:.4f}")
     print("Classification report:")
@@ -46,8 +51,8 @@ def run_config(cfg, X_train, X_test, y_train, y_test):
     print("Saved model to", os.path.join(OUT_DIR, f"{cfg['name']}.pkl"))
 
 if __name__ == "__main__":
-    df = pd.read_csv(DATA_PATH)
+    df = load_csv(DATA_PATH, columns=["emergency_title", "emergency_type"])
     df = df.dropna(subset=["emergency_title", "emergency_type"])
-    X_train, X_test, y_train, y_test = train_test_split_by_title(df, text_col="emergency_title", label_col="emergency_type", test_size=0.2, random_state=42)
+    X_train, X_test, y_train, y_test = train_test_split_by_title(df, text_col="emergency_title", label_col="emergency_type", test_size=0.2, random_state=SPLIT_SEED)
     for cfg in configs:
         run_config(cfg, X_train, X_test, y_train, y_test)
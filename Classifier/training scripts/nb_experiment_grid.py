@@ -6,8 +6,11 @@ from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 from utils.data_split import train_test_split_by_title
+from utils.dataset_cache import load_csv, dataset_fingerprint
+from utils.feature_cache import fit_transform_cached
 
 DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'Data', 'cleaned_data.csv')
+SPLIT_SEED = 42
 
 configs = [
     {"name": "NB_baseline", "ngram_range": (1,2), "min_df": 2, "max_features": 10000},
@@ -17,10 +20,13 @@ configs = [
 
 def run_config(cfg, X_train, X_test, y_train, y_test):
     tfidf = TfidfVectorizer(stop_words="english", ngram_range=cfg["ngram_range"], max_features=cfg["max_features"], min_df=cfg["min_df"])
-    clf = Pipeline([("tfidf", tfidf), ("nb", MultinomialNB())])
     print(f"\nRunning {cfg['name']} | ngram={cfg['ngram_range']} min_df={cfg['min_df']} max_feat={cfg['max_features']}")
-    clf.fit(X_train, y_train)
-    y_pred = clf.predict(X_test)
+    tfidf, X_train_t, X_test_t = fit_transform_cached(
+        tfidf, X_train, X_test, dataset_key=dataset_fingerprint(DATA_PATH), split_seed=SPLIT_SEED,
+        extra={"split": "by_title", "test_size": 0.2})
+    nb = MultinomialNB().fit(X_train_t, y_train)
+    clf = Pipeline([("tfidf", tfidf), ("nb", nb)])
+    y_pred = nb.predict(X_test_t)
     acc = accuracy_score(y_test, y_pred)
     print(f"Accuracy: {acc:.4f}")
     print("Classification report:")
@@ -39,8 +45,8 @@ def run_config(cfg, X_train, X_test, y_train, y_test):
         pass
 
 if __name__ == "__main__":
-    df = pd.read_csv(DATA_PATH)
+    df = load_csv(DATA_PATH, columns=["emergency_title", "emergency_type"])
     df = df.dropna(subset=["emergency_title", "emergency_type"])
-    X_train, X_test, y_train, y_test = train_test_split_by_title(df, text_col="emergency_title", label_col="emergency_type", test_size=0.2, random_state=42)
+    X_train, X_test, y_train, y_test = train_test_split_by_title(df, text_col="emergency_title", label_col="emergency_type", test_size=0.2, random_state=SPLIT_SEED)
     for cfg in configs:
         run_config(cfg, X_train, X_test, y_train, y_test)
@@ -9,6 +9,8 @@ from sklearn.metrics import classification_report, confusion_matrix, accuracy_sc
 from imblearn.over_sampling import SMOTE
 from sklearn.preprocessing import LabelEncoder
 from utils.data_split import train_test_split_by_title
+from utils.dataset_cache import load_csv, dataset_fingerprint
+from utils.feature_cache import fit_transform_cached
 import joblib
 import numpy as np
 import time
@@ -48,17 +50,22 @@ models = [
     ("XGBoost", XGBClassifier(use_label_encoder=False, eval_metric="mlogloss", random_state=42, verbosity=0))
 ]
 
-def run_experiment(tf_cfg, model_name, model_obj):
-    print(f"\nEXP: {tf_cfg['name']} {model_name}")
-    df = pd.read_csv(DATA_PATH)
+SPLIT_SEED = 42
+
+def load_split():
+    df = load_csv(DATA_PATH, columns=["emergency_title", "emergency_type"])
     df = df.dropna(subset=["emergency_title","emergency_type"])
-    X_train, X_test, y_train, y_test = train_test_split_by_title(df,
-        text_col="emergency_title", label_col="emergency_type", test_size=0.2, random_state=42)
+    return train_test_split_by_title(df,
+        text_col="emergency_title", label_col="emergency_type", test_size=0.2, random_state=SPLIT_SEED)
+
+def run_experiment(tf_cfg, model_name, model_obj, split):
+    print(f"\nEXP: {tf_cfg['name']} {model_name}")
+    X_train, X_test, y_train, y_test = split
 
-    vect = make_tfidf(tf_cfg)
-    print("Fitting TF-IDF...")
-    X_train_t = vect.fit_transform(X_train)
-    X_test_t = vect.transform(X_test)
+    vect, X_train_t, X_test_t = fit_transform_cached(
+        make_tfidf(tf_cfg), X_train, X_test,
+        dataset_key=dataset_fingerprint(DATA_PATH), split_seed=SPLIT_SEED,
+        extra={"split": "by_title", "test_size": 0.2})
 
     if model_name == "XGBoost":
         le = LabelEncoder()
@@ -86,9 +93,10 @@ def run_experiment(tf_cfg, model_name, model_obj):
     print("Saved:", name)
 
 if __name__ == "__main__":
+    split = load_split()
     for tf_cfg in tfidf_configs:
         for model_name, model_obj in models:
             try:
-                run_experiment(tf_cfg, model_name, model_obj)
+                run_experiment(tf_cfg, model_name, model_obj, split)
             except Exception as e:
                 print("Error in run:", e)
@@ -8,6 +8,8 @@ from sklearn.pipeline import FeatureUnion
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 from imblearn.over_sampling import SMOTE
 from utils.data_split import train_test_split_by_title
+from utils.dataset_cache import load_csv, dataset_fingerprint
+from utils.feature_cache import fit_transform_cached
 import joblib
 import numpy as np
 import time
@@ -55,15 +57,22 @@ models = [
         random_state=42, verbosity=0))
 ]
 
-def run_experiment(tf_cfg, model_name, model_obj, use_smote=False):
-    print("\n=== EXP:", tf_cfg["name"], model_name, "SMOTE=", use_smote)
-    df = pd.read_csv(DATA_PATH)
+SPLIT_SEED = 42
+
+def load_split():
+    df = load_csv(DATA_PATH, columns=["emergency_title", "emergency_type"])
     df = df.dropna(subset=["emergency_title", "emergency_type"])
     X_train, X_test, y_train, y_test = train_test_split_by_title(
         df, text_col="emergency_title",
         label_col="emergency_type",
-        test_size=0.2, random_state=42
+        test_size=0.2, random_state=SPLIT_SEED
     )
+    labels = sorted(df["emergency_type"].unique())
+    return X_train, X_test, y_train, y_test, labels
+
+def run_experiment(tf_cfg, model_name, model_obj, split, use_smote=False):
+    print("\n=== EXP:", tf_cfg["name"], model_name, "SMOTE=", use_smote)
+    X_train, X_test, y_train, y_test, labels = split
 
     le = None
     if model_name == "XGBoost":
@@ -71,10 +80,11 @@ def run_experiment(tf_cfg, model_name, model_obj, use_smote=False):
         y_train = le.fit_transform(y_train)
         y_test = le.transform(y_test)
 
-    vect = make_tfidf(tf_cfg)
-    print("Fitting TF-IDF...")
-    X_train_t = vect.fit_transform(X_train)
-    X_test_t = vect.transform(X_test)
+    vect, X_train_t, X_test_t = fit_transform_cached(
+        make_tfidf(tf_cfg), X_train, X_test,
+        dataset_key=dataset_fingerprint(DATA_PATH), split_seed=SPLIT_SEED,
+        extra={"split": "by_title", "test_size": 0.2}
+    )
 
     if use_smote:
         print("Applying SMOTE on training vectors (may be slow)...")
@@ -97,17 +107,18 @@ def run_experiment(tf_cfg, model_name, model_obj, use_smote=False):
     print("Classification report:")
     print(classification_report(y_test, y_pred, digits=4))
     print("Confusion matrix:")
-    print(confusion_matrix(y_test, y_pred, labels=sorted(df["emergency_type"].unique())))
+    print(confusion_matrix(y_test, y_pred, labels=labels))
 
     name = f"{model_name}_{tf_cfg['name']}{'_SMOTE' if use_smote else ''}"
     joblib.dump({"model": model, "vect": vect}, os.path.join(OUT_DIR, f"{name}.pkl"))
     print("Saved:", name)
 
 if __name__ == "__main__":
+    split = load_split()
     for tf_cfg in tfidf_configs:
         for model_name, model_obj in models:
             for use_smote in [False, True]:
                 try:
-                    run_experiment(tf_cfg, model_name, model_obj, use_smote=use_smote)
+                    run_experiment(tf_cfg, model_name, model_obj, split, use_smote=use_smote)
                 except Exception as e:
                     print("Error in run:", e)
@@ -0,0 +1,48 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+from utils.grid_runner import expand_grid, run_grid, config_name
+
+# Runs the RF/XGB/DT/NB comparison grid in parallel and collects results in one table.
+# Usage: python run_experiment_grid.py --workers 4 --threads-per-job 2
+#        python run_experiment_grid.py --only xgb --save-models
+# Completed configs are skipped on rerun (use --force to rerun everything).
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'Data', 'cleaned_data.csv')
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), '..', 'validation_results', 'experiment_grid_results.csv')
+OUT_DIR = os.path.join(os.path.dirname(__file__), "..", "models", "experimental")
+
+WORD = {"word_ngram": (1, 3), "min_df": 5, "max_features": 15000}
+WORD_CHAR = {"word_ngram": (1, 3), "min_df": 5, "max_features": 15000,
+             "char_ngram": (3, 5), "char_max_features": 5000}
+
+CONFIGS = (
+    expand_grid({"rf": {"n_estimators": 200}, "xgb": {}},
+                [WORD, WORD_CHAR], smote=(False, True), min_df=(3, 5))
+    + expand_grid({"nb": {}}, [WORD], min_df=(3, 5))
+    + expand_grid({"dt": {"max_depth": None, "min_samples_leaf": 1, "min_samples_split": 2}},
+                  [WORD], min_df=(3, 5), tag="unpruned")
+    + expand_grid({"dt": {"max_depth": 30, "min_samples_leaf": 5, "min_samples_split": 10}},
+                  [WORD], min_df=(3, 5), tag="pruned_light")
+)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel classifier experiment grid")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel jobs (default: cpus/4)")
+    parser.add_argument("--threads-per-job", type=int, default=None, help="Thread cap per job (default: cpus/workers)")
+    parser.add_argument("--results", default=RESULTS_PATH, help="Results CSV (appended)")
+    parser.add_argument("--only", default=None, help="Run only configs whose name contains this text")
+    parser.add_argument("--force", action="store_true", help="Rerun configs that already have results")
+    parser.add_argument("--save-models", action="store_true", help=f"Save fitted bundles to {OUT_DIR}")
+    args = parser.parse_args()
+
+    configs = [c for c in CONFIGS if not args.only or args.only in config_name(c)]
+    os.makedirs(os.path.dirname(args.results), exist_ok=True)
+
+    results = run_grid(configs, DATA_PATH, args.results, workers=args.workers,
+                       threads_per_job=args.threads_per_job, force=args.force,
+                       out_dir=OUT_DIR if args.save_models else None)
+
+    ok = results[results["status"] == "ok"].sort_values("f1_macro", ascending=False)
+    print("\nTop configs by macro F1:")
+    print(ok[["name", "accuracy", "f1_macro", "wall_seconds", "peak_rss_mb"]].head(10).to_string(index=False))
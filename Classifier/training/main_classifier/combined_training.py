@@ -7,13 +7,18 @@ from xgboost import XGBClassifier
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import classification_report, confusion_matrix
 import numpy as np
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utils.dataset_cache import load_csv
 
 print("Multi-Jurisdiction Training \n")
 
 print("Loading datasets...")
-montgomery = pd.read_csv(os.path.join(os.path.dirname(__file__), '..', 'Data', 'cleaned_data.csv'))
-sf = pd.read_csv(os.path.join(os.path.dirname(__file__), '..', 'Data', 'sf_montgomery_format.csv'))
-us_accidents = pd.read_csv(os.path.join(os.path.dirname(__file__), '..', 'Data', 'us_accidents_montgomery_format.csv'))
+TRAIN_COLS = ['emergency_title', 'emergency_type']
+montgomery = load_csv(os.path.join(os.path.dirname(__file__), '..', 'Data', 'cleaned_data.csv'), columns=TRAIN_COLS)
+sf = load_csv(os.path.join(os.path.dirname(__file__), '..', 'Data', 'sf_montgomery_format.csv'), columns=TRAIN_COLS)
+us_accidents = load_csv(os.path.join(os.path.dirname(__file__), '..', 'Data', 'us_accidents_montgomery_format.csv'), columns=TRAIN_COLS)
 
 print(f"Montgomery: {len(montgomery)} rows")
 print(f"SF: {len(sf)} rows")
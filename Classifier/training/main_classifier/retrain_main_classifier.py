@@ -1,18 +1,31 @@
 import pandas as pd
+import argparse
 import joblib
 import os
 from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
 from xgboost import XGBClassifier
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import classification_report, accuracy_score
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utils.dataset_cache import load_csv
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'production'))
+from compact_tfidf import FEATURIZERS, make_featurizer, finalize_featurizer
+
+# --featurizer compact saves an array-backed CompactTfidf instead of the dict-vocabulary
+# TfidfVectorizer; --featurizer hashing trains on HashingVectorizer + TfidfTransformer
+parser = argparse.ArgumentParser(description="Retrain main classifier")
+parser.add_argument('--featurizer', choices=FEATURIZERS, default='tfidf')
+args = parser.parse_args()
 
 
 print("RETRAINING MAIN CLASSIFIER WITH NATURAL LANGUAGE")
 
 # Load combined dataset
 print("\nLoading combined dataset...")
-df = pd.read_csv(os.path.join(os.path.dirname(__file__), '..', 'Data', 'montgomery_with_natural_language.csv'))
+df = load_csv(os.path.join(os.path.dirname(__file__), '..', 'Data', 'montgomery_with_natural_language.csv'),
+              columns=['emergency_title', 'emergency_type'])
 print(f"Total records: {len(df):,}")
 
 df = df.dropna(subset=['emergency_title', 'emergency_type'])
@@ -37,7 +50,8 @@ print(f"Test: {len(X_test):,} records")
 
 print("TF-IDF VECTORIZATION")
 
-vectorizer = TfidfVectorizer(
+vectorizer = make_featurizer(
+    args.featurizer,
     ngram_range=(1, 3),
     min_df=5,
     max_features=15000,
@@ -48,7 +62,7 @@ vectorizer = TfidfVectorizer(
 X_train_vec = vectorizer.fit_transform(X_train)
 X_test_vec = vectorizer.transform(X_test)
 
-print(f"Vocabulary size: {len(vectorizer.vocabulary_):,}")
+print(f"Feature columns: {X_train_vec.shape[1]:,} ({args.featurizer})")
 
 le = LabelEncoder()
 y_train_enc = le.fit_transform(y_train)
@@ -87,7 +101,7 @@ print("SAVING MODEL")
 
 model_bundle = {
     'model': model,
-    'vect': vectorizer,
+    'vect': finalize_featurizer(vectorizer, args.featurizer),
     'label_encoder': le
 }
 
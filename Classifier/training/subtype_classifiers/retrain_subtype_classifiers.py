@@ -1,18 +1,31 @@
 import pandas as pd
+import argparse
 import joblib
 import numpy as np
 import os
 from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
 from xgboost import XGBClassifier
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import classification_report, accuracy_score
 import shutil
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utils.dataset_cache import load_csv
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'production'))
+from compact_tfidf import FEATURIZERS, make_featurizer, finalize_featurizer
+
+# --featurizer compact saves an array-backed CompactTfidf instead of the dict-vocabulary
+# TfidfVectorizer; --featurizer hashing trains on HashingVectorizer + TfidfTransformer
+parser = argparse.ArgumentParser(description="Retrain subtype classifiers")
+parser.add_argument('--featurizer', choices=FEATURIZERS, default='tfidf')
+args = parser.parse_args()
 
 print("RETRAINING SUBTYPE CLASSIFIERS WITH NATURAL LANGUAGE")
 
 print("\nLoading combined dataset...")
-df = pd.read_csv(os.path.join(os.path.dirname(__file__), '..', 'Data', 'montgomery_with_natural_language.csv'))
+df = load_csv(os.path.join(os.path.dirname(__file__), '..', 'Data', 'montgomery_with_natural_language.csv'),
+              columns=['emergency_title', 'emergency_type', 'emergency_subtype'])
 df = df.dropna(subset=['emergency_title', 'emergency_type', 'emergency_subtype'])
 print(f"Total records: {len(df):,}")
 
@@ -39,7 +52,8 @@ X_train_ems, X_test_ems, y_train_ems, y_test_ems = train_test_split(
 )
 
 print("\nVectorizing...")
-vectorizer_ems = TfidfVectorizer(
+vectorizer_ems = make_featurizer(
+    args.featurizer,
     min_df=5,
     max_features=15000,
     ngram_range=(1, 3),
@@ -50,7 +64,7 @@ vectorizer_ems = TfidfVectorizer(
 X_train_ems_vec = vectorizer_ems.fit_transform(X_train_ems)
 X_test_ems_vec = vectorizer_ems.transform(X_test_ems)
 
-print(f"Vocabulary size: {len(vectorizer_ems.vocabulary_):,}")
+print(f"Feature columns: {X_train_ems_vec.shape[1]:,} ({args.featurizer})")
 
 le_ems = LabelEncoder()
 y_train_ems_enc = le_ems.fit_transform(y_train_ems)
@@ -79,7 +93,7 @@ except:
 
 ems_bundle = {
     'model': model_ems,
-    'vect': vectorizer_ems,
+    'vect': finalize_featurizer(vectorizer_ems, args.featurizer),
     'label_encoder': le_ems
 }
 joblib.dump(ems_bundle, 'models/XGBoost_EMS_Subtype.pkl')
@@ -107,7 +121,8 @@ X_train_fire, X_test_fire, y_train_fire, y_test_fire = train_test_split(
 )
 
 print("\nVectorizing...")
-vectorizer_fire = TfidfVectorizer(
+vectorizer_fire = make_featurizer(
+    args.featurizer,
     min_df=5,
     max_features=15000,
     ngram_range=(1, 3),
@@ -118,7 +133,7 @@ vectorizer_fire = TfidfVectorizer(
 X_train_fire_vec = vectorizer_fire.fit_transform(X_train_fire)
 X_test_fire_vec = vectorizer_fire.transform(X_test_fire)
 
-print(f"Vocabulary size: {len(vectorizer_fire.vocabulary_):,}")
+print(f"Feature columns: {X_train_fire_vec.shape[1]:,} ({args.featurizer})")
 
 le_fire = LabelEncoder()
 y_train_fire_enc = le_fire.fit_transform(y_train_fire)
@@ -147,7 +162,7 @@ except:
 
 fire_bundle = {
     'model': model_fire,
-    'vect': vectorizer_fire,
+    'vect': finalize_featurizer(vectorizer_fire, args.featurizer),
     'label_encoder': le_fire
 }
 joblib.dump(fire_bundle, 'models/XGBoost_Fire_Subtype.pkl')
@@ -175,7 +190,8 @@ X_train_traffic, X_test_traffic, y_train_traffic, y_test_traffic = train_test_sp
 )
 
 print("\nVectorizing...")
-vectorizer_traffic = TfidfVectorizer(
+vectorizer_traffic = make_featurizer(
+    args.featurizer,
     min_df=5,
     max_features=15000,
     ngram_range=(1, 3),
@@ -186,7 +202,7 @@ vectorizer_traffic = TfidfVectorizer(
 X_train_traffic_vec = vectorizer_traffic.fit_transform(X_train_traffic)
 X_test_traffic_vec = vectorizer_traffic.transform(X_test_traffic)
 
-print(f"Vocabulary size: {len(vectorizer_traffic.vocabulary_):,}")
+print(f"Feature columns: {X_train_traffic_vec.shape[1]:,} ({args.featurizer})")
 
 le_traffic = LabelEncoder()
 y_train_traffic_enc = le_traffic.fit_transform(y_train_traffic)
@@ -215,7 +231,7 @@ except:
 
 traffic_bundle = {
     'model': model_traffic,
-    'vect': vectorizer_traffic,
+    'vect': finalize_featurizer(vectorizer_traffic, args.featurizer),
     'label_encoder': le_traffic
 }
 joblib.dump(traffic_bundle, 'models/XGBoost_Traffic_Subtype.pkl')
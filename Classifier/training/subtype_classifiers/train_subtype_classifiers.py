@@ -7,10 +7,15 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from xgboost import XGBClassifier
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utils.dataset_cache import load_csv
 
 print("EMERGENCY SUBTYPE CLASSIFIER TRAINING")
 
-df = pd.read_csv(os.path.join(os.path.dirname(__file__), '..', 'Data', 'cleaned_data.csv'))
+df = load_csv(os.path.join(os.path.dirname(__file__), '..', 'Data', 'cleaned_data.csv'),
+              columns=['emergency_title', 'emergency_type', 'emergency_subtype'])
 print(f"Total records: {len(df):,}")
 
 df = df.dropna(subset=['emergency_title', 'emergency_type', 'emergency_subtype'])
@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import hashlib
+import pandas as pd
+
+# Typed binary cache for the training CSVs.
+# The first load of a CSV parses it once and writes <csv dir>/.cache/<name>.parquet with
+# low-cardinality text columns stored as categoricals; later loads read only the requested
+# columns from the Parquet file. The cache is rebuilt when the source CSV changes
+# (mtime/size first, content hash to confirm).
+
+CACHE_DIR_NAME = '.cache'
+CATEGORICAL_MAX_RATIO = 0.5  # object columns with fewer unique values than this share of rows
+HASH_CHUNK = 1024 * 1024
+
+
+def _cache_paths(csv_path):
+    csv_path = os.path.abspath(csv_path)
+    cache_dir = os.path.join(os.path.dirname(csv_path), CACHE_DIR_NAME)
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return cache_dir, os.path.join(cache_dir, f"{stem}.parquet"), os.path.join(cache_dir, f"{stem}.meta.json")
+
+
+def file_hash(path):
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _read_meta(meta_path):
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path, meta):
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def _to_categoricals(df):
+    categorical = []
+    for col in df.columns:
+        if df[col].dtype == object or pd.api.types.is_string_dtype(df[col]):
+            if df[col].nunique(dropna=True) < max(len(df) * CATEGORICAL_MAX_RATIO, 1):
+                df[col] = df[col].astype('category')
+                categorical.append(col)
+    return df, categorical
+
+
+def _build_cache(csv_path, parquet_path, meta_path, source_hash=None):
+    print(f"Building dataset cache for {os.path.basename(csv_path)}...")
+    t0 = time.time()
+    stat = os.stat(csv_path)
+
+    df = pd.read_csv(csv_path, low_memory=False)
+    df, categorical = _to_categoricals(df)
+
+    tmp_path = parquet_path + '.tmp'
+    df.to_parquet(tmp_path, engine='pyarrow', index=False)
+    os.replace(tmp_path, parquet_path)
+
+    meta = {
+        'source': os.path.abspath(csv_path),
+        'source_mtime': stat.st_mtime,
+        'source_size': stat.st_size,
+        'source_sha1': source_hash or file_hash(csv_path),
+        'rows': len(df),
+        'columns': list(df.columns),
+        'categorical': categorical,
+    }
+    _write_meta(meta_path, meta)
+    print(f"Cached {len(df):,} rows in {time.time() - t0:.1f}s -> {parquet_path}")
+    return meta
+
+
+def ensure_cache(csv_path):
+    #Make sure the Parquet cache for csv_path is current and return its metadata.
+    cache_dir, parquet_path, meta_path = _cache_paths(csv_path)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    meta = _read_meta(meta_path)
+    if meta is None or not os.path.exists(parquet_path):
+        return _build_cache(csv_path, parquet_path, meta_path)
+
+    stat = os.stat(csv_path)
+    if meta['source_mtime'] == stat.st_mtime and meta['source_size'] == stat.st_size:
+        return meta
+
+    # mtime changes on checkout/copy even when content doesn't; confirm with the hash
+    current_hash = file_hash(csv_path)
+    if current_hash == meta['source_sha1']:
+        meta['source_mtime'] = stat.st_mtime
+        meta['source_size'] = stat.st_size
+        _write_meta(meta_path, meta)
+        return meta
+
+    return _build_cache(csv_path, parquet_path, meta_path, source_hash=current_hash)
+
+
+def load_csv(csv_path, columns=None):
+    #Drop-in replacement for pd.read_csv on the training datasets.
+    meta = ensure_cache(csv_path)
+    _, parquet_path, _ = _cache_paths(csv_path)
+
+    if columns is not None:
+        missing = [c for c in columns if c not in meta['columns']]
+        if missing:
+            raise ValueError(f"Columns not in {os.path.basename(csv_path)}: {missing}")
+
+    return pd.read_parquet(parquet_path, columns=columns, engine='pyarrow')
+
+
+def dataset_fingerprint(csv_path):
+    #Content hash of the source CSV (used to key downstream caches).
+    return ensure_cache(csv_path)['source_sha1']
@@ -0,0 +1,98 @@
+import os
+import json
+import time
+import hashlib
+import joblib
+import scipy.sparse as sp
+
+# Cache of fitted TF-IDF feature matrices for the experiment grids.
+# Entries are keyed by (dataset fingerprint, split seed, vectorizer params) and stored as
+# <cache dir>/<key>/{train.npz, test.npz, vectorizer.joblib, meta.json}, so a grid of
+# N models x M vectorizers fits each vectorizer once, across runs and across scripts.
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Data', '.cache', 'features')
+
+_memory = {}
+
+
+def _json_safe(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _json_safe(v) for k, v in sorted(value.items())}
+    return repr(value)
+
+
+def vectorizer_signature(vect):
+    #Canonical description of an (unfitted) vectorizer or FeatureUnion of vectorizers.
+    if hasattr(vect, 'transformer_list'):
+        return {
+            'class': type(vect).__name__,
+            'parts': [[name, vectorizer_signature(t)] for name, t in vect.transformer_list],
+        }
+    return {'class': type(vect).__name__, 'params': _json_safe(vect.get_params(deep=False))}
+
+
+def cache_key(vect, dataset_key, split_seed, extra=None):
+    payload = {
+        'dataset': dataset_key,
+        'split_seed': split_seed,
+        'vectorizer': vectorizer_signature(vect),
+        'extra': _json_safe(extra),
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def fit_transform_cached(vect, X_train, X_test, dataset_key, split_seed, extra=None, cache_dir=DEFAULT_CACHE_DIR):
+    #Returns (fitted vectorizer, X_train matrix, X_test matrix), fitting only on a cache miss.
+    #extra can carry anything else that changes the split (test size, label filter, ...).
+    key = cache_key(vect, dataset_key, split_seed, extra)
+    if key in _memory:
+        return _memory[key]
+
+    entry_dir = os.path.join(cache_dir, key)
+    meta_path = os.path.join(entry_dir, 'meta.json')
+
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta['n_train'] == len(X_train) and meta['n_test'] == len(X_test):
+            t0 = time.time()
+            fitted = joblib.load(os.path.join(entry_dir, 'vectorizer.joblib'))
+            X_train_t = sp.load_npz(os.path.join(entry_dir, 'train.npz'))
+            X_test_t = sp.load_npz(os.path.join(entry_dir, 'test.npz'))
+            print(f"Loaded cached TF-IDF features {key} ({X_train_t.shape[1]} features) in {time.time() - t0:.1f}s")
+            _memory[key] = (fitted, X_train_t, X_test_t)
+            return _memory[key]
+        print(f"Cached features {key} do not match the split sizes, refitting")
+
+    t0 = time.time()
+    X_train_t = vect.fit_transform(X_train).tocsr()
+    X_test_t = vect.transform(X_test).tocsr()
+    fit_time = time.time() - t0
+    print(f"Fitted TF-IDF {key} ({X_train_t.shape[1]} features) in {fit_time:.1f}s")
+
+    os.makedirs(entry_dir, exist_ok=True)
+    sp.save_npz(os.path.join(entry_dir, 'train.npz'), X_train_t, compressed=False)
+    sp.save_npz(os.path.join(entry_dir, 'test.npz'), X_test_t, compressed=False)
+    joblib.dump(vect, os.path.join(entry_dir, 'vectorizer.joblib'))
+
+    meta = {
+        'key': key,
+        'dataset': dataset_key,
+        'split_seed': split_seed,
+        'vectorizer': vectorizer_signature(vect),
+        'extra': _json_safe(extra),
+        'n_train': len(X_train),
+        'n_test': len(X_test),
+        'n_features': X_train_t.shape[1],
+        'fit_seconds': round(fit_time, 2),
+    }
+    # meta.json is written last so a half-written entry is never treated as a hit
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    _memory[key] = (vect, X_train_t, X_test_t)
+    return _memory[key]
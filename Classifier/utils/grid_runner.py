@@ -0,0 +1,269 @@
+import os
+import json
+import time
+import hashlib
+import itertools
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Parallel experiment grid runner.
+# Configs are plain dicts:
+#   {"estimator": "xgb", "params": {...}, "smote": False,
+#    "vectorizer": {"word_ngram": (1, 3), "min_df": 5, "max_features": 15000,
+#                   "char_ngram": (3, 5), "char_max_features": 5000}}
+# Each config runs in its own worker process (fresh per job so peak RSS is per config),
+# with BLAS/OpenMP and estimator n_jobs capped at threads_per_job so parallel XGBoost /
+# RandomForest jobs don't oversubscribe the machine. Results are appended to a CSV table
+# and configs already recorded there as "ok" are skipped on rerun.
+
+THREAD_ENV_VARS = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'NUMEXPR_NUM_THREADS']
+
+RESULT_COLUMNS = [
+    'config_id', 'name', 'estimator', 'smote', 'min_df', 'vectorizer', 'params',
+    'accuracy', 'f1_macro', 'f1_weighted', 'fit_seconds', 'wall_seconds', 'peak_rss_mb',
+    'threads', 'status', 'error', 'finished_at'
+]
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def config_id(cfg):
+    payload = json.dumps(_canonical({k: v for k, v in cfg.items() if k != 'name'}), sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def config_name(cfg):
+    if cfg.get('name'):
+        return cfg['name']
+    v = cfg['vectorizer']
+    name = f"{cfg['estimator']}_word{v['word_ngram'][0]}-{v['word_ngram'][1]}"
+    if v.get('char_ngram'):
+        name += f"_char{v['char_ngram'][0]}-{v['char_ngram'][1]}"
+    name += f"_df{v['min_df']}"
+    if cfg.get('smote'):
+        name += "_SMOTE"
+    if cfg.get('tag'):
+        name += f"_{cfg['tag']}"
+    return name
+
+
+def expand_grid(estimators, vectorizers, smote=(False,), min_df=None, tag=None):
+    #Cross product of declarative options -> list of configs.
+    #estimators: {"xgb": {...params}, ...}; vectorizers: list of vectorizer dicts;
+    #tag is appended to the config names to tell apart estimator param variants.
+    configs = []
+    for (est, params), vect, use_smote in itertools.product(estimators.items(), vectorizers, smote):
+        for df in (min_df or [vect['min_df']]):
+            v = dict(vect, min_df=df)
+            cfg = {'estimator': est, 'params': dict(params), 'vectorizer': v, 'smote': use_smote}
+            if tag:
+                cfg['tag'] = tag
+            configs.append(cfg)
+    return configs
+
+
+def make_vectorizer(v):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.pipeline import FeatureUnion
+
+    word = TfidfVectorizer(stop_words="english", ngram_range=tuple(v['word_ngram']),
+                           max_features=v['max_features'], min_df=v['min_df'])
+    if not v.get('char_ngram'):
+        return word
+    return FeatureUnion([
+        ("word", word),
+        ("char", TfidfVectorizer(analyzer="char_wb", ngram_range=tuple(v['char_ngram']),
+                                 max_features=v.get('char_max_features', 5000), min_df=v['min_df']))
+    ])
+
+
+def make_estimator(name, params, threads):
+    if name == 'xgb':
+        from xgboost import XGBClassifier
+        base = {'eval_metric': 'mlogloss', 'random_state': 42, 'verbosity': 0}
+        return XGBClassifier(**{**base, **params, 'n_jobs': threads})
+    if name == 'rf':
+        from sklearn.ensemble import RandomForestClassifier
+        base = {'n_estimators': 200, 'class_weight': 'balanced', 'random_state': 42}
+        return RandomForestClassifier(**{**base, **params, 'n_jobs': threads})
+    if name == 'dt':
+        from sklearn.tree import DecisionTreeClassifier
+        return DecisionTreeClassifier(**{'class_weight': 'balanced', 'random_state': 42, **params})
+    if name == 'nb':
+        from sklearn.naive_bayes import MultinomialNB
+        return MultinomialNB(**params)
+    if name == 'lr':
+        from sklearn.linear_model import LogisticRegression
+        return LogisticRegression(**{'class_weight': 'balanced', 'max_iter': 1000, **params})
+    raise ValueError(f"Unknown estimator: {name}")
+
+
+def limit_threads(threads):
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(threads)
+    except ImportError:
+        pass
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is KB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _load_split(data_path, split_seed):
+    from utils.dataset_cache import load_csv
+    from utils.data_split import train_test_split_by_title
+
+    df = load_csv(data_path, columns=["emergency_title", "emergency_type"])
+    df = df.dropna(subset=["emergency_title", "emergency_type"])
+    return train_test_split_by_title(df, text_col="emergency_title", label_col="emergency_type",
+                                     test_size=0.2, random_state=split_seed)
+
+
+def _features(v, data_path, split_seed):
+    from utils.dataset_cache import dataset_fingerprint
+    from utils.feature_cache import fit_transform_cached
+
+    X_train, X_test, y_train, y_test = _load_split(data_path, split_seed)
+    vect, X_train_t, X_test_t = fit_transform_cached(
+        make_vectorizer(v), X_train, X_test,
+        dataset_key=dataset_fingerprint(data_path), split_seed=split_seed,
+        extra={"split": "by_title", "test_size": 0.2})
+    return vect, X_train_t, X_test_t, y_train, y_test
+
+
+def _warm_features(v, data_path, split_seed, threads):
+    limit_threads(threads)
+    _features(v, data_path, split_seed)
+    return v
+
+
+def _run_job(cfg, data_path, split_seed, threads, out_dir):
+    limit_threads(threads)
+    t0 = time.time()
+    row = {
+        'config_id': config_id(cfg), 'name': config_name(cfg), 'estimator': cfg['estimator'],
+        'smote': bool(cfg.get('smote')), 'min_df': cfg['vectorizer']['min_df'],
+        'vectorizer': json.dumps(_canonical(cfg['vectorizer'])), 'params': json.dumps(_canonical(cfg.get('params', {}))),
+        'threads': threads,
+    }
+    try:
+        from sklearn.metrics import accuracy_score, f1_score
+        from sklearn.preprocessing import LabelEncoder
+
+        vect, X_train_t, X_test_t, y_train, y_test = _features(cfg['vectorizer'], data_path, split_seed)
+
+        le = LabelEncoder()
+        y_train_enc = le.fit_transform(y_train)
+        y_test_enc = le.transform(y_test)
+
+        if cfg.get('smote'):
+            from imblearn.over_sampling import SMOTE
+            X_train_t, y_train_enc = SMOTE(random_state=42).fit_resample(X_train_t, y_train_enc)
+
+        model = make_estimator(cfg['estimator'], cfg.get('params', {}), threads)
+        fit_start = time.time()
+        model.fit(X_train_t, y_train_enc)
+        row['fit_seconds'] = round(time.time() - fit_start, 2)
+
+        y_pred = model.predict(X_test_t)
+        row['accuracy'] = round(accuracy_score(y_test_enc, y_pred), 4)
+        row['f1_macro'] = round(f1_score(y_test_enc, y_pred, average='macro'), 4)
+        row['f1_weighted'] = round(f1_score(y_test_enc, y_pred, average='weighted'), 4)
+
+        if out_dir:
+            import joblib
+            os.makedirs(out_dir, exist_ok=True)
+            joblib.dump({"model": model, "vect": vect, "label_encoder": le},
+                        os.path.join(out_dir, f"{row['name']}.pkl"))
+        row['status'] = 'ok'
+        row['error'] = ''
+    except Exception as e:
+        row['status'] = 'error'
+        row['error'] = f"{type(e).__name__}: {e}"
+
+    row['wall_seconds'] = round(time.time() - t0, 2)
+    row['peak_rss_mb'] = _peak_rss_mb()
+    row['finished_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return row
+
+
+def completed_ids(results_path):
+    if not os.path.exists(results_path):
+        return set()
+    done = pd.read_csv(results_path, usecols=['config_id', 'status'])
+    return set(done.loc[done['status'] == 'ok', 'config_id'])
+
+
+def append_result(results_path, row):
+    new_row = pd.DataFrame([row], columns=RESULT_COLUMNS)
+    header = not os.path.exists(results_path)
+    new_row.to_csv(results_path, mode='a', header=header, index=False)
+
+
+def run_grid(configs, data_path, results_path, workers=None, threads_per_job=None,
+             split_seed=42, force=False, out_dir=None):
+    cpus = os.cpu_count() or 1
+    workers = workers or max(1, cpus // 4)
+    threads_per_job = threads_per_job or max(1, cpus // workers)
+
+    done = set() if force else completed_ids(results_path)
+    pending = [cfg for cfg in configs if config_id(cfg) not in done]
+    print(f"Grid: {len(configs)} configs, {len(configs) - len(pending)} already done, {len(pending)} to run")
+    print(f"Workers: {workers}, threads per job: {threads_per_job}")
+    if not pending:
+        return pd.read_csv(results_path) if os.path.exists(results_path) else pd.DataFrame(columns=RESULT_COLUMNS)
+
+    # children inherit the caps at spawn time, before numpy/xgboost are imported there
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads_per_job)
+
+    ctx = multiprocessing.get_context('spawn')
+
+    # build the dataset's Parquet cache here, once, so the warm-up workers below don't all
+    # miss it together and race to write it through the same .tmp path
+    from utils.dataset_cache import ensure_cache
+    ensure_cache(data_path)
+
+    # Phase 1: fit each distinct vectorizer once (in parallel) so jobs only load cached matrices
+    vectorizers = {json.dumps(_canonical(cfg['vectorizer']), sort_keys=True): cfg['vectorizer'] for cfg in pending}
+    print(f"Preparing {len(vectorizers)} TF-IDF feature sets...")
+    with ProcessPoolExecutor(max_workers=min(workers, len(vectorizers)), mp_context=ctx) as pool:
+        for f in as_completed([pool.submit(_warm_features, v, data_path, split_seed, threads_per_job)
+                               for v in vectorizers.values()]):
+            f.result()
+
+    # Phase 2: one fresh process per config
+    grid_start = time.time()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, max_tasks_per_child=1) as pool:
+        futures = {pool.submit(_run_job, cfg, data_path, split_seed, threads_per_job, out_dir): cfg for cfg in pending}
+        for i, f in enumerate(as_completed(futures), 1):
+            row = f.result()
+            append_result(results_path, row)
+            if row['status'] == 'ok':
+                print(f"[{i}/{len(pending)}] {row['name']}: acc={row['accuracy']} f1={row['f1_macro']} "
+                      f"| {row['wall_seconds']}s, {row['peak_rss_mb']} MB")
+            else:
+                print(f"[{i}/{len(pending)}] {row['name']}: FAILED {row['error']}")
+
+    print(f"\nGrid finished in {time.time() - grid_start:.1f}s, results in {results_path}")
+    return pd.read_csv(results_path)
@@ -0,0 +1,91 @@
+import os
+import time
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import LabelEncoder
+
+from utils.grid_runner import limit_threads
+
+# Parallel stratified k-fold validation for several datasets at once (folds x types).
+# The TF-IDF vectorizer is fitted inside each fold through a Pipeline, so the test fold's
+# vocabulary never leaks into training. Out-of-fold predictions are kept so callers can
+# build confusion matrices without training another model.
+
+DEFAULT_TFIDF = {'min_df': 5, 'max_features': 15000, 'ngram_range': (1, 3)}
+
+
+def make_pipeline(threads, tfidf_params=None, xgb_params=None):
+    from sklearn.pipeline import Pipeline
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from xgboost import XGBClassifier
+
+    xgb = {'eval_metric': 'mlogloss', 'random_state': 42}
+    xgb.update(xgb_params or {})
+    xgb['n_jobs'] = threads
+    return Pipeline([
+        ('tfidf', TfidfVectorizer(**(tfidf_params or DEFAULT_TFIDF))),
+        ('model', XGBClassifier(**xgb)),
+    ])
+
+
+def _run_fold(name, fold, X, y, train_idx, test_idx, threads, tfidf_params, xgb_params):
+    limit_threads(threads)
+    t0 = time.time()
+    pipeline = make_pipeline(threads, tfidf_params, xgb_params)
+    pipeline.fit(X[train_idx], y[train_idx])
+    y_pred = pipeline.predict(X[test_idx])
+    return {
+        'name': name,
+        'fold': fold,
+        'test_idx': test_idx,
+        'y_pred': y_pred,
+        'accuracy': float(np.mean(y_pred == y[test_idx])),
+        'seconds': time.time() - t0,
+    }
+
+
+def cross_validate(datasets, n_splits=5, workers=None, threads_per_job=None, random_state=42,
+                   tfidf_params=None, xgb_params=None):
+    #datasets: {name: (texts, labels)}. Returns {name: result dict} with per-fold accuracy and
+    #wall time, the label encoder, encoded labels and out-of-fold predictions.
+    cpus = os.cpu_count() or 1
+    workers = workers or min(cpus, n_splits * len(datasets))
+    threads_per_job = threads_per_job or max(1, cpus // workers)
+
+    prepared = {}
+    jobs = []
+    cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    for name, (texts, labels) in datasets.items():
+        X = np.asarray(texts, dtype=object)
+        le = LabelEncoder()
+        y = le.fit_transform(np.asarray(labels, dtype=object))
+        prepared[name] = (X, y, le)
+        for fold, (train_idx, test_idx) in enumerate(cv.split(X, y), 1):
+            jobs.append((name, fold, X, y, train_idx, test_idx))
+
+    print(f"Running {len(jobs)} fold jobs on {workers} workers ({threads_per_job} threads each)...")
+    t0 = time.time()
+    fold_results = Parallel(n_jobs=workers)(
+        delayed(_run_fold)(name, fold, X, y, train_idx, test_idx, threads_per_job, tfidf_params, xgb_params)
+        for name, fold, X, y, train_idx, test_idx in jobs
+    )
+    print(f"All folds finished in {time.time() - t0:.1f}s")
+
+    results = {}
+    for name, (X, y, le) in prepared.items():
+        oof = np.full(len(y), -1, dtype=int)
+        folds = sorted((r for r in fold_results if r['name'] == name), key=lambda r: r['fold'])
+        for r in folds:
+            oof[r['test_idx']] = r['y_pred']
+        scores = np.array([r['accuracy'] for r in folds])
+        results[name] = {
+            'label_encoder': le,
+            'y_true': y,
+            'y_pred': oof,
+            'fold_scores': scores,
+            'fold_seconds': np.array([r['seconds'] for r in folds]),
+            'mean': scores.mean(),
+            'std': scores.std(),
+        }
+    return results
@@ -0,0 +1,75 @@
+import sys
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'production'))
+
+from classifier_service import _load_bundle
+from export_models import MODELS_DIR, PRODUCTION_BUNDLES
+import model_registry
+
+# Checks that the exported onnx / xgboost backends give the same predictions as the pickles.
+# Run production/export_models.py (--version for a registry version) first.
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'Data', 'cleaned_data.csv')
+
+SAMPLE_TEXTS = [
+    "EMS - CARDIAC EMERGENCY", "EMS - FALL VICTIM", "EMS: RESPIRATORY EMERGENCY",
+    "FIRE - BUILDING FIRE", "Fire: GAS-ODOR/LEAK", "TRAFFIC - VEHICLE ACCIDENT",
+    "Traffic: DISABLED VEHICLE -", "Elderly man collapsed, not breathing",
+    "Smoke coming from the kitchen of a café", "", "x",
+]
+
+
+def load_texts(n):
+    texts = list(SAMPLE_TEXTS)
+    if os.path.exists(DATA_PATH):
+        df = pd.read_csv(DATA_PATH, usecols=['emergency_title'], nrows=n * 5)
+        titles = df['emergency_title'].dropna().astype(str)
+        texts += titles.sample(min(n, len(titles)), random_state=42).tolist()
+    return texts
+
+
+def check_bundle(name, backend, texts, tolerance, registry_version=None):
+    models_dir = model_registry.version_dir(registry_version) if registry_version else MODELS_DIR
+    pkl_path = os.path.join(models_dir, name)
+    reference, _ = _load_bundle(pkl_path, 'pickle', registry_version=registry_version)
+    exported, version = _load_bundle(pkl_path, backend, registry_version=registry_version)
+
+    X_ref = reference['vect'].transform(texts)
+    X_exp = exported['vect'].transform(texts)
+    vect_diff = abs(X_ref - X_exp).max() if X_ref.nnz or X_exp.nnz else 0.0
+
+    proba_ref = reference['model'].predict_proba(X_ref)
+    proba_exp = exported['model'].predict_proba(X_exp)
+    proba_diff = float(np.abs(proba_ref - proba_exp).max())
+
+    labels_ref = reference['label_encoder'].inverse_transform(proba_ref.argmax(axis=1))
+    labels_exp = exported['label_encoder'].inverse_transform(proba_exp.argmax(axis=1))
+    mismatches = int((labels_ref.astype(str) != labels_exp.astype(str)).sum())
+
+    passed = mismatches == 0 and proba_diff <= tolerance and vect_diff <= 1e-9
+    status = "PASS" if passed else "FAIL"
+    print(f"{status}  {backend:<8} {name:<42} labels {len(texts) - mismatches}/{len(texts)}  "
+          f"max |Δp| {proba_diff:.2e}  max |Δtfidf| {vect_diff:.2e}  ({version})")
+    return passed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Parity of exported backends against the pickled bundles")
+    parser.add_argument('--backends', nargs='+', default=['onnx', 'xgboost'])
+    parser.add_argument('--samples', type=int, default=5000, help="Titles sampled from cleaned_data.csv")
+    parser.add_argument('--tolerance', type=float, default=1e-5, help="Max allowed probability difference")
+    parser.add_argument('--version', default=None, help="Registry version (export_models.py --version) instead of models/")
+    args = parser.parse_args()
+
+    texts = load_texts(args.samples)
+    print(f"Comparing {len(texts)} texts\n")
+
+    results = [check_bundle(name, backend, texts, args.tolerance, args.version)
+               for backend in args.backends for name in PRODUCTION_BUNDLES]
+
+    print(f"\n{sum(results)}/{len(results)} checks passed")
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,108 @@
+import sys
+import os
+import time
+import argparse
+from redis import Redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'production'))
+
+import call_stream
+from call_stream import publish, ensure_group, StreamConsumer, stream_stats
+
+# Exercises the Redis Streams transport against a real (local) Redis with an in-memory
+# handler instead of the database: delivery, acks, reclaiming from a dead consumer,
+# dead-lettering and the lag stats. Uses its own stream key and deletes it afterwards.
+
+KEY = 'crisislens:test:calls'
+GROUP = 'enrichment-test'
+
+
+def check(name, passed, detail=''):
+    print(f"{'PASS' if passed else 'FAIL'}  {name}  {detail}")
+    return passed
+
+
+def consumer(conn, name, handler, **kwargs):
+    kwargs.setdefault('count', 50)
+    kwargs.setdefault('block_ms', 100)
+    kwargs.setdefault('claim_idle_ms', 200)
+    return StreamConsumer(conn, name, handler, key=KEY, group=GROUP, **kwargs)
+
+
+def drain(c, rounds=20):
+    for _ in range(rounds):
+        c.run_once()
+
+
+def run(conn):
+    results = []
+    call_stream.DEAD_LETTER_KEY = f"{KEY}:dead"
+    conn.delete(KEY, call_stream.DEAD_LETTER_KEY)
+    ensure_group(conn, KEY, GROUP)
+    ensure_group(conn, KEY, GROUP)  # idempotent
+
+    # 1. everything published is handled once and acknowledged
+    publish(conn, range(1, 201), key=KEY)
+    stats = stream_stats(conn, KEY, GROUP)
+    results.append(check("lag before consuming", stats['lag'] in (200, None), f"lag={stats['lag']}"))
+    seen = []
+    c1 = consumer(conn, 'c1', seen.extend)
+    drain(c1)
+    stats = stream_stats(conn, KEY, GROUP)
+    results.append(check("all entries delivered in order", seen == list(range(1, 201)), f"{len(seen)} handled"))
+    results.append(check("nothing pending after ack", stats['pending'] == 0 and stats['lag'] in (0, None),
+                         f"pending={stats['pending']} lag={stats['lag']}"))
+
+    # 2. a consumer that dies before acking: its block is reclaimed by another one
+    publish(conn, range(201, 251), key=KEY)
+
+    def crash(raw_ids):
+        raise RuntimeError("worker died")
+
+    dead = consumer(conn, 'dead', crash, claim_idle_ms=10 ** 9)
+    dead.run_once()
+    stats = stream_stats(conn, KEY, GROUP)
+    results.append(check("failed block stays pending", stats['pending'] == 50,
+                         f"pending={stats['pending']} oldest={stats['oldest_pending_seconds']}s"))
+    time.sleep(0.3)
+    rescued = []
+    c2 = consumer(conn, 'c2', rescued.extend)
+    drain(c2, 3)
+    results.append(check("stale entries reclaimed", sorted(rescued) == list(range(201, 251)),
+                         f"{len(rescued)} reclaimed, claimed={c2.stats['claimed']}"))
+
+    # 3. one bad call doesn't hold back its block and ends up in the dead-letter stream
+    publish(conn, range(251, 261), key=KEY)
+    good = []
+
+    def picky(raw_ids):
+        if 255 in raw_ids:
+            raise ValueError("bad call 255")
+        good.extend(raw_ids)
+
+    c3 = consumer(conn, 'c3', picky, max_deliveries=2)
+    for _ in range(6):
+        c3.run_once()
+        time.sleep(0.25)
+    stats = stream_stats(conn, KEY, GROUP)
+    results.append(check("rest of the block handled", sorted(good) == [i for i in range(251, 261) if i != 255],
+                         f"{len(good)} handled"))
+    results.append(check("poison entry dead-lettered", stats['dead_letters'] == 1 and stats['pending'] == 0,
+                         f"dead={stats['dead_letters']} pending={stats['pending']}"))
+
+    rendered = call_stream.render_prometheus(stats)
+    results.append(check("prometheus gauges", 'crisislens_stream_pending{' in rendered))
+
+    conn.delete(KEY, call_stream.DEAD_LETTER_KEY)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Redis Streams transport checks against a local Redis")
+    parser.add_argument('--host', default=os.getenv('REDIS_HOST', 'localhost'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('REDIS_PORT', 6379)))
+    args = parser.parse_args()
+
+    results = run(Redis(host=args.host, port=args.port))
+    print(f"\n{sum(results)}/{len(results)} checks passed")
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,133 @@
+import sys
+import os
+import argparse
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'production'))
+
+from keyword_rules import CALL_RULES, LEGACY_INCIDENT_RULES, SF_CALLTYPE_RULES
+
+# Differential check of the compiled keyword rules against the substring matching they replaced.
+# Every phrase whose label changed is printed; the run fails on any change not listed in
+# EXPECTED_CHANGES (the whole-word matching is meant to stop 'fire' matching 'firearm').
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'Data', 'cleaned_data.csv')
+
+
+def old_call_rules(text):
+    #classify_call keyword short-circuit before keyword_rules
+    text = text.lower()
+    if any(kw in text for kw in ['fire', 'flames', 'flame', 'burning', 'smoke', 'blaze']):
+        if not any(ex in text for ex in ['firearm', 'firework', 'gunfire']):
+            return "Fire"
+    if any(kw in text for kw in ['crash', 'collision', 'accident', 'vehicle accident', 'car accident']):
+        return "Traffic"
+    return None
+
+
+def old_legacy_rules(text):
+    #legacy/classifier_enricher.classify_incident before keyword_rules
+    text = text.lower()
+    if any(kw in text for kw in ['fire', 'smoke', 'explosion', 'burning', 'flames', 'blaze']):
+        return 'Fire'
+    if any(kw in text for kw in ['heart attack', 'cardiac', 'chest pain', 'fever', 'vomiting', 'injury',
+                                 'collapsed', 'ambulance', 'stroke', 'unconscious', 'unresponsive',
+                                 'dizziness', 'fall', 'head injury', 'allergic reaction', 'respiratory',
+                                 'breathing', 'asthma', 'seizure', 'overdose']):
+        return 'EMS'
+    if any(kw in text for kw in ['gunshot', 'gunshots', 'robbery', 'shooting', 'theft', 'burglary',
+                                 'assault', 'car accident', 'accident', 'crash', 'traffic', 'hit and run']):
+        return 'Traffic'
+    return 'Unknown'
+
+
+def old_sf_rules(text):
+    #preprocessing/sf_preprocessing.map_sf_to_taxonomy before keyword_rules
+    text = text.lower()
+    if any(kw in text for kw in ['fire', 'explosion', 'smoke', 'alarm', 'hazmat']):
+        return 'Fire'
+    if any(kw in text for kw in ['medical', 'illness', 'injury', 'cardiac', 'overdose', 'seizure', 'breathing']):
+        return 'EMS'
+    if any(kw in text for kw in ['vehicle', 'accident', 'collision', 'traffic']):
+        return 'Traffic'
+    return 'Other'
+
+
+RULE_SETS = {
+    'call': (old_call_rules, CALL_RULES),
+    'legacy': (old_legacy_rules, LEGACY_INCIDENT_RULES),
+    'sf': (old_sf_rules, SF_CALLTYPE_RULES),
+}
+
+PHRASES = [
+    # Fire, including compounds of 'fire'
+    "House fire on Main St", "FIRE - BUILDING FIRE", "Fire: GAS-ODOR/LEAK", "Brush fires along the highway",
+    "bonfire out of control", "Bonfires left burning in the park", "campfire spreading",
+    "fireplace chimney", "Fireplace insert overheating", "firefighter injured at scene",
+    "Firefighters requesting backup", "Wildfire near the ridge", "Smoke coming from the kitchen of a café",
+    "Smoky odor in the hallway", "flames visible from the roof", "Blaze at the warehouse",
+    "Explosion reported at plant", "FIRE ALARM", "Alarms sounding in building", "Structure Fire", "HazMat spill",
+    # words that only contain 'fire'
+    "firearm discharged", "Fireworks complaint", "gunfire heard nearby", "Misfire at the shooting range",
+    # EMS
+    "EMS - CARDIAC EMERGENCY", "EMS - FALL VICTIM", "EMS: RESPIRATORY EMERGENCY", "Elderly man collapsed, not breathing",
+    "Head injury after a fall", "Person injured in a fight", "Multiple injuries reported", "Falls in the bathroom",
+    "Possible stroke", "Unresponsive male", "Allergic reaction to peanuts", "Seizures, history of epilepsy",
+    "Overdose suspected", "Medical Incident", "Illness, vomiting and fever", "Asthma attack",
+    # Traffic
+    "TRAFFIC - VEHICLE ACCIDENT", "Traffic: DISABLED VEHICLE -", "Two car crash", "Car crashed into pole",
+    "Vehicle accident with injuries", "Accidents on the interstate", "Traffic Collision", "Hit and run",
+    "Robbery in progress", "Shooting reported", "Burglary at residence", "Vehicle Fire",
+    # nothing to match
+    "Lost dog", "Noise complaint", "", "x",
+]
+
+# (rule set, phrase) -> (old label, new label) for changes made on purpose
+EXPECTED_CHANGES = {
+    ('call', "Misfire at the shooting range"): ('Fire', None),
+    ('legacy', "firearm discharged"): ('Fire', 'Unknown'),
+    ('legacy', "Fireworks complaint"): ('Fire', 'Unknown'),
+    ('legacy', "gunfire heard nearby"): ('Fire', 'Unknown'),
+    ('legacy', "Misfire at the shooting range"): ('Fire', 'Traffic'),
+    ('sf', "gunfire heard nearby"): ('Fire', 'Other'),
+    ('sf', "Misfire at the shooting range"): ('Fire', 'Other'),
+}
+
+
+def load_phrases(n):
+    phrases = list(PHRASES)
+    if n and os.path.exists(DATA_PATH):
+        df = pd.read_csv(DATA_PATH, usecols=['emergency_title'], nrows=n * 5)
+        titles = df['emergency_title'].dropna().astype(str)
+        phrases += titles.sample(min(n, len(titles)), random_state=42).tolist()
+    return list(dict.fromkeys(phrases))
+
+
+def compare(name, phrases):
+    old, rules = RULE_SETS[name]
+    # match_series leaves NaN where the rule set's default is None
+    new_labels = [None if pd.isna(label) else label for label in rules.match_series(pd.Series(phrases))]
+    unexpected = 0
+    for phrase, new in zip(phrases, new_labels):
+        before = old(phrase)
+        if before == new:
+            continue
+        expected = EXPECTED_CHANGES.get((name, phrase)) == (before, new)
+        unexpected += not expected
+        print(f"{'expected' if expected else 'CHANGED ':<8}  {name:<6} {str(before):<8} -> {str(new):<8} {phrase!r}")
+    status = "PASS" if unexpected == 0 else "FAIL"
+    print(f"{status}  {name}: {len(phrases)} phrases, {unexpected} unexpected label changes\n")
+    return unexpected == 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Labels of the compiled keyword rules against the old substring rules")
+    parser.add_argument('--rules', nargs='+', choices=list(RULE_SETS), default=list(RULE_SETS))
+    parser.add_argument('--samples', type=int, default=5000, help="Titles sampled from cleaned_data.csv, 0 for the built-in phrases only")
+    args = parser.parse_args()
+
+    phrases = load_phrases(args.samples)
+    print(f"Comparing {len(phrases)} phrases\n")
+
+    results = [compare(name, phrases) for name in args.rules]
+    sys.exit(0 if all(results) else 1)
@@ -65,6 +65,10 @@ def main():
     print("\nConnecting to database...")
     engine = get_db_connection()
     
+    # emergency_data is partitioned by month (database/10_partition_by_month.sql); adding the
+    # partitions before the load puts the rows straight into their months
+    print("If emergency_data only has its pmax partition, first run from crisislens-API:")
+    print("  python -m services.table_maintenance partitions --tables emergency_data --from 2015-12")
     print("Clearing emergency_data table...")
     with engine.begin() as conn:
         conn.execute(text("TRUNCATE TABLE emergency_data"))
@@ -104,6 +108,7 @@ def main():
     for t, c in types:
         print(f"  {t}: {c:,}")
     
+    print("\nRefresh calls_unified from crisislens-API with: python -m services.unified_calls backfill --sources historical --rebuild")
     print("\nDone!")
 
 if __name__ == "__main__":
@@ -54,4 +54,5 @@ df['timestamp'] = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
 
 # Save with new name
 df.to_csv(os.path.join(os.path.dirname(__file__), 'cleaned_data_full.csv'), index=False)
-print(f"\nData saved to cleaned_data_full.csv with {len(df)} total rows")
\ No newline at end of file
+print(f"\nData saved to cleaned_data_full.csv with {len(df)} total rows")
+print("Refresh the Parquet mirror with: python warehouse.py build")
@@ -0,0 +1,275 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+# Local Parquet mirror of emergency_data (historical CSV) + enriched_calls (live).
+# Layout: warehouse/calls/year=YYYY/month=M/emergency_type=T/*.parquet
+# Usage:
+#   python warehouse.py build            (rebuild from cleaned_data_full.csv)
+#   python warehouse.py sync             (append new enriched_calls rows)
+#   python warehouse.py info
+# The forecast scripts read their daily volumes from here with FORECAST_SOURCE=warehouse
+# (crisislens-API/forecast/utils.py).
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(BASE_DIR, 'cleaned_data_full.csv')
+WAREHOUSE_DIR = os.getenv('WAREHOUSE_DIR', os.path.join(BASE_DIR, 'warehouse'))
+CALLS_DIR = os.path.join(WAREHOUSE_DIR, 'calls')
+STATE_PATH = os.path.join(WAREHOUSE_DIR, '_sync_state.json')
+
+PARTITION_COLS = ['year', 'month', 'emergency_type']
+
+SCHEMA = pa.schema([
+    ('timestamp', pa.timestamp('s')),
+    ('latitude', pa.float64()),
+    ('longitude', pa.float64()),
+    ('description', pa.string()),
+    ('emergency_title', pa.string()),
+    ('emergency_subtype', pa.string()),
+    ('district', pa.string()),
+    ('zipcode', pa.string()),
+    ('address', pa.string()),
+    ('priority_flag', pa.int8()),
+    ('caller_gender', pa.string()),
+    ('caller_age', pa.float64()),
+    ('source', pa.string()),
+    ('data_source', pa.string()),
+    ('year', pa.int16()),
+    ('month', pa.int8()),
+    ('emergency_type', pa.string()),
+])
+
+PARTITIONING = ds.partitioning(
+    pa.schema([('year', pa.int16()), ('month', pa.int8()), ('emergency_type', pa.string())]),
+    flavor='hive'
+)
+
+CSV_CHUNK_SIZE = 250000
+
+
+def get_engine():
+    env_path = os.path.join(BASE_DIR, '..', 'crisislens-API', '.env')
+    load_dotenv(env_path)
+
+    db_user = os.getenv("DB_USER", "root")
+    db_password = os.getenv("DB_PASSWORD", "")
+    db_host = os.getenv("DB_HOST", "localhost")
+    db_port = os.getenv("DB_PORT", "3306")
+    db_name = os.getenv("DB_NAME", "capstone")
+
+    uri = f"mysql+pymysql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+    return create_engine(uri)
+
+
+def _normalize(df, data_source):
+    #Coerce a CSV chunk or SQL result into the warehouse schema.
+    df = df.rename(columns={'township': 'district'})
+    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+    df = df.dropna(subset=['timestamp'])
+
+    df['emergency_type'] = df['emergency_type'].fillna('Unknown').astype(str)
+    df['year'] = df['timestamp'].dt.year.astype('int16')
+    df['month'] = df['timestamp'].dt.month.astype('int8')
+    df['data_source'] = data_source
+
+    if 'zipcode' in df.columns:
+        # zipcodes come back from pandas as floats (19401.0)
+        df['zipcode'] = df['zipcode'].map(lambda z: None if pd.isna(z) else str(z).split('.')[0])
+    if 'priority_flag' in df.columns:
+        df['priority_flag'] = df['priority_flag'].fillna(0).astype('int8')
+
+    for field in SCHEMA:
+        if field.name not in df.columns:
+            df[field.name] = None
+
+    return pa.Table.from_pandas(df[SCHEMA.names], schema=SCHEMA, preserve_index=False)
+
+
+def _write(table, basename, base_dir=CALLS_DIR):
+    ds.write_dataset(
+        table,
+        base_dir,
+        format='parquet',
+        partitioning=PARTITIONING,
+        basename_template=basename + '-{i}.parquet',
+        existing_data_behavior='overwrite_or_ignore',
+        file_options=ds.ParquetFileFormat().make_write_options(compression='zstd')
+    )
+
+
+def load_state():
+    if not os.path.exists(STATE_PATH):
+        return {'last_enriched_id': 0}
+    with open(STATE_PATH) as f:
+        return json.load(f)
+
+
+def save_state(state):
+    os.makedirs(WAREHOUSE_DIR, exist_ok=True)
+    tmp_path = STATE_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def build_from_csv(csv_path=CSV_PATH, chunk_size=CSV_CHUNK_SIZE):
+    #Rebuild the historical part of the warehouse from prepare_data.py output.
+    if not os.path.exists(csv_path):
+        print(f"Error: {csv_path} not found (run prepare_data.py first)")
+        sys.exit(1)
+
+    # built next to the live dataset and swapped in at the end, so readers keep the old
+    # warehouse meanwhile and a failed build leaves it untouched
+    build_dir = f"{CALLS_DIR}.build-{os.getpid()}"
+    old_dir = f"{CALLS_DIR}.old-{os.getpid()}"
+    if os.path.exists(build_dir):
+        shutil.rmtree(build_dir)
+    os.makedirs(build_dir)
+
+    total = 0
+    try:
+        for i, chunk in enumerate(pd.read_csv(csv_path, chunksize=chunk_size, dtype={'zipcode': str})):
+            table = _normalize(chunk, 'historical')
+            _write(table, f"historical-{i:04d}", build_dir)
+            total += table.num_rows
+            print(f"Chunk {i + 1}: {table.num_rows} rows")
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+    # a directory can't be replaced while it has files, so the old one is renamed aside
+    # first; CALLS_DIR is missing only between the two renames
+    if os.path.exists(CALLS_DIR):
+        os.replace(CALLS_DIR, old_dir)
+    os.replace(build_dir, CALLS_DIR)
+    # live rows are re-appended from scratch on the next sync
+    save_state({'last_enriched_id': 0, 'historical_rows': total})
+    shutil.rmtree(old_dir, ignore_errors=True)
+    print(f"\nWarehouse built with {total} historical rows at {CALLS_DIR}")
+    return total
+
+
+def sync_enriched(engine=None, batch_size=50000):
+    #Append enriched_calls rows added since the last sync.
+    engine = engine or get_engine()
+    state = load_state()
+    last_id = state.get('last_enriched_id', 0)
+
+    query = text("""SELECT id, timestamp, latitude, longitude, description, emergency_type, emergency_subtype,
+        district, zipcode, address, priority_flag, caller_gender, caller_age, source
+        FROM enriched_calls WHERE id > :last_id ORDER BY id LIMIT :batch""")
+
+    appended = 0
+    while True:
+        with engine.connect() as conn:
+            df = pd.read_sql(query, conn, params={'last_id': last_id, 'batch': batch_size})
+        if df.empty:
+            break
+
+        first_id, max_id = int(df['id'].iloc[0]), int(df['id'].iloc[-1])
+        table = _normalize(df.drop(columns=['id']), 'live')
+        _write(table, f"live-{first_id}-{max_id}")
+
+        appended += table.num_rows
+        last_id = max_id
+        state['last_enriched_id'] = last_id
+        save_state(state)
+
+    print(f"Appended {appended} enriched rows (last id {last_id})")
+    return appended
+
+
+def _dataset():
+    return ds.dataset(CALLS_DIR, format='parquet', partitioning=PARTITIONING, schema=SCHEMA)
+
+
+def _month_filter(start, end):
+    #Partition-level filter so only the needed year=/month= directories are opened.
+    expr = None
+    ym = ds.field('year').cast(pa.int32()) * 100 + ds.field('month').cast(pa.int32())
+    if start is not None:
+        start = pd.Timestamp(start)
+        expr = ym >= start.year * 100 + start.month
+    if end is not None:
+        end = pd.Timestamp(end)
+        cond = ym <= end.year * 100 + end.month
+        expr = cond if expr is None else expr & cond
+    return expr
+
+
+def read_calls(columns=None, start=None, end=None, types=None, data_source=None, filter=None):
+    #Query the warehouse with column and predicate pushdown.
+    #start/end bound the timestamp (end exclusive), types limits emergency_type partitions,
+    #filter is an optional extra pyarrow.dataset expression.
+    expressions = []
+
+    month_expr = _month_filter(start, end)
+    if month_expr is not None:
+        expressions.append(month_expr)
+    if start is not None:
+        expressions.append(ds.field('timestamp') >= pa.scalar(pd.Timestamp(start), type=pa.timestamp('s')))
+    if end is not None:
+        expressions.append(ds.field('timestamp') < pa.scalar(pd.Timestamp(end), type=pa.timestamp('s')))
+    if types:
+        expressions.append(ds.field('emergency_type').isin(list(types)))
+    if data_source:
+        expressions.append(ds.field('data_source') == data_source)
+    if filter is not None:
+        expressions.append(filter)
+
+    expr = None
+    for e in expressions:
+        expr = e if expr is None else expr & e
+
+    table = _dataset().to_table(columns=columns, filter=expr)
+    return table.to_pandas()
+
+
+def daily_counts(start=None, end=None, types=None, data_source=None):
+    #Daily call volumes in the same ds/y shape as forecast/utils.fetch_daily_calls.
+    df = read_calls(columns=['timestamp'], start=start, end=end, types=types, data_source=data_source)
+    counts = df['timestamp'].dt.floor('D').value_counts().sort_index()
+    return pd.DataFrame({'ds': counts.index.date, 'y': counts.values})
+
+
+def info():
+    if not os.path.exists(CALLS_DIR):
+        print("Warehouse not built yet")
+        return
+    dataset = _dataset()
+    files = dataset.files
+    size = sum(os.path.getsize(f) for f in files)
+    print(f"Location: {CALLS_DIR}")
+    print(f"Files: {len(files)}, size on disk: {size / (1024 * 1024):.1f} MB")
+    print(f"Rows: {dataset.count_rows():,}")
+    print(f"Sync state: {load_state()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parquet warehouse for emergency call analytics")
+    parser.add_argument('command', choices=['build', 'sync', 'info'])
+    parser.add_argument('--csv', default=CSV_PATH, help='Source CSV for build')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_from_csv(args.csv)
+        print("\nSyncing live calls...")
+        try:
+            sync_enriched()
+        except Exception as e:
+            print(f"Skipped enriched_calls sync: {e}")
+    elif args.command == 'sync':
+        sync_enriched()
+    else:
+        info()
+
+
+if __name__ == "__main__":
+    main()
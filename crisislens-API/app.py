@@ -13,19 +13,26 @@ from redis import Redis
 from rq import Queue
 import sys
 
-from services.clustering import analyze_emergency_clusters
-import pandas as pd
-
+# pandas, scikit-learn and scipy (clustering) and the classifier chain are imported on
+# first use by the routes that need them, see scripts/benchmark_importtime.py
 from routes.temporal_analysis import temporal_bp
 
 from routes.data_upload import upload_bp
 from routes.auth_routes import auth_bp
+from routes.metrics_routes import metrics_bp
+from routes.classify_routes import classify_bp
+from routes.events_routes import events_bp
+from routes.map_routes import map_bp
+from services.request_profiler import init_app as init_request_profiling
+from services.unified_calls import CALL_COLUMNS, DATA_SOURCES
 
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-#background processing function
-from Classifier.production.tasks import process_emergency_call
+#background processing function, referenced by name so the API doesn't import the classifier
+PROCESS_EMERGENCY_CALL = 'Classifier.production.tasks.process_emergency_call'
+from Classifier.production.call_stream import INGEST_TRANSPORT, CALL_STREAM_KEY, PRIORITY_STREAM_KEY, publish
+from Classifier.production.admission import QUEUE, PRIORITY_QUEUE, get_controller
 
 #Config
 dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
@@ -43,11 +50,46 @@ CORS(app, resources={
 app.register_blueprint(temporal_bp, url_prefix='/temporal')
 app.register_blueprint(upload_bp)
 app.register_blueprint(auth_bp, url_prefix='/auth')
+app.register_blueprint(metrics_bp)
+app.register_blueprint(classify_bp)
+app.register_blueprint(events_bp)
+app.register_blueprint(map_bp)
+
+# Server-Timing header, per-route histograms and the slow-query log (services/request_profiler.py)
+init_request_profiling(app)
 
 
 # Redis connection + queue for enrichment jobs
 redis_conn = Redis(host="redis", port=6379, db=0)
-q = Queue("crisislens", connection=redis_conn)
+q = Queue(QUEUE, connection=redis_conn)
+priority_q = Queue(PRIORITY_QUEUE, connection=redis_conn)
+
+# backlog-aware admission for bulk ingest (watermarks in Classifier/production/admission.py)
+admission = get_controller(redis_conn)
+
+
+def _enqueue_lane(queue, stream_key, raw_ids):
+    if INGEST_TRANSPORT == 'stream':
+        return publish(redis_conn, raw_ids, key=stream_key)
+    if len(raw_ids) == 1:
+        return [queue.enqueue(PROCESS_EMERGENCY_CALL, raw_ids[0]).id]
+    # one pipelined round trip for all jobs
+    jobs = queue.enqueue_many([Queue.prepare_data(PROCESS_EMERGENCY_CALL, (raw_id,)) for raw_id in raw_ids])
+    return [job.id for job in jobs]
+
+
+def enqueue_enrichment(raw_ids, priorities=None):
+    #RQ jobs or stream entries (INGEST_TRANSPORT=stream), priority calls in their own lane; returns their ids
+    priorities = priorities or [0] * len(raw_ids)
+    job_ids = [None] * len(raw_ids)
+    for lane, queue, stream_key in ((1, priority_q, PRIORITY_STREAM_KEY), (0, q, CALL_STREAM_KEY)):
+        idx = [i for i, p in enumerate(priorities) if bool(p) == bool(lane)]
+        if idx:
+            for i, job_id in zip(idx, _enqueue_lane(queue, stream_key, [raw_ids[i] for i in idx])):
+                job_ids[i] = job_id
+    return job_ids
+
+
 # Home 
 @app.route('/')
 def home():
@@ -69,12 +111,15 @@ def get_calls():
     district = request.args.get('district')  # Frontend sends 'district'
     source_filter = request.args.get('source', 'all')
 
-    # WHERE conditions (to handle both column names)
+    # live, historical and uploaded calls all live in calls_unified (services/unified_calls.py)
     where_conditions = []
     params = []
 
+    if source_filter in DATA_SOURCES:
+        where_conditions.append("data_source = %s")
+        params.append(source_filter)
     if date:
-        where_conditions.append("DATE(timestamp) = %s")
+        where_conditions.append("call_date = %s")
         params.append(date)
     if emergency_type:
         where_conditions.append("emergency_type = %s")
@@ -82,92 +127,19 @@ def get_calls():
     if emergency_subtype:
         where_conditions.append("emergency_subtype = %s")
         params.append(emergency_subtype)
+    if district:
+        where_conditions.append("district = %s")
+        params.append(district)
 
-    # Build query based on source
-    if source_filter == 'live':
-        if district:
-            where_conditions.append("district = %s")
-            params.append(district)
-        
-        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-        
-        query = f"""
-            SELECT 
-                id, timestamp, emergency_type, emergency_subtype, 
-                district, latitude, longitude, description,
-                zipcode, address, priority_flag, caller_gender,
-                caller_age, source, 'live' as data_source
-            FROM enriched_calls 
-            WHERE {where_clause}
-            ORDER BY timestamp DESC 
-            LIMIT %s OFFSET %s
-        """
-        
-    elif source_filter == 'historical':
-        # emergency_data uses 'township' column aliased as 'district'
-        if district:
-            where_conditions.append("township = %s")
-            params.append(district)
-        
-        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-        
-        query = f"""
-            SELECT 
-                id, timestamp, emergency_type, emergency_subtype,
-                township AS district, latitude, longitude, description, emergency_title,
-                zipcode, address, priority_flag, caller_gender,
-                caller_age, source, 'historical' as data_source
-            FROM emergency_data 
-            WHERE {where_clause}
-            ORDER BY timestamp DESC 
-            LIMIT %s OFFSET %s
-        """
-        
-    else: 
-        live_params = list(params) 
-        historical_params = list(params)  
+    where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
 
-        live_where = list(where_conditions)
-        historical_where = list(where_conditions)
-    
-    if district:
-        live_where.append("district = %s")
-        historical_where.append("township = %s")
-        live_params.append(district)
-        historical_params.append(district)
-    
-    # final WHERE clauses
-    live_clause = " AND ".join(live_where) if live_where else "1=1"
-    historical_clause = " AND ".join(historical_where) if historical_where else "1=1"
-    
     query = f"""
-        SELECT * FROM (
-            SELECT 
-                id, timestamp, emergency_type, emergency_subtype,
-                district, latitude, longitude, description,
-                NULL as emergency_title,
-                zipcode, address, priority_flag, caller_gender,
-                caller_age, source, 'live' as data_source
-            FROM enriched_calls
-            WHERE {live_clause}
-            
-            UNION ALL
-            
-            SELECT 
-                id, timestamp, emergency_type, emergency_subtype,
-                township AS district, latitude, longitude, description, emergency_title,
-                zipcode, address, priority_flag, caller_gender,
-                caller_age, source, 'historical' as data_source
-            FROM emergency_data
-            WHERE {historical_clause}
-        ) AS combined_data
+        SELECT {CALL_COLUMNS}
+        FROM calls_unified
+        WHERE {where_clause}
         ORDER BY timestamp DESC
         LIMIT %s OFFSET %s
     """
-    
-    # Combine: live_params + historical_params
-    params = live_params + historical_params
-
     params.extend([limit, offset])
 
     try:
@@ -197,55 +169,18 @@ def get_latest_calls():
     except ValueError:
         limit = 10
 
-    if source_filter == 'live':
-        query = """
-            SELECT 
-                id, timestamp, emergency_type, emergency_subtype, 
-                district, latitude, longitude, description, 
-                caller_gender, caller_age, source,
-                'live' as data_source
-            FROM enriched_calls
-            ORDER BY timestamp DESC 
-            LIMIT %s
-        """
-    elif source_filter == 'historical':
-        query = """
-            SELECT 
-                id, timestamp, emergency_type, emergency_subtype,
-                township AS district, latitude, longitude, description,
-                caller_gender, caller_age, source,
-                'historical' as data_source
-            FROM emergency_data
-            ORDER BY timestamp DESC 
-            LIMIT %s
-        """
-    else:  # all
-        query = """
-            SELECT * FROM (
-                SELECT 
-                    id, timestamp, emergency_type, emergency_subtype,
-                    district, latitude, longitude, description,
-                    caller_gender, caller_age, source,
-                    'live' as data_source
-                FROM enriched_calls
-                
-                UNION ALL
-                
-                SELECT 
-                    id, timestamp, emergency_type, emergency_subtype,
-                    township AS district, latitude, longitude, description,
-                    caller_gender, caller_age, source,
-                    'historical' as data_source
-                FROM emergency_data
-            ) AS combined
-            ORDER BY timestamp DESC
-            LIMIT %s
-        """
+    query = f"SELECT {CALL_COLUMNS} FROM calls_unified"
+    params = []
+    if source_filter in DATA_SOURCES:
+        query += " WHERE data_source = %s"
+        params.append(source_filter)
+    query += " ORDER BY timestamp DESC LIMIT %s"
+    params.append(limit)
 
     try:
         with get_connection() as conn:
             with conn.cursor(dictionary=True) as cursor:
-                cursor.execute(query, (limit,))
+                cursor.execute(query, params)
                 results = cursor.fetchall()
 
         return jsonify(results)
@@ -253,32 +188,30 @@ def get_latest_calls():
         print(f"Error in /calls/latest: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/calls', methods=['POST'])
-def ingest_call():
-    data = request.json
+RAW_CALL_FIELDS = ['timestamp', 'description', 'latitude', 'longitude', 'district', 'gender', 'age']
+RAW_CALL_COLUMNS = "timestamp, description, latitude, longitude, district, gender, age, caller_name, caller_number, priority_flag"
+RAW_CALL_PLACEHOLDERS = "(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+PRIORITY_COLUMN = 9
 
-    print("Received data:", data)
+BATCH_INGEST_MAX_CALLS = int(os.getenv('BATCH_INGEST_MAX_CALLS', 5000))
+BATCH_INSERT_ROWS = 1000
 
-    required_fields = ['timestamp', 'description', 'latitude', 'longitude', 'district', 'gender', 'age']
 
-    if not data:
-        return jsonify({"error": "Missing JSON payload"}), 400
+def raw_call_values(data):
+    #Validates one call payload -> (row values for raw_calls, None) or (None, error message)
+    if not data or not isinstance(data, dict):
+        return None, "Missing JSON payload"
 
-    for field in required_fields:
+    for field in RAW_CALL_FIELDS:
         if field not in data:
-            print(f"Missing field: {field}")
-            return jsonify({"error": f"Missing field: {field}"}), 400
+            return None, f"Missing field: {field}"
     try:
         iso_timestamp = data['timestamp']
         mysql_timestamp = datetime.fromisoformat(iso_timestamp.replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M:%S')
     except Exception as e:
-        return jsonify({"error": f"Invalid timestamp format: {str(e)}"}), 400
+        return None, f"Invalid timestamp format: {str(e)}"
 
-    insert_query = """
-        INSERT INTO raw_calls (timestamp, description, latitude, longitude, district, gender, age, caller_name, caller_number)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
-    values = (
+    return (
         mysql_timestamp, 
         data['description'], 
         data['latitude'], 
@@ -287,8 +220,26 @@ def ingest_call():
         data['gender'], 
         data['age'],
         data.get('caller_name'), 
-        data.get('caller_number')
-    )
+        data.get('caller_number'),
+        1 if data.get('priority_flag') else 0
+    ), None
+
+
+@app.route('/calls', methods=['POST'])
+def ingest_call():
+    data = request.json
+
+    print("Received data:", data)
+
+    values, error = raw_call_values(data)
+    if error:
+        print(error)
+        return jsonify({"error": error}), 400
+
+    insert_query = f"""
+        INSERT INTO raw_calls ({RAW_CALL_COLUMNS})
+        VALUES {RAW_CALL_PLACEHOLDERS}
+    """
 
     try:
         with get_connection() as conn:
@@ -302,8 +253,8 @@ def ingest_call():
                 print(f"   caller_number: {data.get('caller_number')}")  
 
         # Enqueue classification job in background
-        job = q.enqueue(process_emergency_call, raw_id)
-        print(f"Call {raw_id} enqueued for processing. Job ID: {job.id}")
+        job_id = enqueue_enrichment([raw_id], [values[PRIORITY_COLUMN]])[0]
+        print(f"Call {raw_id} enqueued for processing ({INGEST_TRANSPORT}). Job ID: {job_id}")
 
         return jsonify({"message": "Call successfully ingested (enrichment pending)", "raw_id": raw_id}), 201
     except Exception as e:
@@ -311,6 +262,118 @@ def ingest_call():
         return jsonify({"error": str(e)}), 500
 
 
+def insert_raw_calls(cursor, rows):
+    """
+    Multi-row INSERTs of BATCH_INSERT_ROWS rows each, returns the new ids in order.
+    A multi-row INSERT gets consecutive auto-increment ids unless another session's
+    inserts interleave (innodb_autoinc_lock_mode=2); the id range is checked and the
+    caller falls back to single-row inserts when it doesn't hold.
+    """
+    ids = []
+    for start in range(0, len(rows), BATCH_INSERT_ROWS):
+        chunk = rows[start:start + BATCH_INSERT_ROWS]
+        cursor.execute(
+            f"INSERT INTO raw_calls ({RAW_CALL_COLUMNS}) VALUES " + ", ".join([RAW_CALL_PLACEHOLDERS] * len(chunk)),
+            [value for row in chunk for value in row])
+        first_id = cursor.lastrowid
+        cursor.execute("SELECT id, description FROM raw_calls WHERE id BETWEEN %s AND %s ORDER BY id",
+                       (first_id, first_id + len(chunk) - 1))
+        found = cursor.fetchall()
+        if len(found) != len(chunk) or any(row[1] != str(values[1]) for row, values in zip(found, chunk)):
+            return None
+        ids.extend(row[0] for row in found)
+    return ids
+
+
+@app.route('/calls/batch', methods=['POST'])
+def ingest_calls_batch():
+    #Bulk ingest for CAD replays: {"calls": [...]} or a bare list, same rules as POST /calls
+    data = request.get_json(silent=True)
+    calls = data.get('calls') if isinstance(data, dict) else data
+    if not isinstance(calls, list) or not calls:
+        return jsonify({"error": "Expected a non-empty 'calls' list"}), 400
+    if len(calls) > BATCH_INGEST_MAX_CALLS:
+        return jsonify({"error": f"At most {BATCH_INGEST_MAX_CALLS} calls per batch"}), 400
+
+    # above the high watermark only priority calls are taken; the others are refused with
+    # Retry-After so the client backs off instead of growing the backlog
+    try:
+        state = admission.state()
+    except Exception as e:
+        print(f" Backlog check failed, admitting batch: {str(e)}")
+        state = None
+    shedding = bool(state and state['shedding'])
+
+    results = [None] * len(calls)
+    rows, positions = [], []
+    deferred = 0
+    for i, call in enumerate(calls):
+        values, error = raw_call_values(call)
+        if error:
+            results[i] = {"index": i, "error": error}
+        elif shedding and not values[PRIORITY_COLUMN]:
+            results[i] = {"index": i, "error": "Backlog above high watermark, retry later", "retry": True}
+            deferred += 1
+        else:
+            rows.append(values)
+            positions.append(i)
+
+    if rows:
+        try:
+            with get_connection() as conn:
+                with conn.cursor() as cursor:
+                    ids = insert_raw_calls(cursor, rows)
+                    if ids is None:
+                        conn.rollback()
+                        print(" Auto-increment ids of the batch interleaved, inserting row by row")
+                        ids = []
+                        for values in rows:
+                            cursor.execute(f"INSERT INTO raw_calls ({RAW_CALL_COLUMNS}) VALUES {RAW_CALL_PLACEHOLDERS}", values)
+                            ids.append(cursor.lastrowid)
+                    conn.commit()
+        except Exception as e:
+            print(f" Database error: {str(e)}")
+            return jsonify({"error": str(e)}), 500
+
+        try:
+            job_ids = enqueue_enrichment(ids, [values[PRIORITY_COLUMN] for values in rows])
+            enqueue_error = None
+        except Exception as e:
+            print(f" Enqueue error: {str(e)}")
+            job_ids, enqueue_error = [None] * len(ids), str(e)
+
+        for i, raw_id, job_id in zip(positions, ids, job_ids):
+            results[i] = {"index": i, "raw_id": raw_id, "job_id": job_id}
+            if enqueue_error:
+                results[i]["error"] = f"Stored but not enqueued: {enqueue_error}"
+
+    inserted = len(rows)
+    print(f" Batch ingest: {inserted} inserted, {deferred} deferred, {len(calls) - inserted - deferred} rejected")
+    if inserted == len(calls):
+        status = 201
+    elif inserted:
+        status = 207
+    else:
+        status = 429 if deferred else 400
+    response = jsonify({
+        "message": f"{inserted} of {len(calls)} calls ingested (enrichment pending)",
+        "inserted": inserted,
+        "deferred": deferred,
+        "rejected": len(calls) - inserted - deferred,
+        "results": results
+    })
+    if deferred:
+        response.headers['Retry-After'] = str(admission.retry_after(state))
+    return response, status
+
+
+def _stats_sources():
+    #?source= of the aggregate endpoints: historical (default, the emergency_data counts they
+    # always returned), live, uploaded, or all for every source in calls_unified
+    source = request.args.get('source', 'historical')
+    return [source] if source in DATA_SOURCES else []
+
+
 #Aggregated data for our timelline chart
 @app.route('/timeline-aggregated', methods=['GET'])
 def get_timeline_aggregated():
@@ -321,29 +384,31 @@ def get_timeline_aggregated():
         
         query = """
             SELECT 
-                DATE(timestamp) as date,
+                call_date as date,
                 COUNT(*) as count,
                 emergency_type
-            FROM emergency_data
+            FROM calls_unified
             WHERE emergency_type IN ('EMS', 'Fire', 'Traffic')
         """
         
-        params = []
+        params = _stats_sources()
+        if params:
+            query += " AND data_source = %s"
         
         if emergency_type and emergency_type != 'all':
             query += " AND emergency_type = %s"
             params.append(emergency_type)
         
         if start_date:
-            query += " AND DATE(timestamp) >= %s"
+            query += " AND call_date >= %s"
             params.append(start_date)
         
         if end_date:
-            query += " AND DATE(timestamp) <= %s"
+            query += " AND call_date <= %s"
             params.append(end_date)
         
         query += """
-            GROUP BY DATE(timestamp), emergency_type
+            GROUP BY call_date, emergency_type
             ORDER BY date
         """
         
@@ -361,48 +426,54 @@ def get_timeline_aggregated():
         print(f"Timeline aggregation error: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-#Stats Endpoints 
+#Stats Endpoints (?source= as for /timeline-aggregated, historical calls by default)
 @app.route('/stats/counts', methods=['GET'])
 def get_type_counts():
-    query = """
+    params = _stats_sources()
+    query = f"""
         SELECT emergency_type, emergency_subtype, COUNT(*) as count
-        FROM emergency_data
+        FROM calls_unified
+        {"WHERE data_source = %s" if params else ""}
         GROUP BY emergency_type, emergency_subtype
         ORDER BY count DESC
     """
     with get_connection() as conn:
         with conn.cursor(dictionary=True) as cursor:
-            cursor.execute(query)
+            cursor.execute(query, params or None)
             results = cursor.fetchall()
     return jsonify(results)
 
 
 @app.route('/stats/daily', methods=['GET'])
 def get_daily_stats():
-    query = """
-        SELECT DATE(timestamp) AS date, COUNT(*) AS count
-        FROM emergency_data
-        GROUP BY DATE(timestamp)
+    params = _stats_sources()
+    query = f"""
+        SELECT call_date AS date, COUNT(*) AS count
+        FROM calls_unified
+        WHERE call_date IS NOT NULL {"AND data_source = %s" if params else ""}
+        GROUP BY call_date
         ORDER BY date
     """
     with get_connection() as conn:
         with conn.cursor(dictionary=True) as cursor:
-            cursor.execute(query)
+            cursor.execute(query, params or None)
             results = cursor.fetchall()
     return jsonify(results)
 
 
 @app.route('/stats/township', methods=['GET'])
 def get_township_counts():
-    query = """
-        SELECT township, COUNT(*) AS count
-        FROM emergency_data
-        GROUP BY township
+    params = _stats_sources()
+    query = f"""
+        SELECT district AS township, COUNT(*) AS count
+        FROM calls_unified
+        {"WHERE data_source = %s" if params else ""}
+        GROUP BY district
         ORDER BY count DESC
     """
     with get_connection() as conn:
         with conn.cursor(dictionary=True) as cursor:
-            cursor.execute(query)
+            cursor.execute(query, params or None)
             results = cursor.fetchall()
     return jsonify(results)
 
@@ -414,6 +485,8 @@ CACHE_DURATION = 300  # 5 minutes
 @app.route('/clusters', methods=['GET'])
 def get_clusters():
     #DBSCAN clustering analysis endpoint
+    import pandas as pd
+    from services.clustering import analyze_emergency_clusters
     
     try:
         time_range = request.args.get('time_range', 'all')
@@ -436,13 +509,8 @@ def get_clusters():
           SELECT latitude as lat, longitude as lon, 
            COALESCE(emergency_type, 'Unknown') as call_type,
            timestamp,
-           CASE COALESCE(emergency_type, 'Unknown')
-               WHEN 'Fire' THEN 9
-               WHEN 'EMS' THEN 8
-               WHEN 'Traffic' THEN 7
-               ELSE 5
-           END as severity
-          FROM emergency_data
+           severity
+          FROM calls_unified
           WHERE latitude IS NOT NULL 
             AND longitude IS NOT NULL
         """
@@ -468,6 +536,12 @@ def get_clusters():
             conditions.append("district = %s")
             params.append(district)
         
+        # day 06:00-17:59, night the rest, on the stored hour so the 50000 row cap applies after it
+        if time_range == 'day':
+            conditions.append("hour BETWEEN 6 AND 17")
+        elif time_range == 'night':
+            conditions.append("(hour < 6 OR hour >= 18)")
+        
         if conditions:
             query += " AND " + " AND ".join(conditions)
         
@@ -483,18 +557,6 @@ def get_clusters():
         if df.empty:
             return jsonify({"error": "No data available for selected filters"}), 404
         
-        if time_range == 'day':
-            df = df.copy()
-            df['hour'] = pd.to_datetime(df['timestamp']).dt.hour
-            df = df[(df['hour'] >= 6) & (df['hour'] < 18)].copy()
-        elif time_range == 'night':
-            df = df.copy()
-            df['hour'] = pd.to_datetime(df['timestamp']).dt.hour
-            df = df[(df['hour'] < 6) | (df['hour'] >= 18)].copy()
-
-        if df.empty:
-            return jsonify({"error": "No data available for selected time range"}), 404
-        
         results = analyze_emergency_clusters(df)
         
         if min_severity:
@@ -523,16 +585,8 @@ def get_heatmap_data():
         district = request.args.get('district')
         
         query = """
-            SELECT latitude as lat, longitude as lon,
-                   CASE emergency_type
-                       WHEN 'Fire' THEN 0.9
-                       WHEN 'Medical Emergency' THEN 0.85
-                       WHEN 'Accident' THEN 0.7
-                       WHEN 'Assault' THEN 0.75
-                       WHEN 'Robbery' THEN 0.65
-                       ELSE 0.4
-                   END as intensity
-            FROM emergency_data
+            SELECT latitude as lat, longitude as lon, intensity
+            FROM calls_unified
             WHERE latitude IS NOT NULL AND longitude IS NOT NULL
         """
         
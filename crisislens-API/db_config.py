@@ -13,11 +13,22 @@ DB_CONFIG = {
     'database': os.getenv('DB_NAME', 'crisislens')
 }
 
+# Set by the API's request profiler (services/request_profiler.init_app) to time queries per
+# request; workers and CLIs get the plain connection
+_wrap_connection = None
+
+
+def wrap_connections(wrapper):
+    #Every connection get_connection yields from now on is passed through wrapper(conn)
+    global _wrap_connection
+    _wrap_connection = wrapper
+
+
 @contextmanager
 def get_connection():
     #Context manager for database connections using mysql.connector.Handles connection cleanup.
     conn = mysql.connector.connect(**DB_CONFIG)
     try:
-        yield conn
+        yield _wrap_connection(conn) if _wrap_connection else conn
     finally:
         conn.close()
\ No newline at end of file
@@ -4,8 +4,6 @@ import argparse
 import warnings
 import pandas as pd
 import numpy as np
-from pmdarima import auto_arima
-from statsmodels.tsa.arima.model import ARIMA
 
 from utils import (
     fetch_daily_calls,
@@ -45,6 +43,7 @@ def split_train_test(df, test_days=30):
 
 def find_arima_params(train_series):
     #Auto-select ARIMA parameters using AIC.
+    from pmdarima import auto_arima
     model = auto_arima(
         train_series,
         start_p=0, start_q=0,
@@ -59,6 +58,7 @@ def find_arima_params(train_series):
 
 def train_arima(train_series, order):
     #Train ARIMA model with given parameters.
+    from statsmodels.tsa.arima.model import ARIMA
     model = ARIMA(train_series, order=order)
     fitted = model.fit()
     return fitted
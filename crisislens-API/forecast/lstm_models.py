@@ -4,10 +4,6 @@ import argparse
 import warnings
 import pandas as pd
 import numpy as np
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras import layers
-from sklearn.preprocessing import MinMaxScaler
 
 from utils import (
     fetch_daily_calls,
@@ -19,7 +15,6 @@ from utils import (
 )
 
 warnings.filterwarnings('ignore')
-tf.get_logger().setLevel('ERROR')
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 RESULTS_DIR = os.path.join(BASE_DIR, "..", "forecast_results")
@@ -34,6 +29,12 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(message)s"
 )
 
+def _keras():
+    #TensorFlow takes seconds to import, only building and training the models need it
+    import tensorflow as tf
+    tf.get_logger().setLevel('ERROR')
+    return tf.keras
+
 def create_sequences(data, lookback=30):
     #Convert time series to supervised learning format.
     X, y = [], []
@@ -44,6 +45,7 @@ def create_sequences(data, lookback=30):
 
 def prepare_data(df, lookback=30, test_days=30):
     #Prepare data for LSTM training.
+    from sklearn.preprocessing import MinMaxScaler
     values = df['y'].values.reshape(-1, 1)
     
     scaler = MinMaxScaler()
@@ -63,6 +65,8 @@ def prepare_data(df, lookback=30, test_days=30):
 
 def build_simple_lstm(lookback, units=50):
     #Single layer LSTM baseline.
+    keras = _keras()
+    layers = keras.layers
     model = keras.Sequential([
         layers.LSTM(units, input_shape=(lookback, 1)),
         layers.Dense(1)
@@ -72,6 +76,8 @@ def build_simple_lstm(lookback, units=50):
 
 def build_stacked_lstm(lookback, units=50):
     #Two-layer LSTM for increased capacity.
+    keras = _keras()
+    layers = keras.layers
     model = keras.Sequential([
         layers.LSTM(units, return_sequences=True, input_shape=(lookback, 1)),
         layers.LSTM(units),
@@ -82,7 +88,7 @@ def build_stacked_lstm(lookback, units=50):
 
 def train_model(model, X_train, y_train, X_test, y_test, epochs=50):
     #Train with early stopping to prevent overfitting.
-    early_stop = keras.callbacks.EarlyStopping(
+    early_stop = _keras().callbacks.EarlyStopping(
         monitor='val_loss',
         patience=10,
         restore_best_weights=True
@@ -4,8 +4,6 @@ import argparse
 from datetime import datetime
 import pandas as pd
 import numpy as np
-from prophet import Prophet
-import matplotlib.pyplot as plt
 
 # Import shared utilities
 from utils import fetch_daily_calls, calculate_metrics, save_metrics_to_csv, get_engine, get_emergency_types
@@ -40,6 +38,7 @@ def split_train_test(df, test_days=30):
 
 def train_prophet_model(train_df):
     #Train Prophet model with default seasonality.
+    from prophet import Prophet
     model = Prophet(
         daily_seasonality=False,
         weekly_seasonality=True,
@@ -52,6 +51,7 @@ def train_prophet_model(train_df):
 
 def plot_prophet_validation(train_df, test_df, predictions, emergency_type):
     #Plot validation results.
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(14, 6))
     
     plt.plot(train_df['ds'], train_df['y'], label='Training', color='blue', alpha=0.6)
@@ -3,9 +3,7 @@ import pandas as pd
 import numpy as np
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
-import matplotlib.pyplot as plt
 from datetime import datetime
-from sklearn.metrics import mean_squared_error, mean_absolute_error
 
 load_dotenv()
 
@@ -14,12 +12,24 @@ DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "3306")
 DB_NAME = os.getenv("DB_NAME", "capstone")
+# 'warehouse' reads the daily volumes from the Parquet mirror (Data/warehouse.py) instead of MySQL
+FORECAST_SOURCE = os.getenv("FORECAST_SOURCE", "mysql")
 
 def get_engine():
     uri = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     return create_engine(uri)
 
+def _warehouse():
+    import sys
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Data'))
+    import warehouse
+    return warehouse
+
 def fetch_daily_calls(engine, emergency_type=None):  #Load daily call volumes from emergency_data table
+    if FORECAST_SOURCE == 'warehouse':
+        # the warehouse's historical rows are the same CSV emergency_data is loaded from
+        return _warehouse().daily_counts(types=[emergency_type] if emergency_type else None,
+                                         data_source='historical')
     if emergency_type:
         query = "SELECT DATE(timestamp) AS ds, COUNT(*) AS y FROM emergency_data WHERE emergency_type = :etype GROUP BY DATE(timestamp) ORDER BY ds"
         params = {"etype": emergency_type}
@@ -42,6 +52,7 @@ def get_emergency_types(engine):  #Get list of emergency types from database.
 
 def calculate_metrics(y_true, y_pred):
     #Calculate forecast accuracy metrics.
+    from sklearn.metrics import mean_squared_error, mean_absolute_error
     rmse = np.sqrt(mean_squared_error(y_true, y_pred))
     mae = mean_absolute_error(y_true, y_pred)
     
@@ -57,6 +68,7 @@ def calculate_metrics(y_true, y_pred):
 
 def plot_validation(train_df, test_df, predictions, model_name, emergency_type, output_dir):
     #Plot training data, actual test data, and predictions.
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(14, 6))
     
     plt.plot(train_df['ds'], train_df['y'], label='Training Data', color='blue', alpha=0.6)
@@ -79,6 +91,7 @@ def plot_validation(train_df, test_df, predictions, model_name, emergency_type,
 
 def plot_forecast(historical_df, forecast_df, model_name, emergency_type, output_dir):
     #Plot historical data with future forecast.
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(14, 6))
     
     plt.plot(historical_df['ds'], historical_df['y'], label='Historical', color='blue', alpha=0.6)
@@ -0,0 +1,55 @@
+# gunicorn -c gunicorn.conf.py wsgi:app
+# Every setting can be overridden with the env variables below.
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+
+# gthread: each worker process serves GUNICORN_THREADS requests at once, so a slow
+# /clusters request ties up one thread instead of the whole server
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('GUNICORN_WORKERS', min(os.cpu_count() or 1, 8)))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# load the app and the models once in the master, the workers are forked from it (see wsgi.py)
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+# recycle workers after a number of requests (jittered so they don't all restart together);
+# a recycled worker finishes its in-flight requests within graceful_timeout
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 500))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+# /clusters and the stats queries over emergency_data can take a while
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+
+# an /events/calls client holds a thread for as long as it is connected; cap them per
+# worker so dashboards can't take every thread away from regular requests
+os.environ.setdefault('EVENTS_MAX_CLIENTS', str(max(1, threads // 2)))
+
+
+def when_ready(server):
+    # with the models preloaded, promoted versions are loaded here once and the workers
+    # rolled onto them, instead of every worker loading its own copy
+    if preload_app:
+        from services.inference_server import watch_models_in_master
+        watch_models_in_master(server)
+
+
+def post_fork(server, worker):
+    # background threads don't survive the fork, start this worker's batcher (and, without
+    # preload_app, its model watcher) before the first request
+    from services.inference_server import get_inference_server
+    get_inference_server(watch_models=not preload_app)
+    server.log.info(f"Worker {worker.pid} ready")
+
+
+def worker_exit(server, worker):
+    # keep the stage histograms this worker recorded since its last flush
+    try:
+        from stage_metrics import flush
+        flush()
+    except Exception as e:
+        server.log.warning(f"Worker {worker.pid} could not flush stage metrics: {e}")
@@ -0,0 +1,45 @@
+from flask import Blueprint, request, jsonify
+from services.inference_server import get_inference_server, current_inference_server, InferenceOverloaded
+
+classify_bp = Blueprint('classify', __name__)
+
+MAX_CLASSIFY_TEXTS = 500
+
+
+#Synchronous classification for call-taker suggestions, no DB write
+# {"description": "..."} -> one result, {"descriptions": [...]} -> {"results": [...]}
+@classify_bp.route('/classify', methods=['POST'])
+def classify():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Missing JSON payload"}), 400
+
+    single = 'description' in data
+    texts = [data['description']] if single else data.get('descriptions')
+    if not isinstance(texts, list) or not texts:
+        return jsonify({"error": "Provide 'description' or a non-empty 'descriptions' list"}), 400
+    if len(texts) > MAX_CLASSIFY_TEXTS:
+        return jsonify({"error": f"At most {MAX_CLASSIFY_TEXTS} descriptions per request"}), 400
+    if not all(isinstance(t, str) for t in texts):
+        return jsonify({"error": "Descriptions must be strings"}), 400
+
+    try:
+        results = get_inference_server(preload=True).classify(texts)
+    except (InferenceOverloaded, TimeoutError) as e:
+        response = jsonify({"error": f"Classifier busy: {e}"})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    except Exception as e:
+        print(f"Error in /classify: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+    if single:
+        return jsonify(results[0]), 200
+    return jsonify({"count": len(results), "results": results}), 200
+
+
+@classify_bp.route('/classify/stats', methods=['GET'])
+def classify_stats():
+    # don't start the server (and load the models) just to report on it
+    server = current_inference_server()
+    return jsonify(server.summary() if server else {'started': False}), 200
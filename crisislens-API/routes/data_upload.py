@@ -1,14 +1,13 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
 import logging
-import pandas as pd
 from datetime import datetime
 import sys
 
 sys.path.append('../')
 from db_config import get_connection as get_db_connection
+from services.unified_calls import sync_calls
 from utils.file_validator import (allowed_file, validate_file_size, parse_upload, validate_dataframe, needs_classification)
-from utils.classifier_wrapper import BatchClassifier
 
 logger = logging.getLogger(__name__)
 upload_bp = Blueprint('upload', __name__)
@@ -21,6 +20,7 @@ classifier = None
 def get_classifier():
     global classifier
     if classifier is None:
+        from utils.classifier_wrapper import BatchClassifier
         classifier = BatchClassifier()
     return classifier
 
@@ -110,7 +110,9 @@ def process_upload_sync(df, filename, needs_ml):
             chunk['classification_confidence'] = 1.0
         
         chunk['filename'] = filename
-        chunk['uploaded_at'] = datetime.now()
+        # whole seconds, so the chunk's rows can be found again by (filename, uploaded_at),
+        # indexed by database/12_uploaded_data_upload_key.sql
+        chunk['uploaded_at'] = datetime.now().replace(microsecond=0)
         chunk['source'] = 'Uploaded'
         
         inserted = insert_chunk(chunk)
@@ -132,6 +134,7 @@ def process_upload_sync(df, filename, needs_ml):
     return report
 
 def insert_chunk(df):
+    import pandas as pd
     column_mapping = {
         'timestamp': 'timestamp', 
         'description': 'description',
@@ -165,9 +168,13 @@ def insert_chunk(df):
         
         values = df_insert.values.tolist()
         cursor.executemany(query, values)
+        inserted = cursor.rowcount
+        # same transaction: the chunk shows up in /calls and the maps together with uploaded_data
+        sync_calls(cursor, 'uploaded', "filename = %s AND uploaded_at = %s",
+                   (df['filename'].iloc[0], df['uploaded_at'].iloc[0].to_pydatetime()))
         conn.commit()
         
-        return cursor.rowcount
+        return inserted
 
 @upload_bp.route('/upload/status/<job_id>', methods=['GET'])
 def get_upload_status(job_id):
@@ -0,0 +1,103 @@
+import re
+import json
+import queue
+
+from flask import Blueprint, Response, request, jsonify
+from services.event_broadcaster import get_broadcaster, TooManyClients
+from services.live_hotspots import get_detector, current_detector
+from call_events import replay
+from stage_metrics import get_redis
+
+events_bp = Blueprint('events', __name__)
+
+EVENT_ID_PATTERN = re.compile(r'^\d+-\d+$')
+KEEPALIVE_SECONDS = 15
+RECONNECT_MS = 3000
+
+
+def _split(value):
+    return [v.strip() for v in value.split(',') if v.strip()] if value else []
+
+
+def _frame(event_id, payload):
+    return f"id: {event_id}\nevent: call\ndata: {payload}\n\n"
+
+
+#Server-Sent Events feed of newly enriched calls, replaces polling /calls/latest
+# ?type=Fire,EMS&district=NORRISTOWN filter (case-insensitive); on reconnect the browser sends
+# Last-Event-ID (or pass ?last_event_id=) and the calls published since then are replayed first
+@events_bp.route('/events/calls', methods=['GET'])
+def call_events():
+    types = _split(request.args.get('type'))
+    districts = _split(request.args.get('district'))
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    if last_event_id and not EVENT_ID_PATTERN.match(last_event_id):
+        return jsonify({"error": "Invalid Last-Event-ID"}), 400
+
+    try:
+        broadcaster = get_broadcaster(get_redis())
+        # subscribe before replaying so nothing published in between is lost; duplicates are skipped by id
+        subscription = broadcaster.subscribe(types, districts)
+    except TooManyClients as e:
+        response = jsonify({"error": f"Too many live clients: {e}"})
+        response.headers['Retry-After'] = str(RECONNECT_MS // 1000)
+        return response, 503
+
+    try:
+        backlog = replay(get_redis(), last_event_id) if last_event_id else []
+    except Exception as e:
+        broadcaster.unsubscribe(subscription)
+        return jsonify({"error": str(e)}), 503
+
+    def stream():
+        # live events are only checked against the replayed ones: workers XADD and PUBLISH
+        # separately, so ids can arrive out of order and a lower id may still be new
+        replayed = {event_id for event_id, _ in backlog}
+        try:
+            yield f"retry: {RECONNECT_MS}\n\n"
+            for event_id, payload in backlog:
+                if subscription.matches(json.loads(payload)):
+                    yield _frame(event_id, payload)
+            while not subscription.dropped:
+                try:
+                    event_id, payload, _ = subscription.events.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if event_id in replayed:
+                    replayed.discard(event_id)
+                    continue
+                yield _frame(event_id, payload)
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
+@events_bp.route('/events/stats', methods=['GET'])
+def events_stats():
+    stats = get_broadcaster(get_redis()).summary()
+    detector = current_detector()
+    if detector:
+        stats['hotspots'] = detector.summary()
+    return jsonify(stats), 200
+
+
+#Emerging hotspots among the calls of the last HOTSPOT_WINDOW_MINUTES (services/live_hotspots.py),
+# kept up to date from the same feed, so nothing is clustered per request
+# ?type=Fire,EMS&district=NORRISTOWN filter on a hotspot's primary type / district, ?min_calls=
+@events_bp.route('/clusters/live', methods=['GET'])
+def live_clusters():
+    try:
+        min_calls = int(request.args['min_calls']) if request.args.get('min_calls') else None
+    except ValueError:
+        return jsonify({"error": "Invalid 'min_calls'"}), 400
+    try:
+        detector = get_detector(get_redis(), get_broadcaster(get_redis()))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify(detector.snapshot(_split(request.args.get('type')), _split(request.args.get('district')),
+                                     min_calls)), 200
@@ -0,0 +1,142 @@
+import os
+import math
+
+from flask import Blueprint, jsonify, request
+from db_config import get_connection
+from services.unified_calls import DATA_SOURCES
+
+map_bp = Blueprint('map', __name__)
+
+# below MAP_DETAIL_ZOOM the map always gets grid cells; at or above it, single calls as long
+# as the viewport holds at most MAP_MAX_POINTS of them, cells otherwise
+MAP_DETAIL_ZOOM = int(os.getenv('MAP_DETAIL_ZOOM', 14))
+MAP_MAX_POINTS = int(os.getenv('MAP_MAX_POINTS', 5000))
+MAP_MAX_CELLS = int(os.getenv('MAP_MAX_CELLS', 4096))
+CELL_PX = 32  # grid cell edge in screen pixels at the requested zoom
+TILE_PX = 256
+MAX_ZOOM = 22
+
+
+def _bbox(value):
+    #west,south,east,north in degrees -> tuple, None when malformed or empty
+    try:
+        west, south, east, north = (float(v) for v in value.split(','))
+    except (AttributeError, ValueError):
+        return None
+    if not (-180 <= west < east <= 180 and -90 <= south < north <= 90):
+        return None
+    return west, south, east, north
+
+
+def grid_cell(bbox, zoom):
+    """
+    Cell size (lon, lat degrees) for aggregating the bbox at zoom: CELL_PX screen pixels
+    wide, made square on screen with the cosine of the viewport's whole-degree latitude.
+    Cells sit on a fixed grid from (0, 0), so panning keeps the same cells. When the bbox
+    would need more than MAP_MAX_CELLS the cell doubles, which is the next zoom out's grid.
+    """
+    west, south, east, north = bbox
+    lon_cell = CELL_PX * 360 / (TILE_PX * 2 ** zoom)
+    lat_cell = lon_cell * math.cos(math.radians(round((south + north) / 2)))
+    while (math.ceil((east - west) / lon_cell) + 1) * (math.ceil((north - south) / lat_cell) + 1) > MAP_MAX_CELLS:
+        lon_cell, lat_cell = lon_cell * 2, lat_cell * 2
+    return lon_cell, lat_cell
+
+
+def _filters(bbox):
+    # MBRIntersects on a constant envelope is answered from idx_calls_unified_location
+    # (database/11_calls_unified_location.sql); points on the edge count as inside
+    west, south, east, north = bbox
+    conditions = ["MBRIntersects(ST_MakeEnvelope(POINT(%s, %s), POINT(%s, %s)), location)",
+                  "latitude IS NOT NULL", "longitude IS NOT NULL"]
+    params = [west, south, east, north]
+
+    emergency_types = request.args.get('emergency_types', '')
+    if emergency_types:
+        types_list = [t.strip() for t in emergency_types.split(',')]
+        conditions.append(f"emergency_type IN ({','.join(['%s'] * len(types_list))})")
+        params.extend(types_list)
+    start_date = request.args.get('start_date')
+    if start_date:
+        conditions.append("timestamp >= %s")
+        params.append(start_date)
+    end_date = request.args.get('end_date')
+    if end_date:
+        conditions.append("timestamp < %s + INTERVAL 1 DAY")
+        params.append(end_date)
+    district = request.args.get('district')
+    if district:
+        conditions.append("district = %s")
+        params.append(district)
+    source = request.args.get('source', 'all')
+    if source in DATA_SOURCES:
+        conditions.append("data_source = %s")
+        params.append(source)
+    return " AND ".join(conditions), params
+
+
+def _points(cursor, where, params):
+    #every call in the viewport, or None when there are more than MAP_MAX_POINTS
+    cursor.execute(f"""
+        SELECT source_id AS id, data_source, latitude AS lat, longitude AS lon, emergency_type,
+               emergency_subtype, timestamp, priority_flag, intensity
+        FROM calls_unified
+        WHERE {where}
+        LIMIT %s
+    """, params + [MAP_MAX_POINTS + 1])
+    rows = cursor.fetchall()
+    if len(rows) > MAP_MAX_POINTS:
+        return None
+    for row in rows:
+        row['lat'], row['lon'], row['intensity'] = float(row['lat']), float(row['lon']), float(row['intensity'])
+    return rows
+
+
+def _cells(cursor, where, params, cell):
+    #call count, centroid and mean heatmap intensity per grid cell, every call counted
+    lon_cell, lat_cell = cell
+    cursor.execute(f"""
+        SELECT FLOOR(longitude / %s) AS x, FLOOR(latitude / %s) AS y, COUNT(*) AS count,
+               AVG(latitude) AS lat, AVG(longitude) AS lon, AVG(intensity) AS intensity
+        FROM calls_unified
+        WHERE {where}
+        GROUP BY x, y
+    """, [lon_cell, lat_cell] + params)
+    return [{"x": int(row['x']), "y": int(row['y']), "count": int(row['count']),
+             "lat": round(float(row['lat']), 6), "lon": round(float(row['lon']), 6),
+             "intensity": round(float(row['intensity']), 3)}
+            for row in cursor.fetchall()]
+
+
+#Calls in a map viewport, sized for the zoom
+# ?bbox=west,south,east,north&zoom=13 plus the dashboard filters of /clusters/heatmap-data
+# (emergency_types, start_date, end_date, district) and source=historical|live|uploaded.
+# mode "points": every call in the bbox; mode "grid": every call counted into cells of
+# cell.lon x cell.lat degrees, cell (x, y) spanning [x * cell.lon, (x + 1) * cell.lon).
+@map_bp.route('/map/points', methods=['GET'])
+def map_points():
+    bbox = _bbox(request.args.get('bbox'))
+    if not bbox:
+        return jsonify({"error": "bbox must be west,south,east,north in degrees"}), 400
+    try:
+        zoom = min(max(int(request.args.get('zoom', 12)), 0), MAX_ZOOM)
+    except ValueError:
+        return jsonify({"error": "Invalid 'zoom'"}), 400
+
+    where, params = _filters(bbox)
+    try:
+        with get_connection() as conn:
+            with conn.cursor(dictionary=True) as cursor:
+                points = _points(cursor, where, params) if zoom >= MAP_DETAIL_ZOOM else None
+                if points is not None:
+                    return jsonify({"mode": "points", "zoom": zoom, "bbox": bbox,
+                                    "total": len(points), "points": points}), 200
+
+                cell = grid_cell(bbox, zoom)
+                cells = _cells(cursor, where, params, cell)
+        return jsonify({"mode": "grid", "zoom": zoom, "bbox": bbox,
+                        "cell": {"lon": cell[0], "lat": cell[1]},
+                        "total": sum(c['count'] for c in cells), "cells": cells}), 200
+    except Exception as e:
+        print(f"Error in /map/points: {str(e)}")
+        return jsonify({"error": str(e)}), 500
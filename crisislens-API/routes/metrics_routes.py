@@ -0,0 +1,84 @@
+from flask import Blueprint, jsonify, Response, request
+import sys
+import os
+
+classifier_path = os.path.join(os.path.dirname(__file__), '..', '..', 'Classifier', 'production')
+if os.path.exists(classifier_path):
+    sys.path.append(classifier_path)
+else:
+    sys.path.append('/app/Classifier/production')
+
+from stage_metrics import collect, render_prometheus, summary, reset, get_redis
+import call_stream
+import admission
+from services.request_profiler import slow_queries, reset_slow_queries
+from services.auth_service import require_auth
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+#Prometheus scrape endpoint: stage histograms flushed by the workers + this process
+@metrics_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    try:
+        body = render_prometheus(collect())
+        if call_stream.INGEST_TRANSPORT == 'stream':
+            body += call_stream.render_prometheus(call_stream.stream_stats(get_redis()))
+        body += admission.render_prometheus(admission.get_controller(get_redis()).state())
+    except Exception as e:
+        return Response(f"# metrics unavailable: {e}\n", status=503, mimetype='text/plain')
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
+#p50/p95/p99 per stage in ms, for quick checks without Prometheus
+@metrics_bp.route('/metrics/summary', methods=['GET'])
+def metrics_summary():
+    try:
+        rows = summary(collect())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 503
+    family = request.args.get('family')
+    if family:
+        rows = [r for r in rows if r['family'] == family]
+    return jsonify(rows), 200
+
+
+#Length, lag, pending entries and dead letters of the enrichment call stream
+@metrics_bp.route('/metrics/stream', methods=['GET'])
+def stream_metrics():
+    try:
+        return jsonify(call_stream.stream_stats(get_redis())), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 503
+
+
+#Backlog depth per lane, lag and the admission / batch-mode state
+@metrics_bp.route('/metrics/admission', methods=['GET'])
+def admission_metrics():
+    try:
+        return jsonify(admission.get_controller(get_redis()).state()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 503
+
+
+#Slowest queries seen by the API (>= SLOW_QUERY_MS) with route and EXPLAIN plan
+#(parameters only with SLOW_QUERY_PARAMS=1, see request_profiler)
+@metrics_bp.route('/metrics/slow-queries', methods=['GET'])
+@require_auth
+def slow_query_log():
+    limit = request.args.get('limit', 20, type=int)
+    try:
+        return jsonify(slow_queries(limit)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 503
+
+
+@metrics_bp.route('/metrics/reset', methods=['POST'])
+@require_auth
+def metrics_reset():
+    try:
+        reset()
+        reset_slow_queries()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify({"message": "Stage metrics and slow-query log reset"}), 200
@@ -40,11 +40,12 @@ def get_peak_hours():
         query = "SELECT HOUR(timestamp) as hour,DAYOFWEEK(timestamp) as day_of_week, COUNT(*) as call_count FROM emergency_data WHERE 1=1"
         params = []
         
+        # bare timestamp comparisons, so MySQL prunes emergency_data's monthly partitions
         if start_date:
-            query += " AND DATE(timestamp) >= %s"
+            query += " AND timestamp >= %s"
             params.append(start_date)
         if end_date:
-            query += " AND DATE(timestamp) <= %s"
+            query += " AND timestamp < %s + INTERVAL 1 DAY"
             params.append(end_date)
         if emergency_type:
             query += " AND emergency_type = %s"
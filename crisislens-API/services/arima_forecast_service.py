@@ -5,8 +5,6 @@ import warnings
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
-from pmdarima import auto_arima
-from statsmodels.tsa.arima.model import ARIMA
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 
@@ -49,6 +47,7 @@ def fetch_historical_data(engine, emergency_type=None):
 
 def find_arima_order(series):
     #Auto-select ARIMA parameters.
+    from pmdarima import auto_arima
     try:
         model = auto_arima(
             series,
@@ -86,6 +85,7 @@ def train_and_forecast(series, order, seasonal_order, periods=30):
         model = SARIMAX(series, order=order, seasonal_order=seasonal_order)
     else:
         # Regular ARIMA
+        from statsmodels.tsa.arima.model import ARIMA
         model = ARIMA(series, order=order)
 
     fitted = model.fit()
@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import time
+import queue
+import threading
+from collections import deque
+
+classifier_path = os.path.join(os.path.dirname(__file__), '..', '..', 'Classifier', 'production')
+if os.path.exists(classifier_path):
+    sys.path.append(classifier_path)
+else:
+    sys.path.append('/app/Classifier/production')
+
+from call_events import CALL_EVENTS_CHANNEL, parse_message, replay
+
+EVENTS_MAX_CLIENTS = int(os.getenv('EVENTS_MAX_CLIENTS', 200))
+# events a slow client may fall behind by before it is dropped (it resumes from Last-Event-ID)
+EVENTS_CLIENT_BUFFER = int(os.getenv('EVENTS_CLIENT_BUFFER', 1000))
+# after the subscription is lost, what was published meanwhile is replayed from the stream,
+# starting this much before the last dispatched event: workers XADD and PUBLISH separately,
+# so ids can arrive out of order. Ids among the last EVENTS_RECENT_IDS dispatched are skipped
+EVENTS_REPLAY_OVERLAP_MS = int(os.getenv('EVENTS_REPLAY_OVERLAP_MS', 5000))
+EVENTS_RECENT_IDS = 10000
+
+
+class TooManyClients(Exception):
+    pass
+
+
+class Subscription:
+
+    def __init__(self, types=None, districts=None, buffer=EVENTS_CLIENT_BUFFER):
+        self.types = {t.lower() for t in types or []}
+        self.districts = {d.lower() for d in districts or []}
+        self.events = queue.Queue(maxsize=buffer)
+        self.dropped = False
+
+    def matches(self, call):
+        if self.types and (call.get('emergency_type') or '').lower() not in self.types:
+            return False
+        if self.districts and (call.get('district') or '').lower() not in self.districts:
+            return False
+        return True
+
+
+def _id_key(event_id):
+    #stream ids are '<ms>-<seq>'
+    ms, _, seq = event_id.partition('-')
+    return int(ms), int(seq or 0)
+
+
+class EventBroadcaster:
+    """
+    One Redis pub/sub connection per API process, fanned out to every connected SSE
+    client through its own bounded queue, so dashboards cost no database queries.
+    """
+
+    def __init__(self, conn, channel=CALL_EVENTS_CHANNEL, max_clients=EVENTS_MAX_CLIENTS):
+        self.conn = conn
+        self.channel = channel
+        self.max_clients = max_clients
+        self.clients = set()
+        self.listeners = []
+        self.stats = {'messages': 0, 'events': 0, 'delivered': 0, 'dropped_clients': 0, 'reconnects': 0,
+                      'replayed': 0}
+        self.last_event_id = None
+        self._recent = deque()
+        self._recent_ids = set()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='call-events', daemon=True)
+                self._thread.start()
+        return self
+
+    def subscribe(self, types=None, districts=None):
+        self.start()
+        with self._lock:
+            if len(self.clients) >= self.max_clients:
+                raise TooManyClients(f"{len(self.clients)} clients already connected")
+            subscription = Subscription(types, districts)
+            self.clients.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self.clients.discard(subscription)
+
+    def add_listener(self, listener):
+        #listener(calls) gets every block of calls in this process, before the clients do
+        with self._lock:
+            self.listeners.append(listener)
+
+    def _remember(self, event_id):
+        self._recent.append(event_id)
+        self._recent_ids.add(event_id)
+        if len(self._recent) > EVENTS_RECENT_IDS:
+            self._recent_ids.discard(self._recent.popleft())
+        if self.last_event_id is None or _id_key(event_id) > _id_key(self.last_event_id):
+            self.last_event_id = event_id
+
+    def _dispatch(self, pairs):
+        # (event_id, call json) pairs, live or replayed; each id is dispatched once
+        events = []
+        for event_id, payload in pairs:
+            if event_id in self._recent_ids:
+                continue
+            self._remember(event_id)
+            events.append((event_id, payload, json.loads(payload)))
+        if not events:
+            return
+        self.stats['events'] += len(events)
+        with self._lock:
+            clients = list(self.clients)
+            listeners = list(self.listeners)
+        for listener in listeners:
+            try:
+                listener([event[2] for event in events])
+            except Exception as e:
+                print(f" Call events listener failed: {e}")
+        for subscription in clients:
+            for event in events:
+                if not subscription.matches(event[2]):
+                    continue
+                try:
+                    subscription.events.put_nowait(event)
+                    self.stats['delivered'] += 1
+                except queue.Full:
+                    # the request thread sees this and closes the response
+                    subscription.dropped = True
+                    self.stats['dropped_clients'] += 1
+                    self.unsubscribe(subscription)
+                    break
+
+    def _run(self):
+        while True:
+            pubsub = self.conn.pubsub()
+            try:
+                pubsub.subscribe(self.channel)
+                if self.last_event_id is not None:
+                    self._replay_missed(pubsub)
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message['type'] == 'message':
+                        self.stats['messages'] += 1
+                        try:
+                            self._dispatch(parse_message(message['data']))
+                        except ValueError as e:
+                            print(f" Skipping malformed call event: {e}")
+            except Exception as e:
+                self.stats['reconnects'] += 1
+                print(f" Call events subscription lost, reconnecting: {e}")
+                time.sleep(1)
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+    def _replay_missed(self, pubsub):
+        # wait for the subscription to be active, so what's published from here on arrives live
+        # (the first reply on the connection is the subscribe confirmation)
+        confirmation = pubsub.get_message(timeout=5.0)
+        if not confirmation or confirmation['type'] != 'subscribe':
+            raise ConnectionError("no subscribe confirmation")
+        ms = _id_key(self.last_event_id)[0]
+        missed = replay(self.conn, f"{max(0, ms - EVENTS_REPLAY_OVERLAP_MS)}-0")
+        before = self.stats['events']
+        self._dispatch(missed)
+        self.stats['replayed'] += self.stats['events'] - before
+        print(f" Call events resubscribed, {self.stats['events'] - before} missed events replayed")
+
+    def summary(self):
+        return {**self.stats, 'clients': len(self.clients), 'max_clients': self.max_clients, 'channel': self.channel,
+                'listeners': len(self.listeners)}
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_broadcaster(conn=None):
+    #Process-wide broadcaster, its listener thread starts with the first subscriber
+    global _broadcaster
+    with _broadcaster_lock:
+        if _broadcaster is None:
+            if conn is None:
+                from redis import Redis
+                conn = Redis(host=os.getenv('REDIS_HOST', 'localhost'), port=int(os.getenv('REDIS_PORT', 6379)))
+            _broadcaster = EventBroadcaster(conn)
+    return _broadcaster
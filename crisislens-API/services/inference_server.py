@@ -0,0 +1,201 @@
+import os
+import sys
+import time
+import queue
+import signal
+import threading
+
+classifier_path = os.path.join(os.path.dirname(__file__), '..', '..', 'Classifier', 'production')
+if os.path.exists(classifier_path):
+    sys.path.append(classifier_path)
+else:
+    sys.path.append('/app/Classifier/production')
+
+from stage_metrics import observe, METRICS_ENABLED
+
+# A request waits at most INFERENCE_MAX_WAIT_MS for others to join its batch; a batch is
+# cut early once it holds INFERENCE_MAX_BATCH texts. Requests that arrive while a batch is
+# being scored are picked up together by the next one.
+INFERENCE_MAX_BATCH = int(os.getenv('INFERENCE_MAX_BATCH', 64))
+INFERENCE_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', 2))
+INFERENCE_MAX_PENDING = int(os.getenv('INFERENCE_MAX_PENDING', 2000))
+INFERENCE_TIMEOUT_SECONDS = float(os.getenv('INFERENCE_TIMEOUT_SECONDS', 2))
+
+
+class InferenceOverloaded(Exception):
+    pass
+
+
+class _Request:
+
+    __slots__ = ('texts', 'enqueued', 'done', 'result', 'error')
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class InferenceServer:
+    """
+    Coalesces concurrent classify() calls from the request threads into micro-batches
+    scored by a single background thread with one classify_batch() per batch.
+    """
+
+    def __init__(self, classify_fn=None, max_batch=INFERENCE_MAX_BATCH,
+                 max_wait_ms=INFERENCE_MAX_WAIT_MS, max_pending=INFERENCE_MAX_PENDING):
+        self.classify_fn = classify_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.stats = {'requests': 0, 'texts': 0, 'batches': 0, 'rejected': 0, 'timeouts': 0, 'errors': 0}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.classify_fn is None:
+                # pandas + the model code, only once something is classified
+                from classifier_service import classify_batch
+                self.classify_fn = classify_batch
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+                self._thread.start()
+        return self
+
+    def classify(self, texts, timeout=INFERENCE_TIMEOUT_SECONDS):
+        #Blocks until the batch containing these texts is scored, returns one dict per text
+        if not texts:
+            return []
+        self.start()
+        request = _Request(list(texts))
+        try:
+            self.pending.put_nowait(request)
+        except queue.Full:
+            self.stats['rejected'] += 1
+            raise InferenceOverloaded(f"{self.pending.qsize()} requests already waiting")
+
+        if not request.done.wait(timeout):
+            # the batcher still fills it in later, nobody reads it
+            self.stats['timeouts'] += 1
+            raise TimeoutError(f"Classification took longer than {timeout}s")
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _collect(self):
+        batch = [self.pending.get()]
+        size = len(batch[0].texts)
+        deadline = batch[0].enqueued + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self.pending.get_nowait() if remaining <= 0 else self.pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            texts = [text for request in batch for text in request.texts]
+            try:
+                results = self.classify_fn(texts)
+                error = None
+            except Exception as e:
+                print(f" Inference batch of {len(texts)} failed: {e}")
+                results, error = None, e
+                self.stats['errors'] += 1
+
+            finished = time.perf_counter()
+            offset = 0
+            for request in batch:
+                n = len(request.texts)
+                if error is None:
+                    request.result = results[offset:offset + n]
+                else:
+                    request.error = error
+                offset += n
+                request.done.set()
+
+            self.stats['requests'] += len(batch)
+            self.stats['texts'] += len(texts)
+            self.stats['batches'] += 1
+            if METRICS_ENABLED:
+                observe('inference', finished - started, stage='batch_predict')
+                for request in batch:
+                    observe('inference', started - request.enqueued, stage='queue_wait')
+
+    def summary(self):
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'pending': self.pending.qsize(),
+            'mean_batch_texts': round(self.stats['texts'] / batches, 2) if batches else None,
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait * 1000,
+        }
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_inference_server(preload=False, watch_models=True):
+    #Process-wide server, created on first use (after the fork under a pre-forking server).
+    #preload loads the models here so the first batch is not cut off by the request timeout.
+    #watch_models also starts this process's model watcher, so /classify follows
+    #`model_registry.py promote`; gunicorn workers forked from preloaded models leave that
+    #to the master (watch_models_in_master)
+    global _server
+    with _server_lock:
+        if _server is None:
+            from classifier_service import preload_models, start_model_watcher
+            if preload:
+                preload_models()
+            if watch_models:
+                start_model_watcher()
+            _server = InferenceServer().start()
+    return _server
+
+
+def current_inference_server():
+    #The server if this process has started one, without creating it
+    return _server
+
+
+def _roll_workers(server):
+    # replace the gunicorn workers one at a time, waiting for each replacement so the
+    # others keep serving; the new workers fork from the master's current models
+    for pid in list(server.WORKERS):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            continue
+        deadline = time.time() + server.cfg.graceful_timeout + 10
+        while (pid in server.WORKERS or len(server.WORKERS) < server.num_workers) and time.time() < deadline:
+            time.sleep(0.5)
+
+
+def watch_models_in_master(server):
+    """
+    Follows `model_registry.py promote` in the gunicorn master (preload_app): the master
+    loads the promoted version once and then rolls the workers, so every worker, including
+    those recycled by max_requests later, forks from the same copy of the new models.
+    """
+    import gc
+    from classifier_service import start_model_watcher
+
+    def rolled(version):
+        # keep the new models out of the workers' collections too (see wsgi.py)
+        gc.collect()
+        gc.freeze()
+        server.log.info(f"Model version {version} loaded in the master, restarting workers")
+        _roll_workers(server)
+
+    return start_model_watcher(on_switch=rolled)
@@ -0,0 +1,399 @@
+import os
+import json
+import math
+import heapq
+import threading
+from datetime import datetime, timedelta
+
+from call_events import replay
+
+HOTSPOT_WINDOW_MINUTES = float(os.getenv('HOTSPOT_WINDOW_MINUTES', 30))
+HOTSPOT_EPS_KM = float(os.getenv('HOTSPOT_EPS_KM', 0.5))
+HOTSPOT_EPS_MINUTES = float(os.getenv('HOTSPOT_EPS_MINUTES', 15))
+HOTSPOT_MIN_CALLS = int(os.getenv('HOTSPOT_MIN_CALLS', 4))
+# hard cap on calls held, the oldest go first past it
+HOTSPOT_MAX_CALLS = int(os.getenv('HOTSPOT_MAX_CALLS', 50000))
+
+KM_PER_DEGREE = 111.32
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    # equirectangular, well within a metre of haversine at hotspot distances
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return 6371.0 * math.hypot(x, y)
+
+
+def _timestamp(value):
+    #naive local datetime out of an event's timestamp, None when missing or malformed
+    if isinstance(value, datetime):
+        stamp = value
+    else:
+        try:
+            stamp = datetime.fromisoformat(str(value))
+        except (TypeError, ValueError):
+            return None
+    if stamp.tzinfo is not None:
+        stamp = stamp.astimezone().replace(tzinfo=None)
+    return stamp
+
+
+class LiveCall:
+
+    __slots__ = ('id', 'lat', 'lon', 'timestamp', 'cell', 'emergency_type', 'district', 'priority_flag',
+                 'neighbors', 'label')
+
+    def __init__(self, call_id, lat, lon, timestamp, cell, call):
+        self.id = call_id
+        self.lat = lat
+        self.lon = lon
+        self.timestamp = timestamp
+        self.cell = cell
+        self.emergency_type = call.get('emergency_type') or 'Unknown'
+        self.district = call.get('district')
+        self.priority_flag = int(bool(call.get('priority_flag')))
+        self.neighbors = set()  # ids within eps km and eps minutes
+        self.label = None  # hotspot id, None for noise
+
+
+class LiveHotspotDetector:
+    """
+    ST-DBSCAN over a sliding window of enriched calls: two calls are neighbours when they
+    are within eps_km and eps_minutes of each other, a call with at least min_calls - 1
+    neighbours is a core call, and hotspots are the core calls connected through each
+    other plus the calls next to them.
+
+    Calls sit in a grid of eps_km cells, so an arrival only compares against the calls in
+    the surrounding cells. An arrival only ever grows or merges hotspots, which is done in
+    place (the largest keeps its id). An expiry re-reads the hotspots it touched only when
+    they may have split, and then the largest part keeps the id.
+    """
+
+    def __init__(self, window_minutes=HOTSPOT_WINDOW_MINUTES, eps_km=HOTSPOT_EPS_KM,
+                 eps_minutes=HOTSPOT_EPS_MINUTES, min_calls=HOTSPOT_MIN_CALLS, max_calls=HOTSPOT_MAX_CALLS):
+        self.window = timedelta(minutes=window_minutes)
+        self.eps_km = eps_km
+        self.eps_time = timedelta(minutes=eps_minutes)
+        self.min_calls = min_calls
+        self.max_calls = max_calls
+        self.cell_deg = eps_km / KM_PER_DEGREE
+        self.calls = {}  # id -> LiveCall
+        self.grid = {}  # (row, col) -> set of ids
+        self.expiry = []  # heap of (timestamp, id)
+        self.hotspots = {}  # label -> set of ids
+        self.next_label = 1
+        self.version = 0  # bumped by every arrival or expiry, keys the described hotspots
+        self._described = (None, [])
+        self.stats = {'added': 0, 'expired': 0, 'skipped': 0, 'merges': 0, 'relabels': 0}
+        self._lock = threading.Lock()
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def _nearby(self, call):
+        # cells are eps_km tall but narrower than eps_km east-west away from the equator
+        row, col = call.cell
+        span = math.ceil(1 / max(math.cos(math.radians(call.lat)), 0.01))
+        for r in range(row - 1, row + 2):
+            for c in range(col - span, col + span + 1):
+                for other_id in self.grid.get((r, c), ()):
+                    other = self.calls[other_id]
+                    if (abs(other.timestamp - call.timestamp) <= self.eps_time
+                            and distance_km(call.lat, call.lon, other.lat, other.lon) <= self.eps_km):
+                        yield other
+
+    def _is_core(self, call):
+        return len(call.neighbors) + 1 >= self.min_calls
+
+    def add_calls(self, events, now=None):
+        #Enriched call events (call_events.call_event); returns how many were added
+        now = now or datetime.now()
+        added = 0
+        with self._lock:
+            self._expire(now)
+            for event in events:
+                call = self._make(event, now)
+                if call is None:
+                    self.stats['skipped'] += 1
+                    continue
+                self.calls[call.id] = call
+                self.grid.setdefault(call.cell, set()).add(call.id)
+                heapq.heappush(self.expiry, (call.timestamp, call.id))
+                for other in self._nearby(call):
+                    if other.id != call.id:
+                        call.neighbors.add(other.id)
+                        other.neighbors.add(call.id)
+                # an arrival only adds neighbours, so hotspots can grow and merge but not split
+                crossed = [self.calls[o] for o in call.neighbors
+                           if len(self.calls[o].neighbors) + 1 == self.min_calls]
+                for core in ([call] if self._is_core(call) else []) + crossed:
+                    self._merge(core)
+                if not self._is_core(call):
+                    self._attach(call)
+                added += 1
+            self.stats['added'] += added
+            self.version += added
+            if len(self.calls) > self.max_calls:
+                self._remove([heapq.heappop(self.expiry)[1] for _ in range(len(self.calls) - self.max_calls)])
+        return added
+
+    def _make(self, event, now):
+        try:
+            call_id = int(event['id'])
+            lat, lon = float(event['latitude']), float(event['longitude'])
+        except (KeyError, TypeError, ValueError):
+            return None
+        stamp = _timestamp(event.get('timestamp'))
+        if stamp is None or call_id in self.calls:
+            return None
+        # clock skew: a call stamped ahead of this process counts as arriving now
+        stamp = min(stamp, now)
+        if stamp < now - self.window:
+            return None
+        return LiveCall(call_id, lat, lon, stamp, self._cell(lat, lon), event)
+
+    def _expire(self, now):
+        cutoff = now - self.window
+        expired = []
+        while self.expiry and self.expiry[0][0] < cutoff:
+            expired.append(heapq.heappop(self.expiry)[1])
+        self._remove(expired)
+
+    def _remove(self, call_ids):
+        #drops calls together, so a run of expiries re-reads a hotspot at most once
+        removed = [self.calls[i] for i in set(call_ids) if i in self.calls]
+        # only paths through core calls hold a hotspot together
+        through = {n for call in removed if self._is_core(call) for n in call.neighbors}
+        core_before = {}
+        for call in removed:
+            del self.calls[call.id]
+            for other_id in call.neighbors:
+                other = self.calls.get(other_id)
+                if other is not None:
+                    core_before.setdefault(other_id, self._is_core(other))
+                    other.neighbors.discard(call.id)
+            cell = self.grid[call.cell]
+            cell.discard(call.id)
+            if not cell:
+                del self.grid[call.cell]
+            self._set_label(call, None)
+        self.stats['expired'] += len(removed)
+        self.version += len(removed)
+
+        lost = [i for i, core in core_before.items()
+                if core and i in self.calls and not self._is_core(self.calls[i])]
+        touched = {i for i in through if i in self.calls}
+        for i in lost:
+            touched |= self.calls[i].neighbors | {i}
+        if not touched:
+            return
+        # the cores next to the calls that left or stopped being core; while they still
+        # reach each other directly, every path through those calls has a way around
+        around = {i for i in touched if self._is_core(self.calls[i])}
+        if not self._connected(around):
+            self._relabel(touched)
+            return
+        for i in touched - around:
+            self._attach(self.calls[i])
+
+    def _connected(self, ids):
+        if not ids:
+            return True
+        start = next(iter(ids))
+        seen, stack = {start}, [start]
+        while stack:
+            for other_id in self.calls[stack.pop()].neighbors & ids:
+                if other_id not in seen:
+                    seen.add(other_id)
+                    stack.append(other_id)
+        return len(seen) == len(ids)
+
+    def _set_label(self, call, label):
+        if call.label == label:
+            return
+        if call.label is not None:
+            members = self.hotspots[call.label]
+            members.discard(call.id)
+            if not members:
+                del self.hotspots[call.label]
+        call.label = label
+        if label is not None:
+            self.hotspots.setdefault(label, set()).add(call.id)
+
+    def _attach(self, call):
+        #non-core call: stays in (or joins) a hotspot next to it, noise without one
+        labels = [self.calls[o].label for o in call.neighbors if self._is_core(self.calls[o])]
+        self._set_label(call, call.label if call.label in labels else (labels[0] if labels else None))
+
+    def _merge(self, core):
+        #a new core call joins the hotspots of its core neighbours, into the largest of them
+        labels = {self.calls[o].label for o in core.neighbors if self._is_core(self.calls[o])} - {None}
+        if labels:
+            target = max(labels, key=lambda l: (len(self.hotspots[l]), -l))
+            for label in labels - {target}:
+                for i in self.hotspots.pop(label):
+                    self.calls[i].label = target
+                    self.hotspots[target].add(i)
+                self.stats['merges'] += 1
+        else:
+            target = self.next_label
+            self.next_label += 1
+        self._set_label(core, target)
+        for other_id in core.neighbors:
+            other = self.calls[other_id]
+            if other.label is None and not self._is_core(other):
+                self._set_label(other, target)
+
+    def _relabel(self, seeds):
+        """
+        Recomputes the hotspots of the calls in seeds (the neighbours of a call that left
+        when a hotspot may have split): their hotspots and their neighbours' are dissolved
+        and rebuilt from the core calls among them, everything else stays as it is.
+        """
+        affected = {i for i in seeds if i in self.calls}
+        # the neighbours' hotspots too, so a border call can move to one that still holds it
+        old_labels = {self.calls[n].label for i in affected for n in self.calls[i].neighbors | {i}} - {None}
+        for label in old_labels:
+            affected |= self.hotspots.pop(label)
+        if not affected:
+            return
+        previous = {i: self.calls[i].label for i in affected}
+        for i in affected:
+            self.calls[i].label = None
+
+        components, visited = [], set()
+        for start in affected:
+            call = self.calls[start]
+            if start in visited or not self._is_core(call):
+                continue
+            members, stack = set(), [start]
+            visited.add(start)
+            while stack:
+                current = self.calls[stack.pop()]
+                members.add(current.id)
+                for other_id in current.neighbors:
+                    other = self.calls[other_id]
+                    if other_id in visited:
+                        continue
+                    if self._is_core(other):
+                        visited.add(other_id)
+                        stack.append(other_id)
+                    elif other.label is None:
+                        # border call, unless it already belongs to an untouched hotspot
+                        visited.add(other_id)
+                        members.add(other_id)
+            components.append(members)
+
+        claimed = set()
+        for members in sorted(components, key=len, reverse=True):
+            counts = {}
+            for i in members:
+                label = previous.get(i)
+                if label is not None and label not in claimed:
+                    counts[label] = counts.get(label, 0) + 1
+            if counts:
+                label = max(counts, key=lambda l: (counts[l], -l))
+            else:
+                label = self.next_label
+                self.next_label += 1
+            claimed.add(label)
+            for i in members:
+                self.calls[i].label = label
+            self.hotspots[label] = members
+
+        # calls left over may still be next to a core call of an untouched hotspot
+        for i in affected - visited:
+            call = self.calls[i]
+            label = next((self.calls[o].label for o in call.neighbors if self._is_core(self.calls[o])), None)
+            if label is not None:
+                call.label = label
+                self.hotspots[label].add(i)
+        self.stats['relabels'] += 1
+
+    def snapshot(self, types=None, districts=None, min_calls=None, now=None):
+        #Current hotspots, largest first; types/districts keep those whose primary type/district match
+        types = {t.lower() for t in types or []}
+        districts = {d.lower() for d in districts or []}
+        now = now or datetime.now()
+        with self._lock:
+            self._expire(now)
+            if self._described[0] != self.version:
+                described = [self._describe(label, members) for label, members in self.hotspots.items()]
+                described.sort(key=lambda h: (h['call_count'], h['last_call']), reverse=True)
+                self._described = (self.version, described)
+            hotspots = self._described[1]
+            calls_in_window = len(self.calls)
+
+        if types:
+            hotspots = [h for h in hotspots if h['primary_type'].lower() in types]
+        if districts:
+            hotspots = [h for h in hotspots if (h['primary_district'] or '').lower() in districts]
+        if min_calls:
+            hotspots = [h for h in hotspots if h['call_count'] >= min_calls]
+        return {
+            'as_of': now.isoformat(timespec='seconds'),
+            'window_minutes': self.window.total_seconds() / 60,
+            'eps_km': self.eps_km,
+            'eps_minutes': self.eps_time.total_seconds() / 60,
+            'min_calls': self.min_calls,
+            'calls_in_window': calls_in_window,
+            'hotspots': hotspots,
+        }
+
+    def _describe(self, label, members):
+        calls = [self.calls[i] for i in members]
+        lat = sum(c.lat for c in calls) / len(calls)
+        lon = sum(c.lon for c in calls) / len(calls)
+        type_counts, district_counts = {}, {}
+        for c in calls:
+            type_counts[c.emergency_type] = type_counts.get(c.emergency_type, 0) + 1
+            if c.district:
+                district_counts[c.district] = district_counts.get(c.district, 0) + 1
+        primary_type = max(type_counts, key=type_counts.get)
+        return {
+            'hotspot_id': label,
+            'call_count': len(calls),
+            'core_calls': sum(1 for c in calls if self._is_core(c)),
+            'priority_calls': sum(c.priority_flag for c in calls),
+            'primary_type': primary_type,
+            'primary_type_pct': round(type_counts[primary_type] / len(calls) * 100, 1),
+            'types': type_counts,
+            'primary_district': max(district_counts, key=district_counts.get) if district_counts else None,
+            'center': {'lat': round(lat, 6), 'lon': round(lon, 6)},
+            'radius_km': round(max(distance_km(lat, lon, c.lat, c.lon) for c in calls), 3),
+            'first_call': min(c.timestamp for c in calls).isoformat(timespec='seconds'),
+            'last_call': max(c.timestamp for c in calls).isoformat(timespec='seconds'),
+            'call_ids': sorted(members),
+        }
+
+    def summary(self):
+        with self._lock:
+            return {**self.stats, 'calls': len(self.calls), 'hotspots': len(self.hotspots), 'cells': len(self.grid)}
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_detector(conn, broadcaster):
+    """
+    Process-wide detector fed by the call events broadcaster (services/event_broadcaster.py).
+    On first use it registers with the broadcaster, then loads the window's calls from the
+    call events stream (the last CALL_EVENTS_MAXLEN calls); calls seen twice count once.
+    """
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            detector = LiveHotspotDetector()
+            broadcaster.add_listener(detector.add_calls)
+            broadcaster.start()
+            since = datetime.now() - detector.window
+            backlog = replay(conn, f"{int(since.timestamp() * 1000)}-0")
+            detector.add_calls([json.loads(payload) for _, payload in backlog])
+            _detector = detector
+    return _detector
+
+
+def current_detector():
+    #the process's detector, None until /clusters/live first asks for it
+    return _detector
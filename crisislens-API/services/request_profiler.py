@@ -0,0 +1,310 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import contextvars
+from datetime import datetime
+
+classifier_path = os.path.join(os.path.dirname(__file__), '..', '..', 'Classifier', 'production')
+if os.path.exists(classifier_path):
+    sys.path.append(classifier_path)
+else:
+    sys.path.append('/app/Classifier/production')
+
+from stage_metrics import METRICS_ENABLED, observe, flush_if_due, get_redis
+
+# Per request: wall time, DB time (execute + fetch + commit), query count, rows fetched and
+# JSON serialization time, sent back as a Server-Timing header, logged as one JSON line and
+# recorded per route in the 'http' stage histograms. Queries slower than SLOW_QUERY_MS are
+# kept (the slowest SLOW_QUERY_KEEP, shared in Redis) with their EXPLAIN plan.
+REQUEST_PROFILING = os.getenv('REQUEST_PROFILING', '1') == '1'
+REQUEST_LOG = os.getenv('REQUEST_LOG', '1') == '1'
+REQUEST_LOG_MIN_MS = float(os.getenv('REQUEST_LOG_MIN_MS', 0))
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+SLOW_QUERY_KEEP = int(os.getenv('SLOW_QUERY_KEEP', 50))
+SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', '1') == '1'
+# parameters hold caller names and numbers, so the log keeps them only when enabled, and
+# never for statements that write rows
+SLOW_QUERY_PARAMS = os.getenv('SLOW_QUERY_PARAMS', '0') == '1'
+SLOW_QUERIES_KEY = 'crisislens:slow_queries'
+
+# at most this many queries per request are kept for the slow-query check
+MAX_TRACKED_QUERIES = 1000
+MAX_SQL_CHARS = 4000
+MAX_PARAM_CHARS = 200
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+
+    __slots__ = ('start', 'db_seconds', 'queries', 'rows', 'serialize_seconds', 'tracked')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.rows = 0
+        self.serialize_seconds = 0.0
+        self.tracked = []  # [sql, params, seconds, rows] per query
+
+    def query(self, operation, params):
+        self.queries += 1
+        if len(self.tracked) >= MAX_TRACKED_QUERIES:
+            return None
+        entry = [operation, params, 0.0, 0]
+        self.tracked.append(entry)
+        return entry
+
+
+class TimedCursor:
+    """
+    Cursor proxy that charges execute and fetch time to the current request. Fetch time
+    counts towards the query that produced the rows (unbuffered cursors read on fetch).
+    """
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+        self._last = None
+
+    def _charge(self, started, rows=0):
+        elapsed = time.perf_counter() - started
+        self._stats.db_seconds += elapsed
+        self._stats.rows += rows
+        if self._last is not None:
+            self._last[2] += elapsed
+            self._last[3] += rows
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._last = self._stats.query(operation, params)
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            self._charge(started)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        seq_params = list(seq_params)
+        self._last = self._stats.query(operation, seq_params[:1])
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            self._charge(started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._charge(started, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._charge(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._charge(started, len(rows))
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._cursor.__exit__(exc_type, exc, tb)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TimedConnection:
+
+    def __init__(self, conn, stats):
+        self._conn = conn
+        self._stats = stats
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._conn.cursor(*args, **kwargs), self._stats)
+
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            return self._conn.commit()
+        finally:
+            self._stats.db_seconds += time.perf_counter() - started
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def instrument_connection(conn):
+    #Wraps conn while a profiled request is running, otherwise (workers, CLIs) returns it as is
+    stats = _current.get()
+    if stats is None:
+        return conn
+    return TimedConnection(conn, stats)
+
+
+def _jsonable(value):
+    if isinstance(value, str):
+        return value[:MAX_PARAM_CHARS] + '...' if len(value) > MAX_PARAM_CHARS else value
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value[:50]]
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in list(value.items())[:50]}
+    if value is None or isinstance(value, (int, float, bool)):
+        return value
+    return _jsonable(str(value))
+
+
+def _explain(sql, params):
+    #EXPLAIN on a separate, uninstrumented connection; None for statements that aren't reads
+    if not SLOW_QUERY_EXPLAIN or not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    import mysql.connector
+    from db_config import DB_CONFIG
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"EXPLAIN {sql}", params)
+        return [{k: _jsonable(v) for k, v in row.items()} for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'REPLACE', 'DELETE')
+
+
+def _logged_params(sql, params):
+    if not SLOW_QUERY_PARAMS or sql.lstrip().upper().startswith(WRITE_STATEMENTS):
+        return None if params is None else '[redacted]'
+    return _jsonable(params)
+
+
+def record_slow_queries(stats, route, method):
+    slow = [q for q in stats.tracked if q[2] * 1000 >= SLOW_QUERY_MS]
+    if not slow:
+        return
+    conn = get_redis()
+    pipe = conn.pipeline(transaction=False)
+    for sql, params, seconds, rows in sorted(slow, key=lambda q: -q[2])[:SLOW_QUERY_KEEP]:
+        try:
+            plan = _explain(sql, params)
+        except Exception as e:
+            plan = {'error': str(e)}
+        entry = {
+            'sql': ' '.join(sql.split())[:MAX_SQL_CHARS],
+            'params': _logged_params(sql, params),
+            'ms': round(seconds * 1000, 3),
+            'rows': rows,
+            'route': route,
+            'method': method,
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'explain': plan,
+        }
+        entry['id'] = hashlib.sha1(json.dumps(entry, sort_keys=True).encode()).hexdigest()[:12]
+        pipe.zadd(SLOW_QUERIES_KEY, {json.dumps(entry): seconds})
+    # keep only the slowest SLOW_QUERY_KEEP
+    pipe.zremrangebyrank(SLOW_QUERIES_KEY, 0, -(SLOW_QUERY_KEEP + 1))
+    pipe.execute()
+
+
+def slow_queries(limit=SLOW_QUERY_KEEP):
+    entries = get_redis().zrevrange(SLOW_QUERIES_KEY, 0, limit - 1)
+    return [json.loads(entry) for entry in entries]
+
+
+def reset_slow_queries():
+    get_redis().delete(SLOW_QUERIES_KEY)
+
+
+def _server_timing(stats, total):
+    app_seconds = max(0.0, total - stats.db_seconds - stats.serialize_seconds)
+    return ', '.join([
+        f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries, {stats.rows} rows"',
+        f'serialize;dur={stats.serialize_seconds * 1000:.2f}',
+        f'app;dur={app_seconds * 1000:.2f}',
+        f'total;dur={total * 1000:.2f}',
+    ])
+
+
+def init_app(app):
+    #Installs the profiling hooks and the timed JSON provider on a Flask app
+    if not REQUEST_PROFILING:
+        return
+    from flask import g, request
+    from flask.json.provider import DefaultJSONProvider
+    import db_config
+
+    db_config.wrap_connections(instrument_connection)
+
+    class TimedJSONProvider(DefaultJSONProvider):
+        def dumps(self, obj, **kwargs):
+            stats = _current.get()
+            if stats is None:
+                return super().dumps(obj, **kwargs)
+            started = time.perf_counter()
+            try:
+                return super().dumps(obj, **kwargs)
+            finally:
+                stats.serialize_seconds += time.perf_counter() - started
+
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def _start_profile():
+        g._request_stats_token = _current.set(RequestStats())
+
+    @app.after_request
+    def _finish_profile(response):
+        stats = _current.get()
+        if stats is None:
+            return response
+        total = time.perf_counter() - stats.start
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        method = request.method
+
+        response.headers['Server-Timing'] = _server_timing(stats, total)
+
+        if METRICS_ENABLED:
+            observe('http', total, route=route, method=method, stage='total')
+            observe('http', stats.db_seconds, route=route, method=method, stage='db')
+            observe('http', stats.serialize_seconds, route=route, method=method, stage='serialize')
+            flush_if_due()
+
+        if REQUEST_LOG and total * 1000 >= REQUEST_LOG_MIN_MS:
+            print(json.dumps({
+                'event': 'request',
+                'method': method,
+                'route': route,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 2),
+                'db_ms': round(stats.db_seconds * 1000, 2),
+                'queries': stats.queries,
+                'rows': stats.rows,
+                'serialize_ms': round(stats.serialize_seconds * 1000, 2),
+            }))
+
+        if any(q[2] * 1000 >= SLOW_QUERY_MS for q in stats.tracked):
+            # EXPLAIN and the Redis write happen after the response has been sent
+            def _record():
+                try:
+                    record_slow_queries(stats, route, method)
+                except Exception as e:
+                    print(f" Could not record slow queries: {e}")
+            response.call_on_close(_record)
+        return response
+
+    @app.teardown_request
+    def _end_profile(exc):
+        if g.pop('_request_stats_token', None) is not None:
+            _current.set(None)
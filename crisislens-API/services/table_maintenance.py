@@ -0,0 +1,218 @@
+"""
+Monthly partitions and raw_calls archival (database/10_partition_by_month.sql).
+
+    python -m services.table_maintenance partitions [--from 2015-12] [--ahead 3]
+    python -m services.table_maintenance archive [--older-than-days 90] [--dry-run]
+    python -m services.table_maintenance maintain      (both, run nightly by forecast-scheduler)
+    python -m services.table_maintenance status
+
+partitions splits the catch-all pmax partition of each table into one partition per month,
+up to --ahead months past the current one, so date-bounded scans of these two tables
+(/temporal on emergency_data, the archival below) only open their months. The dashboard
+routes read calls_unified, which is not partitioned (see database/10).
+archive moves processed raw_calls older than the cutoff to zstd Parquet under ARCHIVE_DIR
+(raw_calls/year=YYYY/month=M/), deletes them, and folds the archived months into one pold
+partition so raw_calls keeps a bounded number of partitions.
+"""
+import os
+import time
+import argparse
+from datetime import date, datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', os.path.join(BASE_DIR, 'archive'))
+
+PARTITIONED_TABLES = ['emergency_data', 'raw_calls']
+PARTITIONS_AHEAD = int(os.getenv('PARTITIONS_AHEAD', 3))
+RAW_CALLS_RETENTION_DAYS = int(os.getenv('RAW_CALLS_RETENTION_DAYS', 90))
+ARCHIVE_BATCH = 50000
+
+
+def _month(day):
+    return date(day.year, day.month, 1)
+
+
+def _next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+
+def list_partitions(cursor, table):
+    #[(name, upper bound date or None for MAXVALUE, rows estimate)] in order, [] when not partitioned
+    cursor.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    partitions = []
+    for name, description, rows in cursor.fetchall():
+        bound = None if description == 'MAXVALUE' else datetime.strptime(description.strip("'")[:10], '%Y-%m-%d').date()
+        partitions.append((name, bound, rows))
+    return partitions
+
+
+def ensure_partitions(conn, table, start=None, ahead=PARTITIONS_AHEAD):
+    """
+    Splits pmax into monthly partitions from the month after the last existing bound (or
+    `start`, or the oldest row's month) through the current month + ahead. Returns the
+    names of the partitions added.
+    """
+    cursor = conn.cursor()
+    partitions = list_partitions(cursor, table)
+    if not partitions or partitions[-1][1] is not None:
+        print(f" {table} has no pmax partition, run database/10_partition_by_month.sql first")
+        return []
+
+    bounds = [bound for _, bound, _ in partitions if bound is not None]
+    if bounds:
+        first = bounds[-1]  # next partition covers [last bound, +1 month)
+    else:
+        if start is None:
+            cursor.execute(f"SELECT MIN(timestamp) FROM {table}")
+            oldest = cursor.fetchone()[0]
+            start = oldest.date() if oldest else date.today()
+        first = _month(start)
+
+    last = _month(date.today())
+    for _ in range(ahead):
+        last = _next_month(last)
+
+    new = []
+    month = first
+    while month <= last:
+        new.append(month)
+        month = _next_month(month)
+    if not new:
+        return []
+
+    definitions = ', '.join(f"PARTITION {partition_name(m)} VALUES LESS THAN ('{_next_month(m):%Y-%m-%d}')" for m in new)
+    started = time.time()
+    cursor.execute(f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO "
+                   f"({definitions}, PARTITION pmax VALUES LESS THAN (MAXVALUE))")
+    names = [partition_name(m) for m in new]
+    print(f" {table}: added {names[0]}..{names[-1]} ({len(names)} partitions, {time.time() - started:.1f}s)")
+    return names
+
+
+def _write_parquet(rows, columns, basename):
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    df = pd.DataFrame(rows, columns=columns)
+    df['year'] = df['timestamp'].dt.year.astype('int16')
+    df['month'] = df['timestamp'].dt.month.astype('int8')
+    ds.write_dataset(
+        pa.Table.from_pandas(df, preserve_index=False),
+        os.path.join(ARCHIVE_DIR, 'raw_calls'),
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema([('year', pa.int16()), ('month', pa.int8())]), flavor='hive'),
+        # named after the id range, so a batch archived again after a crash overwrites its own files
+        basename_template=basename + '-{i}.parquet',
+        existing_data_behavior='overwrite_or_ignore',
+        file_options=ds.ParquetFileFormat().make_write_options(compression='zstd')
+    )
+
+
+def archive_raw_calls(conn, older_than_days=RAW_CALLS_RETENTION_DAYS, batch=ARCHIVE_BATCH, dry_run=False):
+    """
+    Archives processed raw_calls with a timestamp before the cutoff in batches of `batch`:
+    each batch is written to Parquet first and deleted after, so a failure leaves the rows
+    in MySQL. Unprocessed calls are kept whatever their age. Returns the rows archived.
+    """
+    cutoff = datetime.combine(date.today() - timedelta(days=older_than_days), datetime.min.time())
+    cursor = conn.cursor()
+    started = time.time()
+    archived, last_id = 0, 0
+    while True:
+        cursor.execute("SELECT * FROM raw_calls WHERE processed = 1 AND timestamp < %s AND id > %s "
+                       "ORDER BY id LIMIT %s", (cutoff, last_id, batch))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        columns = [c[0] for c in cursor.description]
+        ids = [row[columns.index('id')] for row in rows]
+        last_id = ids[-1]
+        if dry_run:
+            archived += len(rows)
+            continue
+
+        _write_parquet(rows, columns, f"raw_calls-{ids[0]}-{ids[-1]}")
+        # exactly the archived ids: calls processed since the SELECT wait for the next run
+        for start in range(0, len(ids), 5000):
+            chunk = ids[start:start + 5000]
+            cursor.execute(f"DELETE FROM raw_calls WHERE id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+        conn.commit()
+        archived += len(rows)
+        print(f" raw_calls: archived {archived:,} rows up to id {last_id} ({time.time() - started:.0f}s)")
+
+    verb = 'would archive' if dry_run else 'archived'
+    print(f"raw_calls: {verb} {archived:,} processed calls before {cutoff:%Y-%m-%d} to {ARCHIVE_DIR}")
+    if not dry_run:
+        merge_old_partitions(conn, 'raw_calls', _month(cutoff.date()))
+    return archived
+
+
+def merge_old_partitions(conn, table, before):
+    """
+    Folds the leading partitions that end on or before `before` into one pold partition.
+    What is left in them (unprocessed calls, late inserts with old timestamps) moves along,
+    unlike DROP PARTITION, which would delete it.
+    """
+    cursor = conn.cursor()
+    old = [(name, bound) for name, bound, _ in list_partitions(cursor, table) if bound is not None and bound <= before]
+    if len(old) < 2:
+        return []
+    names = [name for name, _ in old]
+    cursor.execute(f"ALTER TABLE {table} REORGANIZE PARTITION {', '.join(names)} INTO "
+                   f"(PARTITION pold VALUES LESS THAN ('{old[-1][1]:%Y-%m-%d}'))")
+    print(f" {table}: merged {', '.join(names)} into pold")
+    return names
+
+
+def status(conn):
+    cursor = conn.cursor()
+    for table in PARTITIONED_TABLES:
+        partitions = list_partitions(cursor, table)
+        if not partitions:
+            print(f"{table}: not partitioned")
+            continue
+        print(f"{table}: {len(partitions)} partitions")
+        for name, bound, rows in partitions:
+            print(f"  {name:<10} < {bound or 'MAXVALUE'!s:<10} ~{rows or 0:,} rows")
+
+
+if __name__ == '__main__':
+    from db_config import get_connection
+
+    parser = argparse.ArgumentParser(description="Partition and archive maintenance for emergency_data and raw_calls")
+    sub = parser.add_subparsers(dest='command', required=True)
+    part = sub.add_parser('partitions', help="Add monthly partitions up to --ahead months from now")
+    part.add_argument("--tables", nargs="+", choices=PARTITIONED_TABLES, default=PARTITIONED_TABLES)
+    part.add_argument("--from", dest="start", type=lambda s: datetime.strptime(s, '%Y-%m').date(),
+                      help="First month YYYY-MM for a table that only has pmax (default: its oldest row)")
+    part.add_argument("--ahead", type=int, default=PARTITIONS_AHEAD)
+    arch = sub.add_parser('archive', help="Move old processed raw_calls to Parquet")
+    arch.add_argument("--older-than-days", type=int, default=RAW_CALLS_RETENTION_DAYS)
+    arch.add_argument("--batch", type=int, default=ARCHIVE_BATCH)
+    arch.add_argument("--dry-run", action="store_true", help="Only count the calls that would be archived")
+    sub.add_parser('maintain', help="partitions + archive with the defaults")
+    sub.add_parser('status', help="Partitions and their estimated rows")
+    args = parser.parse_args()
+
+    with get_connection() as conn:
+        if args.command == 'partitions':
+            for table in args.tables:
+                ensure_partitions(conn, table, args.start, args.ahead)
+        elif args.command == 'archive':
+            archive_raw_calls(conn, args.older_than_days, args.batch, args.dry_run)
+        elif args.command == 'maintain':
+            for table in PARTITIONED_TABLES:
+                ensure_partitions(conn, table)
+            archive_raw_calls(conn)
+        else:
+            status(conn)
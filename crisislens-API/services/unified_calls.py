@@ -0,0 +1,136 @@
+"""
+calls_unified (database/09_calls_unified.sql): historical, live and uploaded calls in one
+indexed table, so /calls, /clusters, the heatmap and the stats read a single table instead
+of unioning emergency_data and enriched_calls per request.
+
+Writers copy their rows over in the same transaction as their own insert:
+    enrichment (Classifier/production/tasks.py)  -> sync_calls(cursor, 'live', ...)
+    uploads (routes/data_upload.py)              -> sync_calls(cursor, 'uploaded', ...)
+Historical data is bulk loaded, and existing rows are copied by the backfill job:
+    python -m services.unified_calls backfill [--sources historical live uploaded] [--rebuild]
+    python -m services.unified_calls status
+09 seeds the table when the database is created, and the backend container runs the
+backfill before gunicorn on every start (docker-compose.yml), which only copies rows past
+the highest id already there.
+"""
+import time
+import argparse
+
+UNIFIED_TABLE = 'calls_unified'
+
+UNIFIED_COLUMNS = ['data_source', 'source_id', 'timestamp', 'emergency_type', 'emergency_subtype', 'emergency_title',
+                   'district', 'latitude', 'longitude', 'description', 'zipcode', 'address', 'priority_flag',
+                   'caller_gender', 'caller_age', 'age_group', 'source']
+
+# data_source -> (source table, its columns in UNIFIED_COLUMNS order)
+SOURCES = {
+    'historical': ('emergency_data', "'historical', id, timestamp, emergency_type, emergency_subtype, emergency_title, "
+                                     "township, latitude, longitude, description, zipcode, address, COALESCE(priority_flag, 0), "
+                                     "caller_gender, caller_age, age_group, source"),
+    'live': ('enriched_calls', "'live', id, timestamp, emergency_type, emergency_subtype, NULL, "
+                               "district, latitude, longitude, description, zipcode, address, COALESCE(priority_flag, 0), "
+                               "caller_gender, caller_age, age_group, source"),
+    'uploaded': ('uploaded_data', "'uploaded', id, timestamp, emergency_type, emergency_subtype, NULL, "
+                                  "district, latitude, longitude, description, zipcode, NULL, 0, "
+                                  "caller_gender, caller_age, NULL, source"),
+}
+DATA_SOURCES = list(SOURCES)
+
+# what the call list endpoints return; id stays the row's id in its source table
+CALL_COLUMNS = """source_id AS id, timestamp, emergency_type, emergency_subtype, district,
+    latitude, longitude, description, emergency_title, zipcode, address, priority_flag,
+    caller_gender, caller_age, source, data_source"""
+
+BACKFILL_BATCH = 50000
+
+
+def sync_calls(cursor, data_source, where, params=()):
+    """
+    Copies the source rows matching `where` into calls_unified (updating rows already
+    there), on the caller's cursor so it commits with the caller's own insert.
+    Returns the affected row count as MySQL reports it (2 per updated row).
+    """
+    table, select = SOURCES[data_source]
+    columns = ', '.join(UNIFIED_COLUMNS)
+    updates = ', '.join(f"{col} = VALUES({col})" for col in UNIFIED_COLUMNS[2:])
+    cursor.execute(f"INSERT INTO {UNIFIED_TABLE} ({columns}) SELECT {select} FROM {table} WHERE {where} "
+                   f"ON DUPLICATE KEY UPDATE {updates}", tuple(params))
+    return cursor.rowcount
+
+
+def _table_exists(cursor, table):
+    return _scalar(cursor, "SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() "
+                           "AND TABLE_NAME = %s", (table,)) > 0
+
+
+def _scalar(cursor, query, params=()):
+    cursor.execute(query, params)
+    row = cursor.fetchone()
+    value = row[0] if isinstance(row, (tuple, list)) else next(iter(row.values()))
+    return value or 0
+
+
+def backfill(conn, sources=None, batch=BACKFILL_BATCH, rebuild=False):
+    """
+    Copies each source table into calls_unified in id ranges of `batch`, committing per
+    range. Without rebuild it resumes after the highest id already copied, so it can run
+    again after a bulk load; rebuild first removes that source's rows and copies all.
+    """
+    cursor = conn.cursor()
+    for data_source in sources or DATA_SOURCES:
+        table = SOURCES[data_source][0]
+        if not _table_exists(cursor, table):
+            print(f"{data_source}: no {table} table, skipped")
+            continue
+        started = time.time()
+        if rebuild:
+            while True:
+                cursor.execute(f"DELETE FROM {UNIFIED_TABLE} WHERE data_source = %s LIMIT %s", (data_source, batch))
+                conn.commit()
+                if cursor.rowcount < batch:
+                    break
+            last = 0
+        else:
+            last = _scalar(cursor, f"SELECT MAX(source_id) FROM {UNIFIED_TABLE} WHERE data_source = %s",
+                           (data_source,))
+        high = _scalar(cursor, f"SELECT MAX(id) FROM {table}")
+
+        for low in range(last, high, batch):
+            sync_calls(cursor, data_source, "id > %s AND id <= %s", (low, low + batch))
+            conn.commit()
+            print(f" {data_source}: ids up to {min(low + batch, high):,} of {high:,} ({time.time() - started:.0f}s)")
+        print(f"{data_source}: {table} copied from id {last + 1:,} in {time.time() - started:.0f}s")
+
+
+def status(conn):
+    #(data_source, rows in the source table, rows in calls_unified)
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT data_source, COUNT(*) FROM {UNIFIED_TABLE} GROUP BY data_source")
+    unified = {row[0]: row[1] for row in cursor.fetchall()}
+    rows = []
+    for data_source, (table, _) in SOURCES.items():
+        if not _table_exists(cursor, table):
+            continue
+        rows.append((data_source, _scalar(cursor, f"SELECT COUNT(*) FROM {table}"), unified.get(data_source, 0)))
+    return rows
+
+
+if __name__ == '__main__':
+    from db_config import get_connection
+
+    parser = argparse.ArgumentParser(description="Maintain the calls_unified table")
+    sub = parser.add_subparsers(dest='command', required=True)
+    bf = sub.add_parser('backfill', help="Copy source rows that aren't in calls_unified yet")
+    bf.add_argument("--sources", nargs="+", choices=DATA_SOURCES, default=DATA_SOURCES)
+    bf.add_argument("--batch", type=int, default=BACKFILL_BATCH, help="Source ids per INSERT ... SELECT")
+    bf.add_argument("--rebuild", action="store_true", help="Drop the sources' rows first and copy everything")
+    sub.add_parser('status', help="Row counts per source vs calls_unified")
+    args = parser.parse_args()
+
+    with get_connection() as conn:
+        if args.command == 'backfill':
+            backfill(conn, args.sources, args.batch, args.rebuild)
+        else:
+            print(f"{'source':<12} {'source rows':>12} {'unified rows':>13}")
+            for data_source, source_rows, unified_rows in status(conn):
+                print(f"{data_source:<12} {source_rows:>12,} {unified_rows:>13,}")
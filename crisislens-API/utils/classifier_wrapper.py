@@ -1,6 +1,5 @@
 import sys
 import logging
-import numpy as np
 import os
 
 classifier_path = os.path.join(os.path.dirname(__file__), '..', '..', 'Classifier', 'production')
@@ -9,40 +8,43 @@ if os.path.exists(classifier_path):
 else:
     sys.path.append('/app/Classifier/production')
 
-from classifier_service import EmergencyClassifier
+from classifier_service import EmergencyClassifier, SubtypeClassifier
 
 logger = logging.getLogger(__name__)
 
 class BatchClassifier:
     def __init__(self):
         self.main_classifier = EmergencyClassifier()
+        self.subtype_classifier = SubtypeClassifier()
         logger.info("batch classifier loaded")
     
     def classify_batch(self, descriptions):
         if not isinstance(descriptions, list):
             descriptions = descriptions.tolist()
         
-        results = []
+        descriptions = ['' if d is None else str(d) for d in descriptions]
+        
+        try:
+            # both classifiers dedupe the batch and memoize repeated descriptions
+            main_preds = self.main_classifier.predict_batch(descriptions)
+            subtypes = self.subtype_classifier.predict_batch(descriptions, [p for p, _ in main_preds])
+        except Exception as e:
+            logger.error(f"batch classification failed: {str(e)}")
+            return [{
+                'emergency_type': 'Unknown',
+                'emergency_subtype': 'Classification Failed',
+                'confidence': 0.0} for _ in descriptions]
         
-        for desc in descriptions:
-            try:
-                main_pred = self.main_classifier.main_model.predict([desc])[0]
-                main_proba = self.main_classifier.main_model.predict_proba([desc])[0]
-                confidence = float(np.max(main_proba))
-                
-                subtype = self.main_classifier.classify_subtype(desc, main_pred)
-                
-                results.append({
-                    'emergency_type': main_pred,
-                    'emergency_subtype': subtype,
-                    'confidence': round(confidence, 4)})
-            except Exception as e:
-                logger.error(f"classification failed: {desc[:50]}... {str(e)}")
-                results.append({
-                    'emergency_type': 'Unknown',
-                    'emergency_subtype': 'Classification Failed',
-                    'confidence': 0.0})
+        results = []
+        for (main_pred, confidence), subtype in zip(main_preds, subtypes):
+            results.append({
+                'emergency_type': main_pred,
+                'emergency_subtype': subtype,
+                'confidence': round(confidence or 0.0, 4)})
         
+        main_stats = self.main_classifier.cache.stats()
+        logger.info(f"classified {len(descriptions)} descriptions, "
+                    f"memo hit rate {main_stats['hit_rate']:.1%} ({main_stats['size']} cached)")
         return results
     
     def classify_dataframe(self, df):
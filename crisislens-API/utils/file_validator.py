@@ -1,4 +1,3 @@
-import pandas as pd
 import logging
 from werkzeug.utils import secure_filename
 
@@ -23,6 +22,7 @@ def validate_file_size(file):
     return True, None
 
 def parse_upload(file, filename):
+    import pandas as pd
     try:
         ext = filename.rsplit('.', 1)[1].lower()
         
@@ -41,6 +41,7 @@ def parse_upload(file, filename):
         return None, f"Failed to parse file: {str(e)}"
 
 def validate_dataframe(df):
+    import pandas as pd
     errors = []
     warnings = []
     
@@ -1,6 +1,11 @@
 # worker.py
 import os
+import gc
 import sys
+import time
+import signal
+import socket
+import argparse
 from redis import Redis
 from rq import Worker, Queue, SimpleWorker
 
@@ -8,20 +13,244 @@ from rq import Worker, Queue, SimpleWorker
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 #processing function
-from Classifier.production.tasks import process_emergency_call
+from Classifier.production.tasks import process_emergency_call, process_emergency_calls
+from Classifier.production.call_stream import INGEST_TRANSPORT, PRIORITY_STREAM_KEY, StreamConsumer, stream_stats
+from Classifier.production.admission import QUEUE, PRIORITY_QUEUE, backlog
+from Classifier.production.classifier_service import preload_models, start_model_watcher, switch_model_version
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Classifier', 'production'))
+from stage_metrics import flush as flush_metrics
+import model_registry
+
+# RQ takes jobs from the first non-empty queue, so priority calls are served first
+listen = [PRIORITY_QUEUE, QUEUE]
+
+REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
+REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
+
+# On Linux the worker runs as a supervisor: the classifier bundles are loaded once in the
+# parent, then N children are forked and share the model pages copy-on-write. Each child
+# runs a SimpleWorker (jobs execute in the child itself, no fork per job). Model promotions
+# are followed by the parent: it loads the new version once and replaces the children one
+# at a time, so the new models are shared as well instead of loaded again in every child.
+WORKER_CONCURRENCY = int(os.getenv('WORKER_CONCURRENCY', os.cpu_count() or 1))
+WORKER_THREADS = int(os.getenv('WORKER_THREADS', 1))
+WORKER_STATS_INTERVAL = int(os.getenv('WORKER_STATS_INTERVAL', 60))
+TRANSPORTS = ('rq', 'stream')
+
+redis_conn = Redis(host=REDIS_HOST, port=REDIS_PORT)
+
+
+def _pss_mb(pid):
+    #Proportional set size: shared model pages are split across the processes sharing them
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def run_stream_consumer(conn, name):
+    #Finishes (and acks) the block in progress on SIGTERM, unacked entries are reclaimed anyway
+    consumer = StreamConsumer(conn, name, process_emergency_calls, priority_key=PRIORITY_STREAM_KEY)
+    signal.signal(signal.SIGTERM, consumer.stop)
+    signal.signal(signal.SIGINT, consumer.stop)
+    try:
+        consumer.run()
+    finally:
+        flush_metrics(conn)
+
+
+def run_child(name, transport=INGEST_TRANSPORT):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    # fresh connection per child, sockets must not be shared across forks
+    conn = Redis(host=REDIS_HOST, port=REDIS_PORT)
+    if transport == 'stream':
+        return run_stream_consumer(conn, name)
+    qs = [Queue(q, connection=conn) for q in listen]
+    w = SimpleWorker(qs, connection=conn, name=name)
+    try:
+        w.work()
+    finally:
+        # push the stage timings not flushed yet, children exit via os._exit
+        flush_metrics(conn)
+
+
+class WorkerSupervisor:
+
+    def __init__(self, concurrency, stats_interval=WORKER_STATS_INTERVAL, transport=INGEST_TRANSPORT):
+        self.concurrency = concurrency
+        self.transport = transport
+        self.stats_interval = stats_interval
+        self.prefix = f"crisislens-{socket.gethostname()}-{os.getpid()}"
+        self.children = {}
+        self.stopping = False
+        self.last_counts = {}
+        self.loaded_version = None
+        self.stale = []  # children still running the models loaded before the last promotion
+        self.retiring = None
+
+    def spawn(self, slot):
+        name = f"{self.prefix}-{slot}"
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_child(name, self.transport)
+            except Exception as e:
+                print(f" Worker {name} crashed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = slot
+        print(f" Started worker {name} (pid {pid})")
+
+    def stop(self, signum, frame):
+        if self.stopping:
+            return
+        self.stopping = True
+        print("\nStopping workers (warm shutdown)...")
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def reload_models(self):
+        #Load a newly promoted version here, then replace the children one at a time
+        version = model_registry.current_version()
+        if version is None or version == self.loaded_version:
+            return
+        print(f"Model version {version} promoted, loading in the supervisor...")
+        t0 = time.time()
+        gc.unfreeze()
+        try:
+            switch_model_version(version)
+        except Exception as e:
+            # children keep serving the loaded version; retried on the next poll
+            print(f" Could not switch to model version {version}: {e}")
+            return
+        finally:
+            gc.collect()
+            gc.freeze()
+        self.loaded_version = version
+        self.stale = list(self.children)
+        print(f" Loaded model version {version} ({time.time() - t0:.1f}s), restarting {len(self.stale)} workers")
+
+    def retire_next(self):
+        #Warm shutdown of one stale child; the loop forks its replacement when it exits
+        while self.retiring is None and self.stale:
+            pid = self.stale.pop()
+            if pid not in self.children:
+                continue
+            try:
+                os.kill(pid, signal.SIGTERM)
+                self.retiring = pid
+            except ProcessLookupError:
+                pass
+
+    def report(self, elapsed):
+        if self.transport == 'stream':
+            stats = stream_stats(redis_conn)
+            print(f"\nStream {stats['stream']}: length {stats['length']}, lag {stats['lag']}, "
+                  f"pending {stats['pending']}, oldest pending {stats['oldest_pending_seconds']}s, "
+                  f"dead letters {stats['dead_letters']}")
+            for pid, slot in sorted(self.children.items(), key=lambda c: c[1]):
+                print(f"{self.prefix}-{slot:<10} PSS {_pss_mb(pid)} MB")
+            print(f"Supervisor PSS: {_pss_mb(os.getpid())} MB")
+            return
+        workers = [w for w in Worker.all(connection=redis_conn) if w.name.startswith(self.prefix)]
+        pids = {f"{self.prefix}-{slot}": pid for pid, slot in self.children.items()}
+        print(f"\n{'Worker':<40} {'ok':>7} {'failed':>7} {'jobs/min':>9} {'busy s':>8} {'PSS MB':>8}")
+        for w in sorted(workers, key=lambda w: w.name):
+            done = w.successful_job_count + w.failed_job_count
+            rate = (done - self.last_counts.get(w.name, 0)) * 60 / elapsed if elapsed else 0
+            self.last_counts[w.name] = done
+            pss = _pss_mb(pids[w.name]) if w.name in pids else None
+            print(f"{w.name:<40} {w.successful_job_count:>7} {w.failed_job_count:>7} {rate:>9.1f} "
+                  f"{w.total_working_time:>8.1f} {pss if pss is not None else '-':>8}")
+        print(f"Supervisor PSS: {_pss_mb(os.getpid())} MB")
+        state = backlog(redis_conn)
+        print(f"Backlog: {state['queued']} queued, {state['priority_queued']} priority, "
+              f"oldest job {state['oldest_job_seconds']}s")
+
+    def run(self):
+        print(f"Preloading classifiers (XGBoost threads per prediction: {WORKER_THREADS})...")
+        t0 = time.time()
+        self.loaded_version = preload_models(n_threads=WORKER_THREADS).main.registry_version
+        print(f" Models loaded in {time.time() - t0:.1f}s")
+
+        # move everything loaded so far out of the GC's reach so collections in the
+        # children don't touch (and copy) the shared pages
+        gc.collect()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        print(f"Forking {self.concurrency} workers...")
+        for slot in range(self.concurrency):
+            self.spawn(slot)
+
+        last_report = last_poll = time.time()
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                slot = self.children.pop(pid)
+                if pid == self.retiring:
+                    self.retiring = None
+                if not self.stopping:
+                    print(f" Worker {self.prefix}-{slot} (pid {pid}) exited with status {status}, restarting")
+                    self.spawn(slot)
+                continue
+
+            if not self.stopping:
+                if time.time() - last_poll >= model_registry.MODEL_POLL_SECONDS:
+                    self.reload_models()
+                    last_poll = time.time()
+                self.retire_next()
+
+            if self.stats_interval and time.time() - last_report >= self.stats_interval:
+                self.report(time.time() - last_report)
+                last_report = time.time()
+            time.sleep(1)
+
+        print("All workers stopped")
 
-listen = ['crisislens']
-redis_conn = Redis(
-    host=os.getenv('REDIS_HOST', 'localhost'),
-    port=int(os.getenv('REDIS_PORT', 6379))
-)
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="CrisisLens RQ worker")
+    parser.add_argument("-n", "--concurrency", type=int, default=WORKER_CONCURRENCY,
+                        help="Number of forked worker processes (env WORKER_CONCURRENCY)")
+    parser.add_argument("--stats-interval", type=int, default=WORKER_STATS_INTERVAL,
+                        help="Seconds between throughput reports, 0 to disable")
+    parser.add_argument("--transport", choices=TRANSPORTS, default=INGEST_TRANSPORT,
+                        help="rq jobs or the Redis Stream consumer group (env INGEST_TRANSPORT)")
+    args = parser.parse_args()
+
     print("CrisisLens Worker Starting...")
-    print(f"Listening to queues: {listen}")
+    if args.transport == 'stream':
+        print("Consuming the call stream")
+    else:
+        print(f"Listening to queues: {listen}")
     print("-" * 60)
-    
-    qs = list(map(lambda q: Queue(q, connection=redis_conn), listen))
-    # Used SimpleWorker instead of Worker for Windows compatibility issues 
-    w = SimpleWorker(qs, connection=redis_conn)
-    w.work()
\ No newline at end of file
+
+    if hasattr(os, 'fork') and args.concurrency > 1:
+        WorkerSupervisor(args.concurrency, args.stats_interval, args.transport).run()
+    elif args.transport == 'stream':
+        preload_models(n_threads=WORKER_THREADS)
+        start_model_watcher()
+        run_stream_consumer(redis_conn, f"crisislens-{socket.gethostname()}-{os.getpid()}")
+    else:
+        qs = list(map(lambda q: Queue(q, connection=redis_conn), listen))
+        # Used SimpleWorker instead of Worker for Windows compatibility issues
+        preload_models(n_threads=WORKER_THREADS)
+        start_model_watcher()
+        w = SimpleWorker(qs, connection=redis_conn)
+        w.work()
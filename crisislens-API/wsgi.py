@@ -0,0 +1,31 @@
+"""
+WSGI entrypoint for production: gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app (gunicorn.conf.py) this module is imported once in the gunicorn master:
+the app, its routes and the /classify models are loaded before the workers are forked,
+so every worker shares those pages copy-on-write instead of loading its own copy.
+`python app.py` is still the development server.
+"""
+import os
+import gc
+import time
+
+from app import app
+
+# the classifier instance /classify scores with (Classifier/production is on sys.path via the routes)
+import classifier_service
+
+APP_PRELOAD_MODELS = os.getenv('APP_PRELOAD_MODELS', '1') == '1'
+
+if APP_PRELOAD_MODELS:
+    t0 = time.time()
+    classifier_service.preload_models()
+    # the routes import these on first use; loading them here shares them across workers too
+    import pandas
+    import services.clustering
+    import utils.classifier_wrapper
+    print(f" Classifier models and route dependencies preloaded in {time.time() - t0:.1f}s")
+
+# keep the workers' garbage collections from touching (and copying) the preloaded objects
+gc.collect()
+gc.freeze()
@@ -0,0 +1,20 @@
+-- Model registry version that produced each enriched row (Classifier/production/model_registry.py).
+-- NULL for rows enriched before versioning.
+-- Guarded so it can run on databases that already have the column.
+SET @has_version := (SELECT COUNT(*) FROM information_schema.COLUMNS
+                     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'enriched_calls' AND COLUMN_NAME = 'model_version');
+SET @ddl := IF(@has_version = 0,
+               'ALTER TABLE enriched_calls ADD COLUMN model_version VARCHAR(64) NULL AFTER emergency_subtype',
+               'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @has_index := (SELECT COUNT(*) FROM information_schema.STATISTICS
+                   WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'enriched_calls' AND INDEX_NAME = 'idx_enriched_model_version');
+SET @ddl := IF(@has_index = 0,
+               'CREATE INDEX idx_enriched_model_version ON enriched_calls (model_version)',
+               'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
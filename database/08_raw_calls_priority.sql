@@ -0,0 +1,21 @@
+-- Priority lane for admission control (Classifier/production/admission.py):
+-- raw_calls keeps the priority_flag sent to POST /calls, and workers in batch mode
+-- claim unprocessed calls priority first through idx_raw_calls_backlog.
+-- Guarded so it can run on databases that already have the column.
+SET @has_priority := (SELECT COUNT(*) FROM information_schema.COLUMNS
+                      WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'raw_calls' AND COLUMN_NAME = 'priority_flag');
+SET @ddl := IF(@has_priority = 0,
+               'ALTER TABLE raw_calls ADD COLUMN priority_flag TINYINT NOT NULL DEFAULT 0',
+               'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @has_index := (SELECT COUNT(*) FROM information_schema.STATISTICS
+                   WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'raw_calls' AND INDEX_NAME = 'idx_raw_calls_backlog');
+SET @ddl := IF(@has_index = 0,
+               'CREATE INDEX idx_raw_calls_backlog ON raw_calls (processed, priority_flag DESC, id)',
+               'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,77 @@
+-- One table for every call the dashboards read (crisislens-API/services/unified_calls.py):
+-- historical rows from emergency_data, live rows from enriched_calls and uploaded rows
+-- from uploaded_data, with township mapped to district and the columns the routes
+-- used to compute per query (severity, heatmap intensity, hour, day of week, date)
+-- stored once. Enrichment and uploads write here in the same transaction as their own
+-- insert; existing rows are copied with `python -m services.unified_calls backfill`.
+CREATE TABLE IF NOT EXISTS calls_unified (
+    id BIGINT NOT NULL AUTO_INCREMENT,
+    data_source ENUM('historical', 'live', 'uploaded') NOT NULL,
+    source_id BIGINT NOT NULL,
+    timestamp DATETIME NULL,
+    emergency_type VARCHAR(50) NULL,
+    emergency_subtype VARCHAR(100) NULL,
+    emergency_title VARCHAR(150) NULL,
+    district VARCHAR(100) NULL,
+    latitude DOUBLE NULL,
+    longitude DOUBLE NULL,
+    description TEXT NULL,
+    zipcode VARCHAR(10) NULL,
+    address VARCHAR(255) NULL,
+    priority_flag TINYINT NOT NULL DEFAULT 0,
+    caller_gender VARCHAR(10) NULL,
+    caller_age INT NULL,
+    age_group VARCHAR(20) NULL,
+    source VARCHAR(50) NULL,
+    -- same mappings /clusters and /clusters/heatmap-data used to compute in their SELECTs
+    severity TINYINT AS (CASE COALESCE(emergency_type, 'Unknown')
+                             WHEN 'Fire' THEN 9
+                             WHEN 'EMS' THEN 8
+                             WHEN 'Traffic' THEN 7
+                             ELSE 5
+                         END) STORED,
+    intensity DECIMAL(3, 2) AS (CASE emergency_type
+                                    WHEN 'Fire' THEN 0.9
+                                    WHEN 'Medical Emergency' THEN 0.85
+                                    WHEN 'Accident' THEN 0.7
+                                    WHEN 'Assault' THEN 0.75
+                                    WHEN 'Robbery' THEN 0.65
+                                    ELSE 0.4
+                                END) STORED,
+    call_date DATE AS (DATE(timestamp)) STORED,
+    hour TINYINT AS (HOUR(timestamp)) STORED,
+    day_of_week TINYINT AS (DAYOFWEEK(timestamp)) STORED,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_calls_unified_source (data_source, source_id),
+    KEY idx_calls_unified_timestamp (timestamp),
+    KEY idx_calls_unified_source_timestamp (data_source, timestamp),
+    KEY idx_calls_unified_type_timestamp (emergency_type, timestamp),
+    KEY idx_calls_unified_district_timestamp (district, timestamp),
+    KEY idx_calls_unified_date_type (call_date, emergency_type),
+    KEY idx_calls_unified_type_subtype (emergency_type, emergency_subtype)
+);
+
+-- Seed with the calls already in the source tables (06 loads emergency_data), so the
+-- dashboards, which read only calls_unified, show them on a fresh database. New rows are
+-- copied by their writers, and the backend runs the resumable
+-- `python -m services.unified_calls backfill` on start for rows loaded any other way.
+-- The select lists are SOURCES in services/unified_calls.py.
+INSERT INTO calls_unified (data_source, source_id, timestamp, emergency_type, emergency_subtype, emergency_title, district, latitude, longitude, description, zipcode, address, priority_flag, caller_gender, caller_age, age_group, source)
+SELECT 'historical', id, timestamp, emergency_type, emergency_subtype, emergency_title, township, latitude, longitude, description, zipcode, address, COALESCE(priority_flag, 0), caller_gender, caller_age, age_group, source
+FROM emergency_data
+ON DUPLICATE KEY UPDATE source_id = source_id;
+
+INSERT INTO calls_unified (data_source, source_id, timestamp, emergency_type, emergency_subtype, emergency_title, district, latitude, longitude, description, zipcode, address, priority_flag, caller_gender, caller_age, age_group, source)
+SELECT 'live', id, timestamp, emergency_type, emergency_subtype, NULL, district, latitude, longitude, description, zipcode, address, COALESCE(priority_flag, 0), caller_gender, caller_age, age_group, source
+FROM enriched_calls
+ON DUPLICATE KEY UPDATE source_id = source_id;
+
+-- uploaded_data is created by the upload feature's schema, skip it where it doesn't exist yet
+SET @has_uploads := (SELECT COUNT(*) FROM information_schema.TABLES
+                     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'uploaded_data');
+SET @ddl := IF(@has_uploads = 1,
+               'INSERT INTO calls_unified (data_source, source_id, timestamp, emergency_type, emergency_subtype, emergency_title, district, latitude, longitude, description, zipcode, address, priority_flag, caller_gender, caller_age, age_group, source) SELECT ''uploaded'', id, timestamp, emergency_type, emergency_subtype, NULL, district, latitude, longitude, description, zipcode, NULL, 0, caller_gender, caller_age, NULL, source FROM uploaded_data ON DUPLICATE KEY UPDATE source_id = source_id',
+               'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
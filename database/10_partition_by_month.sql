@@ -0,0 +1,58 @@
+-- Monthly RANGE partitioning on timestamp for emergency_data and raw_calls
+-- (crisislens-API/services/table_maintenance.py). Both tables start with a single
+-- catch-all partition; `python -m services.table_maintenance partitions` splits it into
+-- one partition per month (from the oldest row, or --from) plus a few months ahead, and
+-- the nightly `maintain` run keeps adding future months. Run it before bulk loading
+-- emergency_data so the rows land in their months directly.
+--
+-- MySQL requires the partitioning column in every unique key, so the primary keys become
+-- (id, timestamp) and timestamp becomes NOT NULL. Partitioned tables can't take part in
+-- foreign keys, so a foreign key from enriched_calls.raw_call_id to raw_calls is dropped
+-- (its index stays). On a populated database each ALTER copies the table.
+--
+-- Pruning only helps queries that read these tables with a bare timestamp range:
+-- /temporal (routes/temporal_analysis.py) on emergency_data, and the raw_calls archival.
+-- The dashboards' /calls, /stats, /clusters and /map routes read calls_unified, which
+-- stays unpartitioned: its SPATIAL INDEX (11) is not supported on partitioned tables and
+-- its (data_source, source_id) upsert key would have to include timestamp.
+
+-- enriched_calls -> raw_calls foreign key, if the schema has one
+SET @fk := (SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS
+            WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = 'enriched_calls'
+              AND REFERENCED_TABLE_NAME = 'raw_calls' LIMIT 1);
+SET @ddl := IF(@fk IS NULL, 'DO 0', CONCAT('ALTER TABLE enriched_calls DROP FOREIGN KEY ', @fk));
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Each table is re-keyed and partitioned only while it is not partitioned yet, so the
+-- script can run again without folding the monthly partitions back into pmax
+SET @partitioned := (SELECT COUNT(*) FROM information_schema.PARTITIONS
+                     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'emergency_data' AND PARTITION_NAME IS NOT NULL);
+SET @ddl := IF(@partitioned = 0,
+               'ALTER TABLE emergency_data MODIFY timestamp DATETIME NOT NULL, DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp)',
+               'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+SET @ddl := IF(@partitioned = 0,
+               'ALTER TABLE emergency_data PARTITION BY RANGE COLUMNS (timestamp) (PARTITION pmax VALUES LESS THAN (MAXVALUE))',
+               'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @partitioned := (SELECT COUNT(*) FROM information_schema.PARTITIONS
+                     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'raw_calls' AND PARTITION_NAME IS NOT NULL);
+SET @ddl := IF(@partitioned = 0,
+               'ALTER TABLE raw_calls MODIFY timestamp DATETIME NOT NULL, DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp)',
+               'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+SET @ddl := IF(@partitioned = 0,
+               'ALTER TABLE raw_calls PARTITION BY RANGE COLUMNS (timestamp) (PARTITION pmax VALUES LESS THAN (MAXVALUE))',
+               'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,24 @@
+-- Spatial index for the viewport queries of /map/points (crisislens-API/routes/map_routes.py).
+-- location is (longitude, latitude) as a cartesian SRID 0 point, stored so it can carry a
+-- SPATIAL INDEX; MySQL requires the column NOT NULL, so calls without coordinates get
+-- POINT(0, 0), which no Montgomery viewport contains (the route also checks latitude).
+-- Generated from the existing columns, so sync_calls and the backfill fill it without
+-- changes. On a populated calls_unified the ALTER rebuilds the table. Column and index are
+-- guarded separately so the script can run again.
+SET @has_column := (SELECT COUNT(*) FROM information_schema.COLUMNS
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'calls_unified' AND COLUMN_NAME = 'location');
+SET @ddl := IF(@has_column = 0,
+               'ALTER TABLE calls_unified ADD COLUMN location POINT AS (POINT(COALESCE(longitude, 0), COALESCE(latitude, 0))) STORED NOT NULL SRID 0',
+               'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @has_index := (SELECT COUNT(*) FROM information_schema.STATISTICS
+                   WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'calls_unified' AND INDEX_NAME = 'idx_calls_unified_location');
+SET @ddl := IF(@has_index = 0,
+               'ALTER TABLE calls_unified ADD SPATIAL INDEX idx_calls_unified_location (location)',
+               'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
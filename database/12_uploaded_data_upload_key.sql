@@ -0,0 +1,14 @@
+-- Index for the upload sync (crisislens-API/routes/data_upload.py insert_chunk): each chunk's
+-- rows are copied to calls_unified by (filename, uploaded_at), which otherwise scans the
+-- whole uploaded_data table once per chunk. Guarded so it can run again, and skipped
+-- where uploaded_data has not been created yet.
+SET @has_table := (SELECT COUNT(*) FROM information_schema.TABLES
+                   WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'uploaded_data');
+SET @has_index := (SELECT COUNT(*) FROM information_schema.STATISTICS
+                   WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'uploaded_data' AND INDEX_NAME = 'idx_uploaded_data_upload');
+SET @ddl := IF(@has_table = 1 AND @has_index = 0,
+               'CREATE INDEX idx_uploaded_data_upload ON uploaded_data (filename, uploaded_at)',
+               'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
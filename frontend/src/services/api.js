@@ -44,6 +44,53 @@ export const api = {
     return await fetchWithErrorHandling(`/calls/latest?limit=${limit}`);
   },
 
+  // Live feed of newly enriched calls (Server-Sent Events); EventSource reconnects by
+  // itself and resumes from the last event id. Returns a function that closes the feed.
+  subscribeToCalls: (onCall, params = {}) => {
+    const queryParams = new URLSearchParams();
+
+    if (params.type) queryParams.append('type', params.type);
+    if (params.district) queryParams.append('district', params.district);
+
+    const queryString = queryParams.toString();
+    const source = new EventSource(`${API_BASE_URL}/events/calls${queryString ? `?${queryString}` : ''}`);
+    source.addEventListener('call', (event) => onCall(JSON.parse(event.data)));
+    source.onerror = () => console.warn('Live call feed interrupted, reconnecting');
+    return () => source.close();
+  },
+
+  // Calls inside the map viewport: every call ({mode: 'points', points}) when zoomed in
+  // far enough, otherwise counts per grid cell ({mode: 'grid', cell, cells}).
+  // bounds is a Leaflet LatLngBounds, filters takes the dashboard filters.
+  getMapPoints: async (bounds, zoom, filters = {}) => {
+    const queryParams = new URLSearchParams({
+      bbox: [bounds.getWest(), bounds.getSouth(), bounds.getEast(), bounds.getNorth()].join(','),
+      zoom: Math.round(zoom),
+    });
+
+    if (filters.types && filters.types.length > 0) queryParams.append('emergency_types', filters.types.join(','));
+    if (filters.dateRange) {
+      queryParams.append('start_date', filters.dateRange.start);
+      queryParams.append('end_date', filters.dateRange.end);
+    }
+    if (filters.district) queryParams.append('district', filters.district);
+    if (filters.source) queryParams.append('source', filters.source);
+
+    return await fetchWithErrorHandling(`/map/points?${queryParams.toString()}`);
+  },
+
+  // Emerging hotspots among the calls of the last 30 minutes, kept current by the API
+  getLiveHotspots: async (params = {}) => {
+    const queryParams = new URLSearchParams();
+
+    if (params.type) queryParams.append('type', params.type);
+    if (params.district) queryParams.append('district', params.district);
+    if (params.min_calls) queryParams.append('min_calls', params.min_calls);
+
+    const queryString = queryParams.toString();
+    return await fetchWithErrorHandling(`/clusters/live${queryString ? `?${queryString}` : ''}`);
+  },
+
   ingestCall: async (callData) => {
     return await fetchWithErrorHandling('/calls', {
       method: 'POST',
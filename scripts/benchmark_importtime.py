@@ -0,0 +1,124 @@
+"""
+Cold-start import cost of the API, the worker and the forecast CLIs.
+
+    python scripts/benchmark_importtime.py --repeat 5 --top 15
+    python scripts/benchmark_importtime.py --baseline scripts/importtime_report.json
+    python scripts/benchmark_importtime.py --out scripts/importtime_report.json   (refresh the committed report)
+
+Each target is imported in a fresh interpreter under `python -X importtime`; the table shows
+the median wall time of the import and the modules with the largest cumulative import time
+from the last run. Nothing connects to MySQL or Redis at import time. --baseline adds the
+change against a saved report; scripts/importtime_report.json is the committed reference.
+Times move by tens of percent between runs and machines, module counts are the stable part.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+API_DIR = os.path.join(ROOT, 'crisislens-API')
+
+# the repo root stands in for /app in the containers, where Classifier/ is mounted next to the API
+ENV = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [ROOT, os.getenv('PYTHONPATH')]))}
+
+# name -> (working directory, import statement)
+TARGETS = {
+    'api': (API_DIR, 'import app'),
+    'worker': (API_DIR, 'import worker'),
+    'forecast-service': (API_DIR, 'import services.arima_forecast_service'),
+    'forecast-arima': (os.path.join(API_DIR, 'forecast'), 'import arima_model'),
+    'forecast-lstm': (os.path.join(API_DIR, 'forecast'), 'import lstm_models'),
+    'forecast-prophet': (os.path.join(API_DIR, 'forecast'), 'import prophet_model'),
+}
+
+
+def run_import(cwd, statement):
+    #Wall seconds of the import and the -X importtime report (stderr), or the error
+    code = f"import time; t0 = time.perf_counter(); {statement}; print(time.perf_counter() - t0)"
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=cwd,
+                          capture_output=True, text=True, env=ENV)
+    if proc.returncode != 0:
+        return None, proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"
+    return float(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def parse_report(report):
+    #[(cumulative us, self us, module)] from the -X importtime lines
+    rows = []
+    for line in report.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+    return rows
+
+
+def top_level(rows):
+    #Modules imported directly by the target (least indented), most expensive first
+    indent = min(len(m) - len(m.lstrip()) for _, _, m in rows)
+    return sorted(((c, m.strip()) for c, _, m in rows if len(m) - len(m.lstrip()) <= indent + 2), reverse=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Import-time report for the CrisisLens entrypoints")
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per target, the median is reported")
+    parser.add_argument("--top", type=int, default=10, help="Most expensive direct imports to list per target")
+    parser.add_argument("--out", help="Write the results as JSON (the format --baseline reads)")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['targets']
+
+    summary = []
+    results = {}
+    for name in args.targets:
+        cwd, statement = TARGETS[name]
+        # the first run also compiles .pyc files, keep it out of the median
+        run_import(cwd, statement)
+        timings, report = [], None
+        for _ in range(args.repeat):
+            seconds, report = run_import(cwd, statement)
+            if seconds is None:
+                break
+            timings.append(seconds)
+
+        if not timings:
+            print(f"\n{name}: import failed ({report})")
+            summary.append((name, None, 0))
+            results[name] = {'statement': statement, 'error': report}
+            continue
+
+        rows = parse_report(report)
+        median = statistics.median(timings)
+        top = top_level(rows)[:args.top]
+        summary.append((name, median, len(rows)))
+        results[name] = {'statement': statement, 'median_ms': round(median * 1000, 1), 'runs': len(timings),
+                         'modules': len(rows), 'top_ms': {module: round(c / 1000, 1) for c, module in top}}
+        print(f"\n{name}: `{statement}` {median * 1000:.0f} ms median over {len(timings)} runs, {len(rows)} modules")
+        for cumulative, module in top:
+            print(f"  {cumulative / 1000:>9.1f} ms  {module}")
+
+    print(f"\n{'target':<18} {'import ms':>10} {'modules':>8}" + (f" {'baseline ms':>12} {'change':>8}" if baseline else ""))
+    for name, median, modules in summary:
+        line = f"{name:<18} {'failed' if median is None else f'{median * 1000:.0f}':>10} {modules:>8}"
+        before = baseline.get(name, {}).get('median_ms')
+        if baseline:
+            change = f"{(median * 1000 - before) / before:+.0%}" if median is not None and before else "-"
+            line += f" {before if before is not None else '-':>12} {change:>8}"
+        print(line)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'), 'python': platform.python_version(),
+                       'platform': platform.platform(), 'repeat': args.repeat, 'targets': results}, f, indent=2)
+            f.write('\n')
+        print(f"\nReport written to {args.out}")
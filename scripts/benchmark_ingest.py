@@ -0,0 +1,76 @@
+"""
+Sustained ingest rate of a running API: POST /calls one by one vs POST /calls/batch.
+
+    python scripts/benchmark_ingest.py --url http://localhost:5000 --calls 5000 --batch-sizes 100 500 1000
+
+Every call is really inserted into raw_calls and enqueued, so point it at a dev stack.
+"""
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+DESCRIPTIONS = [
+    "Patient having difficulty breathing", "Vehicle accident with injuries", "Smoke coming from building",
+    "Elderly male fell, possible hip injury", "Disabled vehicle blocking lane", "Fire alarm sounding",
+    "Chest pain, conscious and breathing", "Gas odor reported in basement", "Two car collision no injuries",
+]
+DISTRICTS = ["NORRISTOWN", "LOWER MERION", "ABINGTON", "UPPER MERION", "CHELTENHAM", "POTTSTOWN"]
+
+
+def make_calls(n, seed=0):
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(hours=1)
+    return [{
+        "timestamp": (start + timedelta(seconds=i)).isoformat(),
+        "description": rng.choice(DESCRIPTIONS),
+        "latitude": round(40.1 + rng.uniform(-0.15, 0.15), 6),
+        "longitude": round(-75.3 + rng.uniform(-0.15, 0.15), 6),
+        "district": rng.choice(DISTRICTS),
+        "gender": rng.choice(["Male", "Female"]),
+        "age": rng.randint(1, 95),
+    } for i in range(n)]
+
+
+def run_single(url, calls, concurrency):
+    def post(call):
+        r = session.post(f"{url}/calls", json=call, timeout=30)
+        return r.status_code == 201
+
+    session = requests.Session()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        ok = sum(pool.map(post, calls))
+    return ok, time.perf_counter() - t0
+
+
+def run_batch(url, calls, batch_size):
+    session = requests.Session()
+    ok = 0
+    t0 = time.perf_counter()
+    for start in range(0, len(calls), batch_size):
+        r = session.post(f"{url}/calls/batch", json={"calls": calls[start:start + batch_size]}, timeout=120)
+        ok += r.json().get("inserted", 0) if r.status_code in (201, 207) else 0
+    return ok, time.perf_counter() - t0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark single vs batch call ingest")
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8, help="Client threads for the single-call run")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--skip-single", action="store_true")
+    args = parser.parse_args()
+
+    calls = make_calls(args.calls)
+    print(f"{'mode':<22} {'calls':>7} {'ok':>7} {'seconds':>9} {'calls/s':>9}")
+    if not args.skip_single:
+        ok, elapsed = run_single(args.url, calls, args.concurrency)
+        print(f"{f'single x{args.concurrency}':<22} {len(calls):>7} {ok:>7} {elapsed:>9.2f} {ok / elapsed:>9.0f}")
+    for size in args.batch_sizes:
+        ok, elapsed = run_batch(args.url, calls, size)
+        print(f"{f'batch {size}':<22} {len(calls):>7} {ok:>7} {elapsed:>9.2f} {ok / elapsed:>9.0f}")
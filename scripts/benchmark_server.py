@@ -0,0 +1,144 @@
+"""
+Requests/sec and latency of the Flask development server vs gunicorn on the same box.
+
+    python scripts/benchmark_server.py --targets home classify --concurrency 32 --seconds 20
+
+Both servers are started from crisislens-API one after the other (same env, so Redis and
+MySQL must be reachable for the targets that need them) and hit with the same load.
+--slow keeps one client on GET /clusters the whole time to show head-of-line blocking.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import subprocess
+import http.client
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'crisislens-API')
+
+SERVERS = {
+    'dev': [sys.executable, '-c', "from app import app; app.run(host='127.0.0.1', port={port}, debug=False)"],
+    'gunicorn': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', '127.0.0.1:{port}', 'wsgi:app'],
+}
+
+WORDS = ("patient chest pain fall unconscious smoke alarm vehicle accident injury breathing "
+         "difficulty fire building road debris bleeding").split()
+
+TARGETS = {
+    'home': ('GET', '/', None),
+    'classify': ('POST', '/classify', lambda: {'description': ' '.join(random.choices(WORDS, k=6))}),
+    'latest': ('GET', '/calls/latest?limit=50', None),
+    'metrics': ('GET', '/metrics/summary', None),
+}
+
+
+def start_server(name, port):
+    cmd = [part.replace('{port}', str(port)) for part in SERVERS[name]]
+    env = {**os.environ, 'GUNICORN_ACCESS_LOG': ''}
+    proc = subprocess.Popen(cmd, cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 180
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{name} server exited with status {proc.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/')
+            if conn.getresponse().status == 200:
+                return proc
+        except OSError:
+            time.sleep(0.5)
+    proc.kill()
+    raise RuntimeError(f"{name} server did not come up on port {port}")
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def run_load(port, target, concurrency, seconds):
+    method, path, body = TARGETS[target]
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        local, failed = [], 0
+        while time.perf_counter() < stop_at:
+            payload = json.dumps(body()) if body else None
+            t0 = time.perf_counter()
+            try:
+                conn.request(method, path, payload, {'Content-Type': 'application/json'})
+                response = conn.getresponse()
+                response.read()
+                ok = response.status < 400
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - t0)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else float('nan')
+    return {'requests': len(latencies), 'errors': errors[0], 'rps': len(latencies) / elapsed,
+            'p50': pct(0.50), 'p99': pct(0.99)}
+
+
+def slow_client(port, stop):
+    #Keeps one /clusters request in flight until stop is set
+    while not stop.is_set():
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+            conn.request('GET', '/clusters')
+            conn.getresponse().read()
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.5)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the dev server against gunicorn")
+    parser.add_argument("--servers", nargs="+", choices=list(SERVERS), default=list(SERVERS))
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=['home', 'classify'])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--slow", action="store_true", help="Keep one GET /clusters in flight during the runs")
+    args = parser.parse_args()
+
+    print(f"{'server':<10} {'target':<10} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name in args.servers:
+        proc = start_server(name, args.port)
+        stop = threading.Event()
+        try:
+            if args.slow:
+                threading.Thread(target=slow_client, args=(args.port, stop), daemon=True).start()
+            for target in args.targets:
+                run_load(args.port, target, args.concurrency, args.warmup)
+                r = run_load(args.port, target, args.concurrency, args.seconds)
+                print(f"{name:<10} {target:<10} {r['requests']:>9} {r['errors']:>7} {r['rps']:>8.0f} "
+                      f"{r['p50']:>8.1f} {r['p99']:>8.1f}")
+        finally:
+            stop.set()
+            stop_server(proc)
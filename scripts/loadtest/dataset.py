@@ -0,0 +1,416 @@
+"""
+Synthetic emergency_data / enriched_calls / forecasted_calls for load tests.
+
+    python scripts/loadtest/dataset.py generate --rows 5000000 --live-rows 500000 --seed 7
+    python scripts/loadtest/dataset.py load --data Data/loadtest/5000000-7 --replace
+
+The distributions follow the Montgomery County 911 data the dashboards were built on:
+EMS/Traffic/Fire shares and their subtypes, calls per township around the township
+centroids (plus a few hundred recurring addresses per township, so DBSCAN finds real
+clusters), an hourly profile peaking late afternoon with Traffic rush hours, and weekday
+and month seasonality. Each chunk is drawn from its own seeded generator, so the same
+--rows/--seed/--chunk-size always produce the same rows.
+
+`load` targets the MySQL in crisislens-API/.env (DB_HOST, DB_PORT, DB_USER, DB_PASSWORD,
+DB_NAME) with LOAD DATA LOCAL INFILE, falling back to batched INSERTs when the server
+has local_infile disabled, and then copies the calls into calls_unified.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+DATA_DIR = os.path.join(ROOT, 'Data', 'loadtest')
+
+# Montgomery date range; the live window ends at --live-end (today by default)
+HISTORY_START = '2015-12-10'
+HISTORY_END = '2020-07-29'
+
+TYPE_SHARES = {'EMS': 0.493, 'Traffic': 0.354, 'Fire': 0.153}
+
+SUBTYPES = {
+    'EMS': {
+        'FALL VICTIM': 0.160, 'RESPIRATORY EMERGENCY': 0.155, 'CARDIAC EMERGENCY': 0.150,
+        'VEHICLE ACCIDENT': 0.080, 'SUBJECT IN PAIN': 0.060, 'HEAD INJURY': 0.050,
+        'UNKNOWN MEDICAL EMERGENCY': 0.040, 'SYNCOPAL EPISODE': 0.035, 'SEIZURES': 0.035,
+        'GENERAL WEAKNESS': 0.030, 'ABDOMINAL PAINS': 0.030, 'ALTERED MENTAL STATUS': 0.030,
+        'MEDICAL ALERT ALARM': 0.030, 'HEMORRHAGING': 0.030, 'CVA/STROKE': 0.025,
+        'OVERDOSE': 0.020, 'NAUSEA/VOMITING': 0.020, 'UNCONSCIOUS SUBJECT': 0.020,
+        'DIABETIC EMERGENCY': 0.020, 'BACK PAINS/INJURY': 0.015,
+    },
+    'Traffic': {
+        'VEHICLE ACCIDENT': 0.640, 'DISABLED VEHICLE': 0.210, 'ROAD OBSTRUCTION': 0.090,
+        'HAZARDOUS ROAD CONDITIONS': 0.040, 'VEHICLE FIRE': 0.020,
+    },
+    'Fire': {
+        'FIRE ALARM': 0.380, 'VEHICLE ACCIDENT': 0.110, 'FIRE INVESTIGATION': 0.090,
+        'GAS-ODOR/LEAK': 0.060, 'BUILDING FIRE': 0.050, 'FIRE SPECIAL SERVICE': 0.050,
+        'CARBON MONOXIDE DETECTOR': 0.050, 'ELECTRICAL FIRE OUTSIDE': 0.040, 'VEHICLE FIRE': 0.040,
+        'DEBRIS/FLUID SPILL': 0.040, 'RESCUE - ELEVATOR': 0.030, 'WOODS/FIELD FIRE': 0.030,
+        'UNKNOWN TYPE FIRE': 0.030,
+    },
+}
+
+# township -> (share, centroid lat, centroid lon, zipcode)
+TOWNSHIPS = {
+    'LOWER MERION': (0.084, 40.020, -75.270, '19096'),
+    'ABINGTON': (0.060, 40.100, -75.120, '19001'),
+    'NORRISTOWN': (0.059, 40.121, -75.344, '19401'),
+    'UPPER MERION': (0.054, 40.083, -75.382, '19406'),
+    'CHELTENHAM': (0.046, 40.073, -75.133, '19012'),
+    'POTTSTOWN': (0.041, 40.245, -75.650, '19464'),
+    'UPPER MORELAND': (0.035, 40.160, -75.100, '19090'),
+    'LOWER PROVIDENCE': (0.034, 40.148, -75.422, '19403'),
+    'PLYMOUTH': (0.033, 40.103, -75.290, '19462'),
+    'HORSHAM': (0.030, 40.185, -75.160, '19044'),
+    'MONTGOMERY': (0.029, 40.235, -75.235, '18936'),
+    'UPPER DUBLIN': (0.028, 40.150, -75.180, '19002'),
+    'WHITEMARSH': (0.026, 40.090, -75.240, '19444'),
+    'UPPER PROVIDENCE': (0.025, 40.170, -75.480, '19468'),
+    'LIMERICK': (0.024, 40.230, -75.520, '19468'),
+    'SPRINGFIELD': (0.022, 40.090, -75.200, '19038'),
+    'LOWER MORELAND': (0.021, 40.120, -75.050, '19006'),
+    'WHITPAIN': (0.021, 40.160, -75.270, '19422'),
+    'HATFIELD TOWNSHIP': (0.020, 40.280, -75.290, '19440'),
+    'LOWER GWYNEDD': (0.019, 40.180, -75.240, '19002'),
+    'LANSDALE': (0.017, 40.242, -75.284, '19446'),
+    'EAST NORRITON': (0.017, 40.150, -75.330, '19401'),
+    'WEST NORRITON': (0.016, 40.130, -75.380, '19403'),
+    'UPPER GWYNEDD': (0.016, 40.210, -75.280, '19446'),
+    'TOWAMENCIN': (0.015, 40.250, -75.340, '19438'),
+}
+
+STREETS = [
+    'MAIN ST', 'DEKALB PIKE', 'RIDGE PIKE', 'GERMANTOWN PIKE', 'BETHLEHEM PIKE', 'YORK RD',
+    'EASTON RD', 'LANCASTER AVE', 'CITY AVE', 'MONTGOMERY AVE', 'BUTLER PIKE', 'SUMNEYTOWN PIKE',
+    'SKIPPACK PIKE', 'WELSH RD', 'SUSQUEHANNA RD', 'OLD YORK RD', 'COUNTY LINE RD', 'SCHUYLKILL EXPY',
+    'PA TURNPIKE', 'HIGH ST', 'EGYPT RD', 'VALLEY FORGE RD', 'CHURCH RD', 'MARKLEY ST', 'SWEDE ST',
+]
+
+# share of calls per hour of day (Montgomery), and Traffic's extra weight in the rush hours
+HOUR_PROFILE = np.array([
+    0.024, 0.020, 0.017, 0.015, 0.015, 0.019, 0.027, 0.039, 0.048, 0.052, 0.054, 0.055,
+    0.056, 0.056, 0.057, 0.060, 0.062, 0.063, 0.055, 0.049, 0.045, 0.040, 0.035, 0.029,
+])
+TRAFFIC_HOUR_FACTOR = np.array([
+    0.7, 0.7, 0.7, 0.7, 0.7, 0.8, 1.0, 1.3, 1.3, 1.0, 1.0, 1.0,
+    1.0, 1.0, 1.1, 1.3, 1.3, 1.3, 1.1, 1.0, 0.9, 0.8, 0.8, 0.7,
+])
+WEEKDAY_FACTOR = np.array([1.00, 1.02, 1.00, 1.00, 1.07, 0.93, 0.83])  # Monday first
+MONTH_FACTOR = np.array([1.05, 0.98, 1.05, 0.95, 1.00, 1.00, 1.03, 1.00, 0.95, 0.98, 0.97, 1.00])
+
+# calls landing on one of a township's recurring addresses (hospitals, malls, interchanges)
+HOTSPOT_SHARE = 0.3
+HOTSPOTS_PER_TOWNSHIP = 200
+TOWNSHIP_SPREAD = 0.015
+
+EMERGENCY_COLUMNS = ['latitude', 'longitude', 'description', 'zipcode', 'emergency_title', 'timestamp',
+                     'township', 'address', 'priority_flag', 'emergency_type', 'emergency_subtype',
+                     'caller_gender', 'caller_age', 'age_group', 'source']
+ENRICHED_COLUMNS = ['raw_call_id', 'latitude', 'longitude', 'description', 'zipcode', 'timestamp', 'district',
+                    'address', 'priority_flag', 'emergency_type', 'emergency_subtype', 'caller_gender',
+                    'caller_age', 'age_group', 'source', 'caller_name', 'caller_number', 'model_version',
+                    'processed_at']
+FORECAST_COLUMNS = ['forecast_date', 'predicted_calls', 'lower_bound', 'upper_bound', 'emergency_type',
+                    'model_used', 'generated_at']
+
+# raw_call_id of the synthetic live calls, well clear of real raw_calls ids
+LIVE_RAW_CALL_ID_BASE = 1_000_000_000
+FORECAST_DAYS = 30
+CHUNK_SIZE = 500000
+INSERT_BATCH = 5000
+
+TABLES = {
+    'emergency_data': ('emergency_data', EMERGENCY_COLUMNS),
+    'enriched_calls': ('enriched_calls', ENRICHED_COLUMNS),
+    'forecasted_calls': ('forecasted_calls', FORECAST_COLUMNS),
+}
+# the calls_unified data_source each call table feeds (crisislens-API/services/unified_calls.py)
+UNIFIED_SOURCES = {'emergency_data': 'historical', 'enriched_calls': 'live'}
+
+
+def _normalized(weights):
+    weights = np.asarray(list(weights), dtype=float)
+    return weights / weights.sum()
+
+
+def _hotspots(seed):
+    #Recurring (lat, lon, address) per township; the same for every chunk of a seed
+    rng = np.random.default_rng([seed, 0xC0FFEE])
+    spots = {}
+    for name, (_, lat, lon, _) in TOWNSHIPS.items():
+        n = HOTSPOTS_PER_TOWNSHIP
+        lats = lat + rng.normal(0, TOWNSHIP_SPREAD, n)
+        lons = lon + rng.normal(0, TOWNSHIP_SPREAD, n)
+        streets = rng.choice(STREETS, (n, 2))
+        addresses = np.array([f"{a} & {b}" for a, b in streets])
+        spots[name] = (lats, lons, addresses)
+    return spots
+
+
+def _day_weights(days):
+    return _normalized(WEEKDAY_FACTOR[days.weekday] * MONTH_FACTOR[days.month - 1])
+
+
+def _timestamps(rng, types, start, end):
+    #Per call: a day weighted by weekday/month, an hour from the (type's) hourly profile, a uniform second
+    days = pd.date_range(start, end, freq='D')
+    day_index = rng.choice(len(days), size=len(types), p=_day_weights(days))
+    hours = np.empty(len(types), dtype=np.int64)
+    for etype in TYPE_SHARES:
+        mask = types == etype
+        profile = HOUR_PROFILE * (TRAFFIC_HOUR_FACTOR if etype == 'Traffic' else 1.0)
+        hours[mask] = rng.choice(24, size=int(mask.sum()), p=_normalized(profile))
+    seconds = rng.integers(0, 3600, size=len(types))
+    return days.values[day_index] + (hours * 3600 + seconds).astype('timedelta64[s]')
+
+
+def _age_groups(ages):
+    return np.select([ages <= 25, ages <= 35, ages <= 45, ages <= 55],
+                     ['18-25', '26-35', '36-45', '46-55'], '56+')
+
+
+def generate_calls(n, seed, chunk, start, end, hotspots):
+    #One chunk of calls as a DataFrame with the columns both tables draw from
+    rng = np.random.default_rng([seed, chunk])
+
+    types = rng.choice(list(TYPE_SHARES), size=n, p=_normalized(TYPE_SHARES.values()))
+    subtypes = np.empty(n, dtype=object)
+    for etype, shares in SUBTYPES.items():
+        mask = types == etype
+        subtypes[mask] = rng.choice(list(shares), size=int(mask.sum()), p=_normalized(shares.values()))
+
+    names = list(TOWNSHIPS)
+    township_index = rng.choice(len(names), size=n, p=_normalized(t[0] for t in TOWNSHIPS.values()))
+    townships = np.array(names, dtype=object)[township_index]
+    zipcodes = np.array([t[3] for t in TOWNSHIPS.values()], dtype=object)[township_index]
+
+    # scattered around the township centroid, or snapped to one of its recurring addresses
+    lat = np.array([t[1] for t in TOWNSHIPS.values()])[township_index] + rng.normal(0, TOWNSHIP_SPREAD, n)
+    lon = np.array([t[2] for t in TOWNSHIPS.values()])[township_index] + rng.normal(0, TOWNSHIP_SPREAD, n)
+    streets = rng.choice(STREETS, (n, 2))
+    addresses = np.char.add(np.char.add(streets[:, 0], ' & '), streets[:, 1]).astype(object)
+    at_hotspot = rng.random(n) < HOTSPOT_SHARE
+    spot = rng.integers(0, HOTSPOTS_PER_TOWNSHIP, n)
+    for i, name in enumerate(names):
+        mask = at_hotspot & (township_index == i)
+        spot_lat, spot_lon, spot_address = hotspots[name]
+        lat[mask] = spot_lat[spot[mask]]
+        lon[mask] = spot_lon[spot[mask]]
+        addresses[mask] = spot_address[spot[mask]]
+
+    ages = rng.integers(18, 66, size=n)
+    return pd.DataFrame({
+        'timestamp': _timestamps(rng, types, start, end),
+        'emergency_type': types,
+        'emergency_subtype': subtypes,
+        'township': townships,
+        'zipcode': zipcodes,
+        'latitude': lat.round(6),
+        'longitude': lon.round(6),
+        'address': addresses,
+        'priority_flag': 1,
+        'caller_gender': np.where(rng.random(n) < 0.5, 'Male', 'Female'),
+        'caller_age': ages,
+        'age_group': _age_groups(ages),
+        'source': 'synthetic',
+    })
+
+
+def emergency_rows(calls):
+    titles = calls['emergency_type'] + ': ' + calls['emergency_subtype'] + ' -'
+    stamps = calls['timestamp'].dt.strftime('%Y-%m-%d @ %H:%M:%S')
+    # the Montgomery 'desc' layout: address; township; station; timestamp;
+    stations = 'Station ' + (100 + calls['zipcode'].str[-3:].astype(int) % 300).astype(str)
+    calls = calls.assign(emergency_title=titles,
+                         description=calls['address'] + ';  ' + calls['township'] + '; ' + stations + '; ' + stamps + ';')
+    return calls[EMERGENCY_COLUMNS]
+
+
+def enriched_rows(calls, first_id):
+    n = len(calls)
+    ids = np.arange(first_id, first_id + n)
+    calls = calls.assign(
+        raw_call_id=LIVE_RAW_CALL_ID_BASE + ids,
+        district=calls['township'],
+        description=calls['emergency_subtype'].str.lower() + ' reported at ' + calls['address'].str.lower(),
+        caller_name='Caller ' + pd.Series(ids, index=calls.index).astype(str),
+        caller_number='555-' + pd.Series(ids % 10000, index=calls.index).astype(str).str.zfill(4),
+        model_version='synthetic',
+        processed_at=calls['timestamp'] + pd.to_timedelta(5 + ids % 55, unit='s'),
+        source='live',
+    )
+    return calls[ENRICHED_COLUMNS]
+
+
+def forecast_rows(daily_calls, start, generated_at):
+    #30 days of ARIMA-like forecasts per type (and Overall) at the generated daily volume
+    rows = []
+    dates = pd.date_range(start, periods=FORECAST_DAYS, freq='D')
+    for etype, share in [('Overall', 1.0)] + list(TYPE_SHARES.items()):
+        level = daily_calls * share
+        for date in dates:
+            predicted = level * WEEKDAY_FACTOR[date.weekday()]
+            rows.append((date.strftime('%Y-%m-%d'), round(predicted, 2), round(predicted * 0.85, 2),
+                         round(predicted * 1.15, 2), etype, 'ARIMA', generated_at))
+    return pd.DataFrame(rows, columns=FORECAST_COLUMNS)
+
+
+def write_chunk(df, path):
+    df.to_csv(path, index=False, date_format='%Y-%m-%d %H:%M:%S')
+
+
+def generate(args):
+    out = args.out or os.path.join(DATA_DIR, f"{args.rows}-{args.seed}")
+    os.makedirs(out, exist_ok=True)
+    live_end = pd.Timestamp(args.live_end or datetime.now().strftime('%Y-%m-%d'))
+    live_start = live_end - timedelta(days=args.live_days - 1)
+    hotspots = _hotspots(args.seed)
+
+    manifest = {
+        'seed': args.seed, 'chunk_size': args.chunk_size,
+        'history': {'start': args.start, 'end': args.end},
+        'live': {'start': live_start.strftime('%Y-%m-%d'), 'end': live_end.strftime('%Y-%m-%d')},
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'tables': {},
+    }
+
+    t0 = time.time()
+    plan = [('emergency_data', args.rows, args.start, args.end, 0),
+            # live chunks use their own seed stream so changing --rows doesn't change them
+            ('enriched_calls', args.live_rows, live_start, live_end, 1 << 20)]
+    for table, rows, start, end, chunk_base in plan:
+        files = []
+        for chunk, first in enumerate(range(0, rows, args.chunk_size)):
+            n = min(args.chunk_size, rows - first)
+            calls = generate_calls(n, args.seed, chunk_base + chunk, start, end, hotspots)
+            df = emergency_rows(calls) if table == 'emergency_data' else enriched_rows(calls, first)
+            name = f"{table}_{chunk:04d}.csv"
+            write_chunk(df, os.path.join(out, name))
+            files.append(name)
+            print(f" {table}: {first + n:,}/{rows:,} rows ({time.time() - t0:.0f}s)")
+        manifest['tables'][table] = {'rows': rows, 'files': files}
+
+    days = (pd.Timestamp(args.end) - pd.Timestamp(args.start)).days + 1
+    forecasts = forecast_rows(args.rows / days, live_end + timedelta(days=1), manifest['generated_at'].replace('T', ' '))
+    write_chunk(forecasts, os.path.join(out, 'forecasted_calls_0000.csv'))
+    manifest['tables']['forecasted_calls'] = {'rows': len(forecasts), 'files': ['forecasted_calls_0000.csv']}
+
+    with open(os.path.join(out, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Wrote {args.rows + args.live_rows + len(forecasts):,} rows to {out} in {time.time() - t0:.0f}s")
+
+
+def get_db_connection():
+    import mysql.connector
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(ROOT, 'crisislens-API', '.env'))
+    return mysql.connector.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        port=int(os.getenv('DB_PORT', 3306)),
+        user=os.getenv('DB_USER', 'root'),
+        password=os.getenv('DB_PASSWORD', ''),
+        database=os.getenv('DB_NAME', 'crisislens'),
+        allow_local_infile=True,
+    )
+
+
+def load_file(conn, table, columns, path, use_infile):
+    #Loads one CSV chunk; returns whether LOAD DATA worked so later chunks skip straight to INSERTs
+    cursor = conn.cursor()
+    if use_infile:
+        try:
+            cursor.execute(f"""
+                LOAD DATA LOCAL INFILE %s INTO TABLE {table}
+                FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+                LINES TERMINATED BY '\\n' IGNORE 1 LINES ({', '.join(columns)})
+            """, (os.path.abspath(path),))
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            print(f" LOAD DATA LOCAL INFILE unavailable ({e}), using batched INSERTs")
+
+    df = pd.read_csv(path, dtype={'zipcode': str, 'caller_number': str}, keep_default_na=False)
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    rows = df[columns].astype(object).values.tolist()
+    for start in range(0, len(rows), INSERT_BATCH):
+        cursor.executemany(query, rows[start:start + INSERT_BATCH])
+    conn.commit()
+    return False
+
+
+def load(args):
+    with open(os.path.join(args.data, 'manifest.json')) as f:
+        manifest = json.load(f)
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    # the synthetic live calls have no raw_calls rows behind them
+    cursor.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+    use_infile = not args.no_infile
+    t0 = time.time()
+    try:
+        sys.path.insert(0, os.path.join(ROOT, 'crisislens-API'))
+        if 'emergency_data' in args.tables:
+            # monthly partitions (database/10_partition_by_month.sql) before the rows go in
+            from services.table_maintenance import ensure_partitions
+            ensure_partitions(conn, 'emergency_data', start=datetime.strptime(manifest['history']['start'], '%Y-%m-%d'))
+        for name in args.tables:
+            table, columns = TABLES[name]
+            if args.replace:
+                cursor.execute(f"TRUNCATE TABLE {table}")
+            entry = manifest['tables'][name]
+            for i, filename in enumerate(entry['files']):
+                use_infile = load_file(conn, table, columns, os.path.join(args.data, filename), use_infile)
+                print(f" {table}: file {i + 1}/{len(entry['files'])} ({time.time() - t0:.0f}s)")
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            print(f"{table}: {cursor.fetchone()[0]:,} rows")
+        cursor.execute("ANALYZE TABLE " + ', '.join(TABLES[name][0] for name in args.tables))
+        cursor.fetchall()
+
+        sources = [UNIFIED_SOURCES[name] for name in args.tables if name in UNIFIED_SOURCES]
+        if sources and not args.no_unified:
+            from services.unified_calls import backfill
+            # TRUNCATE restarts the source ids, so a replaced table is copied over from scratch
+            backfill(conn, sources, rebuild=args.replace)
+            cursor.execute("ANALYZE TABLE calls_unified")
+            cursor.fetchall()
+    finally:
+        conn.close()
+    print(f"Loaded {args.data} in {time.time() - t0:.0f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Synthetic CrisisLens dataset for load tests")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    gen = sub.add_parser('generate', help="Write the dataset as CSV chunks plus a manifest")
+    gen.add_argument("--rows", type=int, default=1000000, help="emergency_data rows")
+    gen.add_argument("--live-rows", type=int, default=100000, help="enriched_calls rows")
+    gen.add_argument("--seed", type=int, default=7)
+    gen.add_argument("--start", default=HISTORY_START)
+    gen.add_argument("--end", default=HISTORY_END)
+    gen.add_argument("--live-days", type=int, default=30, help="Days of live calls ending at --live-end")
+    gen.add_argument("--live-end", help="Last day of live calls, YYYY-MM-DD (default today)")
+    gen.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    gen.add_argument("--out", help=f"Output directory (default {os.path.relpath(DATA_DIR, ROOT)}/<rows>-<seed>)")
+
+    ld = sub.add_parser('load', help="Load a generated dataset into MySQL")
+    ld.add_argument("--data", required=True, help="Directory written by generate")
+    ld.add_argument("--tables", nargs="+", choices=list(TABLES), default=list(TABLES))
+    ld.add_argument("--replace", action="store_true", help="TRUNCATE the tables first")
+    ld.add_argument("--no-infile", action="store_true", help="Skip LOAD DATA LOCAL INFILE, use batched INSERTs")
+    ld.add_argument("--no-unified", action="store_true", help="Don't copy the loaded calls into calls_unified")
+
+    args = parser.parse_args()
+    if args.command == 'generate':
+        generate(args)
+    else:
+        load(args)
@@ -0,0 +1,267 @@
+"""
+Fixed-concurrency load test of a running API, with results saved as JSON per commit.
+
+    python scripts/loadtest/run.py run --url http://localhost:5000 --data Data/loadtest/5000000-7
+    python scripts/loadtest/run.py run --scenarios dashboard upload ingest_burst --seconds 60
+    python scripts/loadtest/run.py compare scripts/loadtest/results/<base>.json scripts/loadtest/results/<new>.json
+
+Each scenario (scenarios.py) runs its clients in a closed loop for --warmup seconds
+(discarded) and then --seconds. The result file records the commit, the host, the dataset
+manifest and, per scenario and per endpoint, throughput and latency percentiles; the DB
+share comes from the Server-Timing header. `compare` prints the change between two result
+files and exits with status 1 when a p95 or throughput moved past --threshold percent.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import platform
+import argparse
+import threading
+import subprocess
+import http.client
+from datetime import datetime
+from urllib.parse import urlparse
+
+from scenarios import SCENARIOS, READ_ONLY, Context, client_rng
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+PERCENTILES = [50, 90, 95, 99]
+TIMEOUT = 120
+
+
+def git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True, timeout=30).stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+
+def environment(url, manifest):
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'subject': git('log', '-1', '--format=%s'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'host': socket.gethostname(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'url': url,
+        'dataset': {k: manifest[k] for k in ('seed', 'history', 'live', 'tables') if k in manifest} or None,
+    }
+
+
+def server_db_ms(header):
+    #db duration out of a Server-Timing header (request_profiler), None without one
+    for metric in (header or '').split(','):
+        name, _, rest = metric.strip().partition(';')
+        if name == 'db':
+            for part in rest.split(';'):
+                if part.startswith('dur='):
+                    return float(part[4:])
+    return None
+
+
+class Recorder:
+
+    def __init__(self):
+        self.samples = []  # (label, seconds, status, db_ms)
+        self.lock = threading.Lock()
+
+    def extend(self, samples):
+        with self.lock:
+            self.samples.extend(samples)
+
+
+def run_client(host, port, requests, stop_at, recorder):
+    conn = http.client.HTTPConnection(host, port, timeout=TIMEOUT)
+    local = []
+    for req in requests:
+        if time.perf_counter() >= stop_at:
+            break
+        t0 = time.perf_counter()
+        try:
+            conn.request(req.method, req.path, req.body, req.headers)
+            response = conn.getresponse()
+            response.read()
+            status, db_ms = response.status, server_db_ms(response.getheader('Server-Timing'))
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=TIMEOUT)
+            status, db_ms = 0, None
+        local.append((req.label, time.perf_counter() - t0, status, db_ms))
+    conn.close()
+    recorder.extend(local)
+
+
+def drive(url, scenario, ctx, seed, seconds, phase):
+    parsed = urlparse(url)
+    recorder = Recorder()
+    stop_at = time.perf_counter() + seconds
+    threads = [threading.Thread(target=run_client, args=(
+        parsed.hostname, parsed.port or 80,
+        scenario.requests(client_rng(f"{seed}:{phase}", scenario.name, i), ctx), stop_at, recorder))
+        for i in range(scenario.concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return recorder.samples, time.perf_counter() - t0
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(samples, elapsed):
+    # 429 is admission control deferring work, counted apart from errors
+    ok = sorted(s[1] * 1000 for s in samples if 0 < s[2] < 400)
+    db = sorted(s[3] for s in samples if 0 < s[2] < 400 and s[3] is not None)
+    statuses = {}
+    for s in samples:
+        statuses[str(s[2])] = statuses.get(str(s[2]), 0) + 1
+    summary = {
+        'requests': len(samples),
+        'ok': len(ok),
+        'errors': sum(1 for s in samples if s[2] == 0 or (s[2] >= 400 and s[2] != 429)),
+        'throttled': statuses.get('429', 0),
+        'rps': round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {f"p{p}": _round(percentile(ok, p)) for p in PERCENTILES},
+        'statuses': statuses,
+    }
+    summary['latency_ms']['mean'] = _round(sum(ok) / len(ok)) if ok else None
+    summary['latency_ms']['max'] = _round(ok[-1]) if ok else None
+    summary['db_ms'] = {f"p{p}": _round(percentile(db, p)) for p in (50, 95)}
+    return summary
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+def run(args):
+    manifest = {}
+    if args.data:
+        with open(os.path.join(args.data, 'manifest.json')) as f:
+            manifest = json.load(f)
+    ctx = Context(manifest)
+
+    result = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'config': {'seconds': args.seconds, 'warmup': args.warmup, 'seed': args.seed,
+                   'concurrency': args.concurrency},
+        'environment': environment(args.url, manifest),
+        'scenarios': {},
+    }
+
+    print(f"{'scenario':<14} {'clients':>7} {'requests':>9} {'errors':>7} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name in args.scenarios:
+        scenario = SCENARIOS[name]
+        if args.concurrency:
+            scenario.concurrency = args.concurrency
+        if args.warmup:
+            drive(args.url, scenario, ctx, args.seed, args.warmup, 'warmup')
+        samples, elapsed = drive(args.url, scenario, ctx, args.seed, args.seconds, 'run')
+
+        entry = summarize(samples, elapsed)
+        entry.update({'concurrency': scenario.concurrency, 'seconds': round(elapsed, 2),
+                      'description': scenario.description, 'endpoints': {}})
+        for label in sorted({s[0] for s in samples}):
+            entry['endpoints'][label] = summarize([s for s in samples if s[0] == label], elapsed)
+        result['scenarios'][name] = entry
+
+        lat = entry['latency_ms']
+        fmt = lambda v: f"{v:>8.1f}" if v is not None else f"{'-':>8}"
+        print(f"{name:<14} {scenario.concurrency:>7} {entry['requests']:>9} {entry['errors']:>7} "
+              f"{entry['rps']:>8.1f} {fmt(lat['p50'])} {fmt(lat['p95'])} {fmt(lat['p99'])}")
+
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        commit = (result['environment']['commit'] or 'nogit')[:10]
+        out = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json")
+    with open(out, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {out}")
+
+
+def _change(base, new):
+    if base in (None, 0) or new is None:
+        return None
+    return (new - base) / base * 100
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    print(f"base {base['environment'].get('commit', '')[:10]}  {base['environment'].get('subject') or ''}")
+    print(f"new  {new['environment'].get('commit', '')[:10]}  {new['environment'].get('subject') or ''}")
+    if base['environment'].get('dataset') != new['environment'].get('dataset'):
+        print("warning: the runs used different datasets")
+
+    regressions = []
+    print(f"\n{'scenario / endpoint':<48} {'req/s':>18} {'p50 ms':>18} {'p95 ms':>18}")
+    for name, b in base['scenarios'].items():
+        n = new['scenarios'].get(name)
+        if not n:
+            continue
+        rows = [(name, b, n)] + [(f"  {label}", b['endpoints'][label], n['endpoints'][label])
+                                 for label in b['endpoints'] if label in n['endpoints']]
+        for label, b_entry, n_entry in rows:
+            cells = []
+            for key, worse_if_up in (('rps', False), ('p50', True), ('p95', True)):
+                b_value = b_entry['rps'] if key == 'rps' else b_entry['latency_ms'][key]
+                n_value = n_entry['rps'] if key == 'rps' else n_entry['latency_ms'][key]
+                change = _change(b_value, n_value)
+                cells.append(f"{n_value if n_value is not None else '-':>9} "
+                             f"{'' if change is None else f'{change:+.0f}%':>8}")
+                # the p50 column is informational, the gate is on throughput and p95
+                if change is not None and key != 'p50' and (change if worse_if_up else -change) > args.threshold:
+                    regressions.append(f"{label.strip()} {key} {b_value} -> {n_value} ({change:+.0f}%)")
+            print(f"{label:<48} {' '.join(cells)}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) past {args.threshold}%:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions past {args.threshold}%")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="CrisisLens API load test")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    r = sub.add_parser('run', help="Run scenarios against a running API")
+    r.add_argument("--url", default="http://localhost:5000")
+    r.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=READ_ONLY)
+    r.add_argument("--seconds", type=float, default=30)
+    r.add_argument("--warmup", type=float, default=5)
+    r.add_argument("--concurrency", type=int, help="Override every scenario's client count")
+    r.add_argument("--seed", type=int, default=1)
+    r.add_argument("--data", help="Dataset directory (its manifest sets the date ranges and is recorded)")
+    r.add_argument("--out", help=f"Result file (default {os.path.relpath(RESULTS_DIR, ROOT)}/<time>-<commit>.json)")
+
+    c = sub.add_parser('compare', help="Compare two result files")
+    c.add_argument("base")
+    c.add_argument("new")
+    c.add_argument("--threshold", type=float, default=10, help="Percent change that counts as a regression")
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        compare(args)
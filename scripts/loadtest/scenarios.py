@@ -0,0 +1,239 @@
+"""
+Dashboard scenarios for scripts/loadtest/run.py.
+
+A scenario is a fixed number of clients, each looping over a weighted mix of requests for
+the run's duration. Every request is built from the client's own seeded Random, so two
+runs with the same --seed send the same sequence of requests.
+"""
+import io
+import csv
+import json
+import math
+import random
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
+
+from dataset import TYPE_SHARES, SUBTYPES, TOWNSHIPS, HISTORY_START, HISTORY_END
+
+
+class Request:
+
+    __slots__ = ('label', 'method', 'path', 'body', 'headers')
+
+    def __init__(self, label, method, path, body=None, headers=None):
+        self.label = label
+        self.method = method
+        self.path = path
+        self.body = body
+        self.headers = headers or {}
+
+
+def get(label, path, **params):
+    params = {k: v for k, v in params.items() if v is not None}
+    return Request(label, 'GET', f"{path}?{urlencode(params)}" if params else path)
+
+
+def post_json(label, path, payload):
+    return Request(label, 'POST', path, json.dumps(payload).encode(), {'Content-Type': 'application/json'})
+
+
+class Scenario:
+
+    def __init__(self, name, concurrency, mix, description):
+        self.name = name
+        self.concurrency = concurrency
+        self.mix = mix  # [(weight, fn(rng, ctx) -> Request)]
+        self.description = description
+
+    def requests(self, rng, ctx):
+        #Endless stream of requests for one client
+        weights = [w for w, _ in self.mix]
+        makers = [m for _, m in self.mix]
+        while True:
+            yield rng.choices(makers, weights)[0](rng, ctx)
+
+
+class Context:
+    #What the requests may filter on, from the dataset manifest when one is given
+
+    def __init__(self, manifest=None):
+        manifest = manifest or {}
+        history = manifest.get('history', {})
+        live = manifest.get('live', {})
+        self.start = date.fromisoformat(history.get('start', HISTORY_START))
+        self.end = date.fromisoformat(history.get('end', HISTORY_END))
+        self.live_end = date.fromisoformat(live.get('end', date.today().isoformat()))
+        self.historical_rows = manifest.get('tables', {}).get('emergency_data', {}).get('rows', 1000000)
+        self.types = list(TYPE_SHARES)
+        self.townships = list(TOWNSHIPS)
+
+    def random_day(self, rng):
+        return self.start + timedelta(days=rng.randrange((self.end - self.start).days + 1))
+
+    def random_window(self, rng, days):
+        first = self.random_day(rng)
+        return first.isoformat(), min(first + timedelta(days=days), self.end).isoformat()
+
+
+def _deep_page(rng, limit, rows):
+    # most dashboard paging stays in the first pages, a few jump deep into the history
+    if rng.random() < 0.9:
+        return rng.randint(1, 10)
+    return rng.randint(1, max(1, rows // limit))
+
+
+def calls_page(rng, ctx):
+    limit = rng.choice([50, 100, 500])
+    source = rng.choices(['all', 'historical', 'live'], [0.5, 0.35, 0.15])[0]
+    etype = rng.choice(ctx.types) if rng.random() < 0.4 else None
+    return get(f"GET /calls source={source}", '/calls', page=_deep_page(rng, limit, ctx.historical_rows),
+               limit=limit, source=source, type=etype,
+               subtype=rng.choice(list(SUBTYPES[etype])) if etype and rng.random() < 0.3 else None,
+               district=rng.choice(ctx.townships) if rng.random() < 0.3 else None)
+
+
+def calls_by_date(rng, ctx):
+    return get('GET /calls date=', '/calls', date=ctx.random_day(rng).isoformat(), source='historical', limit=500)
+
+
+def calls_latest(rng, ctx):
+    return get('GET /calls/latest', '/calls/latest', limit=rng.choice([10, 50]))
+
+
+def clusters(rng, ctx):
+    # the endpoint caches one parameter set at a time, so varying them measures the uncached path
+    types = ','.join(rng.sample(ctx.types, rng.randint(1, len(ctx.types))))
+    start, end = ctx.random_window(rng, rng.choice([7, 30, 90]))
+    return get('GET /clusters', '/clusters', emergency_types=types, start_date=start, end_date=end)
+
+
+def heatmap(rng, ctx):
+    start, end = ctx.random_window(rng, 30)
+    return get('GET /clusters/heatmap-data', '/clusters/heatmap-data', start_date=start, end_date=end)
+
+
+def map_points(rng, ctx, width=1280, height=800):
+    # a 1280x800 viewport over a township, from the whole county down to street level
+    zoom = rng.choice([10, 11, 12, 13, 14, 15, 16, 17])
+    _, lat, lon, _ = TOWNSHIPS[rng.choice(ctx.townships)]
+    lat, lon = lat + rng.gauss(0, 0.01), lon + rng.gauss(0, 0.01)
+    half_lon = width / 2 * 360 / (256 * 2 ** zoom)
+    half_lat = height / 2 * 360 / (256 * 2 ** zoom) * math.cos(math.radians(lat))
+    start, end = ctx.random_window(rng, rng.choice([30, 365]))
+    label = 'GET /map/points zoom<14' if zoom < 14 else 'GET /map/points zoom>=14'
+    return get(label, '/map/points', bbox=f"{lon - half_lon:.6f},{lat - half_lat:.6f},{lon + half_lon:.6f},{lat + half_lat:.6f}",
+               zoom=zoom, start_date=start, end_date=end)
+
+
+def live_hotspots(rng, ctx):
+    return get('GET /clusters/live', '/clusters/live', type=rng.choice(ctx.types) if rng.random() < 0.3 else None)
+
+
+def peak_hours(rng, ctx):
+    start, end = ctx.random_window(rng, rng.choice([30, 365]))
+    return get('GET /temporal/peak-hours', '/temporal/peak-hours', start_date=start, end_date=end,
+               type=rng.choice(ctx.types + [None]))
+
+
+def seasonal_trends(rng, ctx):
+    return get('GET /temporal/seasonal-trends', '/temporal/seasonal-trends', type=rng.choice(ctx.types + [None]))
+
+
+def type_patterns(rng, ctx):
+    return get('GET /temporal/type-patterns', '/temporal/type-patterns')
+
+
+def summary_stats(rng, ctx):
+    return get('GET /temporal/summary-stats', '/temporal/summary-stats')
+
+
+def forecasts(rng, ctx):
+    return get('GET /forecasts', '/forecasts', type=rng.choice(['Overall'] + ctx.types), days=rng.choice([7, 30]))
+
+
+def forecast_summary(rng, ctx):
+    return get('GET /forecast-summary', '/forecast-summary', type=rng.choice(['Overall'] + ctx.types))
+
+
+def stats(rng, ctx):
+    path = rng.choice(['/stats/counts', '/stats/daily', '/stats/township'])
+    return get(f"GET {path}", path)
+
+
+def timeline(rng, ctx):
+    start, end = ctx.random_window(rng, 365)
+    return get('GET /timeline-aggregated', '/timeline-aggregated', start_date=start, end_date=end,
+               emergency_type=rng.choice(ctx.types + [None]))
+
+
+def _call(rng, ctx):
+    name = rng.choice(ctx.townships)
+    _, lat, lon, _ = TOWNSHIPS[name]
+    etype = rng.choice(ctx.types)
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'description': f"{rng.choice(list(SUBTYPES[etype])).lower()} reported near {name.title()}",
+        'latitude': round(lat + rng.gauss(0, 0.015), 6),
+        'longitude': round(lon + rng.gauss(0, 0.015), 6),
+        'district': name,
+        'gender': rng.choice(['Male', 'Female']),
+        'age': rng.randint(18, 90),
+        'priority_flag': rng.random() < 0.05,
+    }
+
+
+def post_call(rng, ctx):
+    return post_json('POST /calls', '/calls', _call(rng, ctx))
+
+
+def post_batch(rng, ctx):
+    return post_json('POST /calls/batch', '/calls/batch', {'calls': [_call(rng, ctx) for _ in range(100)]})
+
+
+def upload(rng, ctx, rows=1000):
+    # typed rows, so /upload takes the synchronous path without the classifier
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['timestamp', 'description', 'latitude', 'longitude', 'emergency_type', 'emergency_subtype',
+                     'township'])
+    for _ in range(rows):
+        call = _call(rng, ctx)
+        etype = rng.choice(ctx.types)
+        stamp = datetime.combine(ctx.random_day(rng), datetime.min.time()) + timedelta(seconds=rng.randrange(86400))
+        writer.writerow([stamp.strftime('%Y-%m-%d %H:%M:%S'), call['description'], call['latitude'],
+                         call['longitude'], etype, rng.choice(list(SUBTYPES[etype])), call['district']])
+
+    boundary = f"loadtest{rng.getrandbits(64):016x}"
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"loadtest.csv\"\r\n"
+            f"Content-Type: text/csv\r\n\r\n{buffer.getvalue()}\r\n--{boundary}--\r\n").encode()
+    return Request('POST /upload', 'POST', '/upload', body, {'Content-Type': f"multipart/form-data; boundary={boundary}"})
+
+
+SCENARIOS = {s.name: s for s in [
+    Scenario('calls_paging', 16, [(6, calls_page), (2, calls_by_date), (2, calls_latest)],
+             "Call log: paging and filtering /calls, live feed refreshes"),
+    Scenario('clusters', 4, [(3, clusters), (1, heatmap), (2, map_points), (2, live_hotspots)],
+             "Map view: DBSCAN clusters, heatmap and viewport queries over changing windows"),
+    Scenario('temporal', 8, [(3, peak_hours), (2, seasonal_trends), (1, type_patterns), (1, summary_stats),
+                             (2, timeline)],
+             "Trends view: /temporal/* and the aggregated timeline"),
+    Scenario('forecasts', 8, [(3, forecasts), (1, forecast_summary)],
+             "Forecast view: /forecasts and /forecast-summary"),
+    Scenario('dashboard', 16, [(4, calls_page), (3, calls_latest), (3, stats), (1, clusters), (1, heatmap), (1, map_points),
+                               (1, live_hotspots), (2, peak_hours), (1, seasonal_trends), (1, summary_stats),
+                               (2, forecasts), (1, timeline)],
+             "Mixed dashboard traffic across all views"),
+    Scenario('upload', 2, [(1, upload)],
+             "CSV uploads of 1000 typed rows (synchronous path)"),
+    Scenario('ingest_burst', 32, [(1, post_call)],
+             "Burst of single POST /calls from many clients"),
+    Scenario('ingest_batch', 4, [(1, post_batch)],
+             "POST /calls/batch with 100 calls per request"),
+]}
+
+# run by default; the ingest and upload scenarios write to the database and are opt-in
+READ_ONLY = ['calls_paging', 'clusters', 'temporal', 'forecasts', 'dashboard']
+
+
+def client_rng(seed, scenario, client):
+    return random.Random(f"{seed}:{scenario}:{client}")